@@ -12,7 +12,7 @@
 #  see <https://www.gnu.org/licenses/>.
 
 from django.contrib import admin
-from .models import AppInfo
+from .models import AppInfo, AppVersion
 
 
 @admin.register(AppInfo)
@@ -23,6 +23,7 @@ class AppRegAdmin(admin.ModelAdmin):
         "type",
         "file_path",
         "schema_path",
+        "current_version",
     )
 
     readonly_fields = (
@@ -31,4 +32,31 @@ class AppRegAdmin(admin.ModelAdmin):
     )
     
     list_filter = ("type",)
-    search_fields = ("name",)
\ No newline at end of file
+    search_fields = ("name",)
+
+
+@admin.register(AppVersion)
+class AppVersionAdmin(admin.ModelAdmin):
+    """Versions are uploaded through the API and never change, only their label can be edited"""
+    list_display = (
+        "application",
+        "label",
+        "sha256",
+        "size",
+        "created_at",
+        "created_by",
+    )
+    readonly_fields = (
+        "id",
+        "application",
+        "sha256",
+        "file",
+        "size",
+        "created_at",
+        "created_by",
+    )
+    list_filter = ("application",)
+    search_fields = ("application__name", "label", "sha256")
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:54
+
+import common.storage
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application_registry', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppVersion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identification number', primary_key=True, serialize=False)),
+                ('sha256', models.CharField(editable=False, help_text='SHA-256 hex digest of the program file', max_length=64)),
+                ('file', models.FileField(editable=False, help_text='Program file, named after its hash', max_length=500, storage=common.storage.get_application_storage, upload_to='')),
+                ('size', models.BigIntegerField(editable=False, help_text='Size of the program file in bytes')),
+                ('label', models.CharField(blank=True, default='', help_text='Optional human readable version, e.g. 1.4.2', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Upload date of the version')),
+                ('application', models.ForeignKey(help_text='Application this is a release of', on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='application_registry.appinfo')),
+                ('created_by', models.ForeignKey(blank=True, help_text='Administrator who uploaded the version', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appinfo',
+            name='current_version',
+            field=models.ForeignKey(blank=True, help_text='Version new jobs run unless they pin another one', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='application_registry.appversion'),
+        ),
+        migrations.AddConstraint(
+            model_name='appversion',
+            constraint=models.UniqueConstraint(fields=('application', 'sha256'), name='unique_app_version'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application_registry', '0002_appversion'),
+        ('runner_manager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RunnerAppCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reported_at', models.DateTimeField(auto_now=True, help_text='When the runner last reported the version as cached')),
+                ('runner', models.ForeignKey(help_text='Runner holding the program', on_delete=django.db.models.deletion.CASCADE, related_name='app_cache', to='runner_manager.runnerinfo')),
+                ('version', models.ForeignKey(help_text='Cached application version', on_delete=django.db.models.deletion.CASCADE, related_name='runner_caches', to='application_registry.appversion')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='runnerappcache',
+            constraint=models.UniqueConstraint(fields=('runner', 'version'), name='unique_runner_app_cache'),
+        ),
+    ]
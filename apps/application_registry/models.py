@@ -11,9 +11,16 @@
 # You should have received a copy of the GNU General Public License along with this program. If not,
 #  see <https://www.gnu.org/licenses/>.
 
+import hashlib
+import tempfile
 import uuid
 
-from django.db import models
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, models, transaction
+
+from common.storage import get_application_storage
+from runner_manager.models import RunnerInfo
 
 
 class AppType(models.TextChoices):
@@ -55,6 +62,14 @@ class AppInfo(models.Model):
         null=True,
         help_text="Full path to the input schema file"
     ) 
+    current_version = models.ForeignKey(
+        "AppVersion",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="Version new jobs run unless they pin another one"
+    )
     
     @property
     def content_type(self):
@@ -66,4 +81,139 @@ class AppInfo(models.Model):
             AppType.LINUX_BINARY: 'application/octet-stream',
             AppType.WINDOWS_BINARY: 'application/octet-stream',
         }
-        return content_type_map.get(self.type, 'application/octet-stream')
\ No newline at end of file
+        return content_type_map.get(self.type, 'application/octet-stream')
+
+class AppVersion(models.Model):
+    """
+    Immutable release of an application, identified by the SHA-256 of its program file.
+
+    Files are stored content-addressed, so uploading the same program twice yields the same version
+    and runners can cache them by hash.
+    """
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text="Unique identification number"
+    )
+    application = models.ForeignKey(
+        AppInfo,
+        on_delete=models.CASCADE,
+        related_name="versions",
+        help_text="Application this is a release of"
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        editable=False,
+        help_text="SHA-256 hex digest of the program file"
+    )
+    file = models.FileField(
+        storage=get_application_storage,
+        max_length=500,
+        editable=False,
+        help_text="Program file, named after its hash"
+    )
+    size = models.BigIntegerField(
+        editable=False,
+        help_text="Size of the program file in bytes"
+    )
+    label = models.CharField(
+        max_length=100,
+        blank=True,
+        default="",
+        help_text="Optional human readable version, e.g. 1.4.2"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Upload date of the version"
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="Administrator who uploaded the version"
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["application", "sha256"], name="unique_app_version"),
+        ]
+
+    def __str__(self):
+        return f"{self.application.name}@{self.label or self.sha256[:12]}"
+
+    @staticmethod
+    def storage_name(sha256):
+        return f"sha256/{sha256[:2]}/{sha256}"
+
+    @classmethod
+    def create_from_file(cls, application, content, label="", created_by=None):
+        """
+        Store a program file and register it as a version of application.
+
+        Returns (version, created); an already uploaded program returns its existing version.
+        """
+        if not isinstance(content, File):
+            content = File(content)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as spooled:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                spooled.write(chunk)
+                size += len(chunk)
+            sha256 = digest.hexdigest()
+
+            existing = cls.objects.filter(application=application, sha256=sha256).first()
+            if existing is not None:
+                return existing, False
+
+            storage = get_application_storage()
+            name = cls.storage_name(sha256)
+            if not storage.exists(name):
+                spooled.seek(0)
+                name = storage.save(name, File(spooled))
+
+        try:
+            with transaction.atomic():
+                version = cls.objects.create(
+                    application=application, sha256=sha256, file=name, size=size, label=label,
+                    created_by=created_by
+                )
+        except IntegrityError:
+            # Uploaded concurrently
+            return cls.objects.get(application=application, sha256=sha256), False
+        return version, True
+
+
+class RunnerAppCache(models.Model):
+    """An application version a runner reported to hold in its local program cache."""
+
+    runner = models.ForeignKey(
+        RunnerInfo,
+        on_delete=models.CASCADE,
+        related_name="app_cache",
+        help_text="Runner holding the program"
+    )
+    version = models.ForeignKey(
+        AppVersion,
+        on_delete=models.CASCADE,
+        related_name="runner_caches",
+        help_text="Cached application version"
+    )
+    reported_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the runner last reported the version as cached"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["runner", "version"], name="unique_runner_app_cache"),
+        ]
+
+    def __str__(self):
+        return f"{self.version} on runner {self.runner_id}"
@@ -0,0 +1,61 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Program prefetch: tell connected runners about a new application version ahead of the first job.
+
+Runners receive an ``app_prefetch`` message on their websocket, download the version in the
+background and report it with the ``prefetched`` endpoint; the dispatcher then prefers runners
+already holding the version a job runs.
+"""
+
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.urls import reverse
+
+from runner_manager.consumers import RUNNERS_GROUP
+
+logger = logging.getLogger(__name__)
+
+
+def prefetch_message(version):
+    return {
+        "type": "app_prefetch",
+        "application_id": str(version.application_id),
+        "sha256": version.sha256,
+        "size": version.size,
+        "url": reverse(
+            "application_registry-version-program",
+            kwargs={"pk": version.application_id, "sha256": version.sha256},
+        ),
+    }
+
+
+def broadcast_prefetch(version):
+    """
+    Announce a version to all connected runners once the current transaction commits.
+
+    Best effort: runners that are offline fetch the program with their first job instead.
+    """
+    message = prefetch_message(version)
+
+    def send():
+        try:
+            async_to_sync(get_channel_layer().group_send)(RUNNERS_GROUP, message)
+        except Exception as error:
+            logger.warning(f"Cannot announce application version {version.sha256}: {error}")
+
+    transaction.on_commit(send)
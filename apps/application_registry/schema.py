@@ -0,0 +1,136 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Application input schemas: a per-process cache of parsed schemas and their validators.
+
+A schema file is read and parsed once; the cached entry is reused until the file's modification
+time or size changes, so serving the schema and validating job inputs against it costs no I/O
+beyond a stat.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+import yaml
+from jsonschema.validators import validator_for
+
+from common.storage import application_storage
+
+# Job configuration files larger than this are not parsed for validation
+MAX_VALIDATED_SIZE = 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+
+VALIDATED_EXTENSIONS = {
+    ".json": json.loads,
+    ".yaml": yaml.safe_load,
+    ".yml": yaml.safe_load,
+}
+
+
+class SchemaNotFound(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CachedSchema:
+    content: bytes
+    schema: dict
+    validator: object
+
+    def errors(self, document):
+        """Messages of the validation errors of document, empty when it is valid."""
+        errors = sorted(self.validator.iter_errors(document), key=lambda error: list(error.path))
+        return [
+            f"{'.'.join(str(part) for part in error.path) or '(root)'}: {error.message}"
+            for error in errors[:MAX_REPORTED_ERRORS]
+        ]
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _schema_source(schema_path):
+    """Return (opener, version key) of a schema file, absolute paths are local files."""
+    if os.path.isabs(schema_path):
+        if not os.path.exists(schema_path):
+            raise SchemaNotFound(schema_path)
+        stat = os.stat(schema_path)
+        return (lambda: open(schema_path, "rb")), (stat.st_mtime_ns, stat.st_size)
+
+    if not application_storage.exists(schema_path):
+        raise SchemaNotFound(schema_path)
+    version = (application_storage.get_modified_time(schema_path).timestamp(),
+               application_storage.size(schema_path))
+    return (lambda: application_storage.open(schema_path, "rb")), version
+
+
+def get_schema(app_info):
+    """
+    Return the CachedSchema of an application, None if it has no schema.
+
+    Raises SchemaNotFound when the schema file is missing, ValueError when it is not a valid
+    JSON schema.
+    """
+    if not app_info.schema_path:
+        return None
+    schema_path = str(app_info.schema_path)
+    opener, version = _schema_source(schema_path)
+    key = (schema_path, version)
+
+    with _lock:
+        cached = _cache.get(app_info.pk)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with opener() as file:
+        content = file.read()
+    try:
+        schema = json.loads(content)
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+    except Exception as error:
+        raise ValueError(f"Invalid schema {schema_path}: {error}") from error
+
+    entry = CachedSchema(content=content, schema=schema, validator=validator_class(schema))
+    with _lock:
+        _cache[app_info.pk] = (key, entry)
+    return entry
+
+
+def clear_schema_cache():
+    with _lock:
+        _cache.clear()
+
+
+def validate_config(app_info, content, filename):
+    """
+    Validate the content of a JSON or YAML job configuration file against the application schema.
+
+    Returns the list of error messages; files of other types, oversized files and applications
+    without a schema are not validated.
+    """
+    parse = VALIDATED_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+    if parse is None or len(content) > MAX_VALIDATED_SIZE:
+        return []
+    schema = get_schema(app_info)
+    if schema is None:
+        return []
+    try:
+        document = parse(content)
+    except (ValueError, yaml.YAMLError) as error:
+        return [f"Cannot parse {filename}: {error}"]
+    return schema.errors(document)
@@ -12,12 +12,33 @@
 #  see <https://www.gnu.org/licenses/>.
 
 from rest_framework import serializers
-from .models import AppInfo
+from .models import AppInfo, AppVersion
 
 
 class AppSerializer(serializers.ModelSerializer):
+    current_version = serializers.CharField(
+        source="current_version.sha256", read_only=True, default=None,
+        help_text="SHA-256 of the version new jobs run"
+    )
 
     class Meta:
         model = AppInfo
-        fields = ["id", "name", "file_path", "type", "schema_path"]
-        read_only_fields = ["id", "name", "file_path", "type", "schema_path"]
\ No newline at end of file
+        fields = ["id", "name", "file_path", "type", "schema_path", "current_version"]
+        read_only_fields = ["id", "name", "file_path", "type", "schema_path"]
+
+
+class AppVersionSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = AppVersion
+        fields = ["id", "sha256", "size", "label", "created_at"]
+        read_only_fields = fields
+
+
+class AppVersionUploadSerializer(serializers.Serializer):
+    """Program file uploaded as a new application version"""
+    file = serializers.FileField()
+    label = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    make_current = serializers.BooleanField(
+        default=True, help_text="Run the version for newly submitted jobs"
+    )
\ No newline at end of file
@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from application_registry.models import AppInfo, AppType, RunnerAppCache
+from runner_manager.consumers import RUNNERS_GROUP
+from runner_manager.models import RunnerInfo, RunnerStatus
+
+PROGRAM = b"print('v1')\n"
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class PrefetchTests(TestCase):
+
+    def setUp(self):
+        """Set up an application, an administrator and a runner"""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.admin = get_user_model().objects.create_superuser(
+            username='admin', password='adminpass123'
+        )
+        self.runner = RunnerInfo.objects.create(
+            owner=self.admin, token='secret_token', state=RunnerStatus.IDLE.value
+        )
+        self.app = AppInfo.objects.create(name="solver", type=AppType.PYTHON_SCRIPT,
+                                          file_path="/dev/null")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def publish(self, content=PROGRAM):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/application_registry/{self.app.id}/versions/", {
+                'file': SimpleUploadedFile("solver.py", content),
+            }, format='multipart')
+
+    def test_new_version_announced_to_runners(self):
+        """Test publishing a version sends a prefetch message to the group of all runners"""
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(RUNNERS_GROUP, channel)
+
+        sha256 = self.publish().data['sha256']
+
+        message = async_to_sync(layer.receive)(channel)
+        self.assertEqual(message['type'], 'app_prefetch')
+        self.assertEqual(message['sha256'], sha256)
+        self.assertEqual(message['url'],
+                         f"/application_registry/{self.app.id}/versions/{sha256}/program/")
+
+    def test_runner_reports_prefetch(self):
+        """Test runners report cached versions with their token"""
+        sha256 = self.publish().data['sha256']
+        url = f"/application_registry/{self.app.id}/versions/{sha256}/prefetched/"
+
+        self.assertIn(APIClient().post(url).status_code, (401, 403))
+        runner_client = APIClient()
+        runner_client.credentials(HTTP_AUTHORIZATION='Token secret_token')
+        self.assertEqual(runner_client.post(url).status_code, 204)
+        self.assertEqual(runner_client.post(url).status_code, 204)
+
+        self.assertEqual(RunnerAppCache.objects.get().runner, self.runner)
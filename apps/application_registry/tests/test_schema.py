@@ -0,0 +1,79 @@
+import json
+import os
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from application_registry.models import AppInfo, AppType
+from application_registry.schema import clear_schema_cache, get_schema
+from job_manager.models import JobInfo, JobResource, JobStatus, ResourceType
+from job_manager.tests.base import MediaRootMixin, create_user
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "sleep_time": {"type": "integer"},
+        "exit_code": {"type": "integer"},
+    },
+    "required": ["sleep_time", "exit_code"],
+}
+
+
+class ApplicationSchemaTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        """Set up an application with a schema and a job of it"""
+        super().setUp()
+        clear_schema_cache()
+
+        self.schema_path = os.path.join(self.media_root, "schema.json")
+        self.write_schema(SCHEMA)
+        self.app = AppInfo.objects.create(name="solver", type=AppType.PYTHON_SCRIPT,
+                                          file_path="/dev/null", schema_path=self.schema_path)
+        self.user = create_user()
+        self.job = JobInfo.objects.create(created_by=self.user, application_id=self.app,
+                                          status=JobStatus.RUNNING)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def write_schema(self, schema):
+        with open(self.schema_path, "w") as f:
+            json.dump(schema, f)
+
+    def upload_config(self, filename, content):
+        return self.client.post('/job_manager/resources/users/', {
+            'job': str(self.job.id),
+            'resource_type': ResourceType.CONFIG,
+            'file': SimpleUploadedFile(filename, content),
+        }, format='multipart')
+
+    def test_schema_cached_until_file_changes(self):
+        """Test the parsed schema is reused and reloaded once the file changes"""
+        first = get_schema(self.app)
+        self.assertIs(get_schema(self.app), first)
+
+        self.write_schema({**SCHEMA, "required": ["sleep_time"]})
+        second = get_schema(self.app)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.schema["required"], ["sleep_time"])
+
+        response = APIClient().get(f"/application_registry/{self.app.id}/program_schema/")
+        self.assertEqual(json.loads(response.content), second.schema)
+
+    def test_invalid_config_rejected(self):
+        """Test configs violating the schema, or not parseable, are refused at upload"""
+        response = self.upload_config("config.yaml", b"sleep_time: soon\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['file']), 2)
+        self.assertIn("sleep_time: 'soon' is not of type 'integer'", response.data['file'])
+        self.assertEqual(self.upload_config("config.json", b"{").status_code, 400)
+        self.assertFalse(JobResource.objects.exists())
+
+    def test_valid_config_accepted(self):
+        """Test valid configs and files that are not JSON or YAML are stored"""
+        self.assertEqual(
+            self.upload_config("config.yaml", b"sleep_time: 1\nexit_code: 0\n").status_code, 201
+        )
+        self.assertEqual(self.upload_config("mesh.dat", b"anything").status_code, 201)
@@ -0,0 +1,89 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from application_registry.models import AppInfo, AppType, AppVersion
+from job_manager.models import JobInfo
+from job_manager.tests.base import MediaRootMixin, create_user
+
+PROGRAM = b"#!/usr/bin/env python\nprint('v1')\n"
+
+
+class AppVersionTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        """Set up an application, an administrator and a regular user"""
+        super().setUp()
+        self.admin = get_user_model().objects.create_superuser(
+            username='admin', password='adminpass123'
+        )
+        self.user = create_user()
+        self.app = AppInfo.objects.create(name="solver", type=AppType.PYTHON_SCRIPT,
+                                          file_path="/dev/null")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = f"/application_registry/{self.app.id}/versions/"
+
+    def upload(self, content, **data):
+        return self.client.post(self.url, {
+            'file': SimpleUploadedFile("solver.py", content), **data
+        }, format='multipart')
+
+    def test_upload_is_content_addressed(self):
+        """Test uploads are stored by hash and identical uploads return the same version"""
+        response = self.upload(PROGRAM, label="1.0")
+        sha256 = hashlib.sha256(PROGRAM).hexdigest()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['sha256'], sha256)
+        version = AppVersion.objects.get()
+        self.assertEqual(version.file.name, f"sha256/{sha256[:2]}/{sha256}")
+        self.app.refresh_from_db()
+        self.assertEqual(self.app.current_version, version)
+
+        self.assertEqual(self.upload(PROGRAM).status_code, 200)
+        self.assertEqual(AppVersion.objects.count(), 1)
+
+    def test_upload_requires_admin(self):
+        """Test regular users cannot publish versions"""
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.upload(PROGRAM).status_code, 403)
+
+    def test_version_listing_and_download(self):
+        """Test the hash listing and the immutable, revalidatable version download"""
+        self.upload(PROGRAM)
+        self.upload(b"print('v2')\n", make_current=False)
+        sha256 = hashlib.sha256(PROGRAM).hexdigest()
+
+        listing = APIClient().get(self.url).json()
+        self.assertEqual(listing['current'], sha256)
+        self.assertEqual(len(listing['versions']), 2)
+
+        url = f"{self.url}{sha256}/program/"
+        response = APIClient().get(url)
+        self.assertEqual(b"".join(response.streaming_content), PROGRAM)
+        self.assertEqual(response['ETag'], f'"{sha256}"')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(APIClient().get(url, HTTP_IF_NONE_MATCH=f'"{sha256}"').status_code, 304)
+
+        # The program endpoint serves the current version, revalidated as it may change
+        response = APIClient().get(f"/application_registry/{self.app.id}/program/")
+        self.assertEqual(b"".join(response.streaming_content), PROGRAM)
+        self.assertEqual(response['ETag'], f'"{sha256}"')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_jobs_pin_current_version(self):
+        """Test jobs keep the version that was current when they were submitted"""
+        self.upload(PROGRAM)
+        job = JobInfo.objects.create(created_by=self.user, application_id=self.app)
+        first = self.app.versions.get()
+
+        self.upload(b"print('v2')\n")
+
+        job.refresh_from_db()
+        self.assertEqual(job.application_version, first)
+        self.assertNotEqual(AppInfo.objects.get().current_version, first)
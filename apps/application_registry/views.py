@@ -18,10 +18,37 @@ from drf_spectacular.openapi import OpenApiResponse
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
 
-from .models import AppInfo
-from .serializers import AppSerializer
+from common.downloads import conditional_file_response, storage_download_response
+from common.storage import application_storage, local_path
+from runner_manager.authentication import RunnerTokenAuthentication
+from runner_manager.permissions import IsAuthenticatedRunner
+
+from .models import AppInfo, AppVersion, RunnerAppCache
+from .prefetch import broadcast_prefetch
+from .schema import SchemaNotFound, get_schema
+from .serializers import AppSerializer, AppVersionSerializer, AppVersionUploadSerializer
+
+
+def version_download_response(request, app_info, version, immutable=False):
+    """
+    Serve the program file of a version with its hash as strong ETag. Only URLs naming the version
+    may be immutable, the current version of an application changes.
+    """
+    storage, name = version.file.storage, version.file.name
+    file_path = local_path(storage, name)
+    if file_path is None:
+        return storage_download_response(
+            storage, name, content_type=app_info.content_type, filename=app_info.name
+        )
+    if not os.path.exists(file_path):
+        raise Http404("Program file not found")
+    return conditional_file_response(
+        request, file_path, content_type=app_info.content_type, filename=app_info.name,
+        etag=f'"{version.sha256}"', immutable=immutable
+    )
 
 
 class AppRegViewSet(viewsets.ReadOnlyModelViewSet):
@@ -29,20 +56,29 @@ class AppRegViewSet(viewsets.ReadOnlyModelViewSet):
     API endpoint that allows runners to be viewed (read-only).
     """
 
-    queryset = AppInfo.objects.all()
+    queryset = AppInfo.objects.select_related("current_version")
     serializer_class = AppSerializer
     permission_classes = [AllowAny]
 
+    def get_permissions(self):
+        if self.action == "create_version":
+            return [IsAdminUser()]
+        return super().get_permissions()
+
     @extend_schema(
         description=(
             "Download the raw program file for a specific application. "
-            "Returns the file content directly based on the application type."
+            "Returns the file content directly based on the application type. "
+            "Responses carry a strong ETag: send it back in If-None-Match to revalidate a cached "
+            "copy (304), and use Range to resume a download (206)."
         ),
         responses={
             200: OpenApiResponse(
                 description='Program file content (binary or text)',
                 response={'type': 'string', 'format': 'binary'}
             ),
+            206: OpenApiResponse(description='Requested byte range of the program file'),
+            304: OpenApiResponse(description='The cached copy matching If-None-Match is current'),
             404: OpenApiResponse(description='Program file not found')
         }
     )
@@ -53,6 +89,8 @@ class AppRegViewSet(viewsets.ReadOnlyModelViewSet):
         Returns the file content directly based on the application type.
         """
         app_info = self.get_object()
+        if app_info.current_version is not None:
+            return version_download_response(request, app_info, app_info.current_version)
         
         try:
             # Handle both FileField paths and direct file paths
@@ -60,25 +98,116 @@ class AppRegViewSet(viewsets.ReadOnlyModelViewSet):
                 file_path = app_info.file_path.path
             else:
                 file_path = str(app_info.file_path)
-            
+
+            # Absolute paths are local files, anything else names a file in application storage
+            if not os.path.isabs(file_path):
+                if not application_storage.exists(file_path):
+                    raise Http404("Program file not found")
+                local_file = local_path(application_storage, file_path)
+                if local_file is None:
+                    return storage_download_response(
+                        application_storage, file_path, content_type=app_info.content_type,
+                        filename=app_info.name
+                    )
+                file_path = local_file
+
             # Check if file exists
             if not os.path.exists(file_path):
                 raise Http404("Program file not found")
             
-            # Read file in binary mode to handle both text and binary files
-            with open(file_path, 'rb') as file:
-                content = file.read()
-            
-            # Create response with appropriate headers
-            response = HttpResponse(content, content_type=app_info.content_type)
-            response['Content-Disposition'] = f'attachment; filename="{app_info.name}"'
-            
-            return response
+            # Streamed (or handed to the front proxy) with an ETag for cheap revalidation
+            return conditional_file_response(
+                request, file_path, content_type=app_info.content_type, filename=app_info.name
+            )
             
         except Exception as e:
             raise Http404(f"Error reading program file: {str(e)}")
         
 
+    @extend_schema(
+        responses={200: OpenApiResponse(description='Current version and all version hashes')},
+        description=(
+            "List the versions of an application, newest first: SHA-256, size, label and upload "
+            "date. Runners compare the hashes with their local program cache."
+        )
+    )
+    @action(detail=True, methods=['get'])
+    def versions(self, request, pk=None):
+        app_info = self.get_object()
+        versions = app_info.versions.values("id", "sha256", "size", "label", "created_at")
+        return Response({
+            "current": app_info.current_version.sha256 if app_info.current_version else None,
+            "versions": list(versions),
+        })
+
+    @extend_schema(
+        request={"multipart/form-data": AppVersionUploadSerializer},
+        responses={201: AppVersionSerializer, 200: AppVersionSerializer},
+        description=(
+            "Upload a program file as a new immutable version (administrators only). Uploading "
+            "a program that already is a version returns that version."
+        )
+    )
+    @versions.mapping.post
+    def create_version(self, request, pk=None):
+        app_info = self.get_object()
+        serializer = AppVersionUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        version, created = AppVersion.create_from_file(
+            app_info, data["file"], label=data.get("label", ""), created_by=request.user
+        )
+        if data["make_current"] and app_info.current_version_id != version.id:
+            app_info.current_version = version
+            app_info.save(update_fields=["current_version"])
+            # Runners download it now rather than at the start of their next job
+            broadcast_prefetch(version)
+        return Response(AppVersionSerializer(version).data, status=201 if created else 200)
+
+    @extend_schema(
+        responses={
+            200: OpenApiResponse(
+                description='Program file content (binary or text)',
+                response={'type': 'string', 'format': 'binary'}
+            ),
+            304: OpenApiResponse(description='The cached copy matching If-None-Match is current'),
+            404: OpenApiResponse(description='Version not found')
+        },
+        description=(
+            "Download the program file of a specific version. The content never changes, the "
+            "response may be cached indefinitely."
+        )
+    )
+    @action(detail=True, methods=['get'],
+            url_path=r'versions/(?P<sha256>[0-9a-f]{64})/program')
+    def version_program(self, request, pk=None, sha256=None):
+        app_info = self.get_object()
+        version = app_info.versions.filter(sha256=sha256).first()
+        if version is None:
+            raise Http404("Version not found")
+        return version_download_response(request, app_info, version, immutable=True)
+
+    @extend_schema(
+        request=None,
+        responses={204: None},
+        description=(
+            "Report that the calling runner holds a version in its program cache (after a prefetch "
+            "announcement or a download). Jobs of that version are preferably dispatched to it."
+        )
+    )
+    @action(detail=True, methods=['post'],
+            url_path=r'versions/(?P<sha256>[0-9a-f]{64})/prefetched',
+            authentication_classes=[RunnerTokenAuthentication],
+            permission_classes=[IsAuthenticatedRunner])
+    def version_prefetched(self, request, pk=None, sha256=None):
+        app_info = self.get_object()
+        version = app_info.versions.filter(sha256=sha256).first()
+        if version is None:
+            raise Http404("Version not found")
+        RunnerAppCache.objects.update_or_create(runner=request.user._runner_info, version=version)
+        return Response(status=204)
+
     @extend_schema(
         description=(
             "Get the JSON schema for a specific application. "
@@ -104,23 +233,11 @@ class AppRegViewSet(viewsets.ReadOnlyModelViewSet):
             raise Http404("No schema defined for this application")
         
         try:
-            # Handle both FileField paths and direct file paths
-            if hasattr(app_info.schema_path, 'path'):
-                schema_path = app_info.schema_path.path
-            else:
-                schema_path = str(app_info.schema_path)
-            
-            # Check if file exists
-            if not os.path.exists(schema_path):
-                raise Http404("Schema file not found")
-            
-            # Read JSON file
-            with open(schema_path, 'r') as file:
-                schema_data = file.read()
-            
-            # Return as HttpResponse with JSON content type
-            return HttpResponse(schema_data, content_type='application/json')
-            
+            # Parsed once and served from the cache until the schema file changes
+            schema = get_schema(app_info)
+        except SchemaNotFound:
+            raise Http404("Schema file not found")
         except Exception as e:
             raise Http404(f"Error reading schema file: {str(e)}")
-        
\ No newline at end of file
+
+        return HttpResponse(schema.content, content_type='application/json')
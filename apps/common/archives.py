@@ -0,0 +1,185 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+On-the-fly tar and zip generation.
+
+Archives are produced as generators of byte chunks: each member is read and emitted chunk by chunk,
+so neither the archive nor any member is ever held in memory or written to disk, and memory use is
+bounded by the chunk size regardless of the archive size.
+"""
+
+import io
+import tarfile
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import IO, Callable, Iterable, Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+ARCHIVE_FORMATS = {
+    "zip": "application/zip",
+    "tar": "application/x-tar",
+}
+
+
+@dataclass
+class ArchiveMember:
+    """A file to add to an archive, opened lazily when it is reached."""
+
+    name: str
+    size: int
+    mtime: datetime
+    open: Callable[[], IO[bytes]]
+
+
+class _ChunkBuffer:
+    """Write-only, non-seekable file object collecting archive bytes until they are yielded."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _read_chunks(member, chunk_size):
+    with member.open() as source:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+# --------------------------------------------------------------------------------------------------
+# Formats
+# --------------------------------------------------------------------------------------------------
+
+
+def stream_tar(members: Iterable[ArchiveMember], chunk_size=CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield an uncompressed POSIX (pax) tar archive of the members."""
+    position = 0
+    for member in members:
+        info = tarfile.TarInfo(member.name)
+        info.size = member.size
+        info.mtime = member.mtime.timestamp()
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        yield header
+        position += len(header)
+
+        # The header promises member.size bytes, hold to it even if the file changed meanwhile
+        remaining = member.size
+        for chunk in _read_chunks(member, chunk_size):
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+            if not remaining:
+                break
+        padding = remaining + (-member.size % tarfile.BLOCKSIZE)
+        if padding:
+            yield tarfile.NUL * padding
+        position += member.size + (-member.size % tarfile.BLOCKSIZE)
+
+    # End of archive marker, padded to a full record as tarfile does
+    end = 2 * tarfile.BLOCKSIZE
+    end += -(position + end) % tarfile.RECORDSIZE
+    yield tarfile.NUL * end
+
+
+def stream_zip(members: Iterable[ArchiveMember], chunk_size=CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a deflated zip archive (zip64, with data descriptors) of the members."""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for member in members:
+            date_time = max(member.mtime.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+            info = zipfile.ZipInfo(member.name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w", force_zip64=True) as destination:
+                for chunk in _read_chunks(member, chunk_size):
+                    destination.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def stream_archive(archive_format, members, chunk_size=CHUNK_SIZE):
+    """Yield the archive in the requested format ("zip" or "tar")."""
+    if archive_format == "zip":
+        return stream_zip(members, chunk_size)
+    if archive_format == "tar":
+        return stream_tar(members, chunk_size)
+    raise ValueError(f"Unknown archive format: {archive_format}")
+
+
+# --------------------------------------------------------------------------------------------------
+# Reading
+# --------------------------------------------------------------------------------------------------
+
+
+class _ZipMemberFile(io.RawIOBase):
+    """Read-only file object over a zip member, closing the archive source with it."""
+
+    def __init__(self, archive, member, source):
+        self._archive = archive
+        self._member = member
+        self._source = source
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._member.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._member.close()
+            self._archive.close()
+            self._source.close()
+        super().close()
+
+
+def open_zip_member(source, name):
+    """
+    Open the member name of the zip archive in the seekable file object source for reading.
+
+    Closing the returned file also closes source.
+    """
+    archive = zipfile.ZipFile(source)
+    try:
+        member = archive.open(name)
+    except KeyError:
+        archive.close()
+        source.close()
+        raise FileNotFoundError(f"{name} is not in the archive") from None
+    return io.BufferedReader(_ZipMemberFile(archive, member, source))
@@ -0,0 +1,189 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Content encodings used to compress files at rest and in transit.
+
+gzip is always available, zstd requires the optional ``zstandard`` package (``pip install
+fyn-api[compression]``).
+"""
+
+import gzip
+import io
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+DEFAULT_LEVELS = {
+    GZIP: 6,
+    ZSTD: 3,
+}
+
+
+def available_encodings():
+    """Return the content encodings supported by this installation."""
+    return [GZIP, ZSTD] if zstandard is not None else [GZIP]
+
+
+# Errors raised reading a corrupt or truncated encoded stream
+DECODE_ERRORS = (EOFError, OSError, zlib.error) + ((zstandard.ZstdError,) if zstandard else ())
+
+
+def check_encoding(encoding):
+    if encoding not in available_encodings():
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+# --------------------------------------------------------------------------------------------------
+# Streams
+# --------------------------------------------------------------------------------------------------
+
+
+class _ZstdReader:
+    """
+    Decoder of a zstd frame, which unlike ZstdDecompressor.stream_reader raises EOFError (as gzip
+    does) when the source ends before the frame does.
+    """
+
+    def __init__(self, source, read_size=64 * 1024):
+        self._source = source
+        self._read_size = read_size
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        self._pending = bytearray()
+
+    def read(self, size):
+        while len(self._pending) < size and not self._decompressor.eof:
+            data = self._source.read(self._read_size)
+            if not data:
+                raise EOFError("Compressed file ended before the end of the zstd frame")
+            self._pending += self._decompressor.decompress(data)
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+    def close(self):
+        self._pending.clear()
+
+
+class _DecodedFile(io.RawIOBase):
+    """Read-only file object decoding a compressed source."""
+
+    def __init__(self, reader, source, closefd):
+        self._reader = reader
+        self._source = source
+        self._closefd = closefd
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._reader.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._reader.close()
+            if self._closefd:
+                self._source.close()
+        super().close()
+
+
+def open_decoded(source, encoding, closefd=True):
+    """
+    Wrap a readable binary file object so that reading it yields the decoded content.
+
+    Closing the returned file also closes source, unless closefd is False.
+    """
+    check_encoding(encoding)
+    if encoding == GZIP:
+        reader = gzip.GzipFile(fileobj=source, mode="rb")
+    else:
+        reader = _ZstdReader(source)
+    return io.BufferedReader(_DecodedFile(reader, source, closefd))
+
+
+SIGNATURES = {
+    GZIP: b"\x1f\x8b",
+    ZSTD: b"\x28\xb5\x2f\xfd",
+}
+
+
+def has_signature(fileobj, encoding):
+    """Cheap check that a seekable file object starts with the magic bytes of encoding."""
+    position = fileobj.tell()
+    header = fileobj.read(len(SIGNATURES[encoding]))
+    fileobj.seek(position)
+    return header == SIGNATURES[encoding]
+
+
+def check_decodable(fileobj, encoding, chunk_size=64 * 1024):
+    """
+    Decode a whole seekable file object to check it is complete and not corrupt, raises one of
+    DECODE_ERRORS otherwise. The file is rewound to where it was.
+    """
+    position = fileobj.tell()
+    try:
+        with open_decoded(fileobj, encoding, closefd=False) as content:
+            while content.read(chunk_size):
+                pass
+    finally:
+        fileobj.seek(position)
+
+
+def open_encoder(destination, encoding, level=None):
+    """
+    Return a writable file object compressing into destination.
+
+    Closing the encoder flushes it but leaves destination open.
+    """
+    check_encoding(encoding)
+    level = DEFAULT_LEVELS[encoding] if level is None else level
+    if encoding == GZIP:
+        return gzip.GzipFile(fileobj=destination, mode="wb", compresslevel=level, mtime=0)
+    return zstandard.ZstdCompressor(level=level).stream_writer(destination, closefd=False)
+
+
+# --------------------------------------------------------------------------------------------------
+# Negotiation
+# --------------------------------------------------------------------------------------------------
+
+
+def accepted_encodings(request):
+    """Return the encodings the client accepts (q > 0) according to its Accept-Encoding header."""
+    accepted = set()
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(GZIP if coding == "x-gzip" else coding)
+    return accepted
+
+
+def client_accepts(request, encoding):
+    """Whether the response may be sent with the given Content-Encoding."""
+    accepted = accepted_encodings(request)
+    return encoding in accepted or "*" in accepted
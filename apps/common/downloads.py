@@ -0,0 +1,311 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+File download helpers shared by the job manager and the application registry.
+
+When ``FILE_DOWNLOAD_OFFLOAD`` is set the views only authorise the request; the response carries an
+``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (apache/lighttpd) header and the front proxy performs
+the actual transfer, so no Python worker is tied up streaming the file. Files kept in an object store
+are not transferred by the API at all: clients are redirected to a short-lived presigned URL.
+
+conditional_file_response adds strong ETags, conditional requests (304) and single byte ranges
+(206), so clients holding a copy can revalidate it or resume a transfer cheaply.
+"""
+
+import hashlib
+import mimetypes
+import os
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
+
+from .storage import local_path, presigned_download_url, supports_presigned_urls
+
+# --------------------------------------------------------------------------------------------------
+# Offload Modes
+# --------------------------------------------------------------------------------------------------
+
+OFFLOAD_X_ACCEL_REDIRECT = "x-accel-redirect"
+OFFLOAD_X_SENDFILE = "x-sendfile"
+
+OFFLOAD_HEADERS = {
+    OFFLOAD_X_ACCEL_REDIRECT: "X-Accel-Redirect",
+    OFFLOAD_X_SENDFILE: "X-Sendfile",
+}
+
+
+def get_offload_mode():
+    """Return the configured offload mode, or an empty string when downloads are streamed."""
+    mode = (getattr(settings, "FILE_DOWNLOAD_OFFLOAD", "") or "").lower()
+    if mode and mode not in OFFLOAD_HEADERS:
+        raise ValueError(f"Unknown FILE_DOWNLOAD_OFFLOAD mode: {mode}")
+    return mode
+
+
+def _offload_locations():
+    """Return (local root, internal location) pairs, longest root first."""
+    locations = getattr(settings, "FILE_DOWNLOAD_OFFLOAD_LOCATIONS", {}) or {}
+    pairs = [
+        (os.path.realpath(root), location if location.endswith("/") else location + "/")
+        for root, location in locations.items()
+    ]
+    return sorted(pairs, key=lambda pair: len(pair[0]), reverse=True)
+
+
+def _is_within(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def internal_location_for(file_path):
+    """Map a local file path to its internal proxy URI, or None if it is outside all locations."""
+    real_path = os.path.realpath(file_path)
+    for root, location in _offload_locations():
+        if _is_within(real_path, root):
+            relative = os.path.relpath(real_path, root).replace(os.sep, "/")
+            return location + quote(relative)
+    return None
+
+
+def local_path_for(internal_uri):
+    """Map an internal proxy URI back to a local file path (inverse of internal_location_for)."""
+    for root, location in _offload_locations():
+        if internal_uri.startswith(location):
+            relative = unquote(internal_uri[len(location):])
+            file_path = os.path.realpath(os.path.join(root, relative))
+            if _is_within(file_path, root):
+                return file_path
+    return None
+
+
+# --------------------------------------------------------------------------------------------------
+# Responses
+# --------------------------------------------------------------------------------------------------
+
+
+def offload_header_for(file_path, mode=None):
+    """Return the (header, value) pair handing file_path to the front proxy, or None."""
+    mode = get_offload_mode() if mode is None else mode
+    if not mode:
+        return None
+
+    if mode == OFFLOAD_X_ACCEL_REDIRECT:
+        value = internal_location_for(file_path)
+    else:
+        value = os.path.realpath(file_path)
+
+    if value is None:
+        return None
+    return OFFLOAD_HEADERS[mode], value
+
+
+def response_content_type(file_path, content_type=None):
+    """Return content_type, or the type guessed from the file name."""
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(file_path)
+    return content_type or "application/octet-stream"
+
+
+def file_download_response(file_path, content_type=None, filename=None, as_attachment=True):
+    """
+    Build the download response for a local file.
+
+    The transfer is handed to the front proxy when offloading is enabled and the file lives in a
+    mapped location, otherwise the file is streamed in chunks by a FileResponse.
+    """
+    if filename is None:
+        filename = os.path.basename(file_path)
+    content_type = response_content_type(file_path, content_type)
+
+    offload = offload_header_for(file_path)
+    if offload is not None:
+        header, value = offload
+        response = HttpResponse(content_type=content_type)
+        response[header] = value
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+        return response
+
+    return FileResponse(
+        open(file_path, "rb"),
+        content_type=content_type,
+        as_attachment=as_attachment,
+        filename=filename,
+    )
+
+
+def storage_download_response(storage, name, content_type=None, filename=None,
+                              content_encoding=None):
+    """
+    Build the download response for a file of any storage.
+
+    Object stores answer with a redirect to a presigned URL, local files go through
+    file_download_response, and anything else is streamed from storage.open().
+    """
+    if filename is None:
+        filename = os.path.basename(name)
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(filename)
+        content_type = content_type or "application/octet-stream"
+
+    if supports_presigned_urls(storage):
+        return HttpResponseRedirect(presigned_download_url(
+            storage, name, settings.PRESIGNED_URL_EXPIRY, filename=filename,
+            content_type=content_type, content_encoding=content_encoding,
+        ))
+
+    file_path = local_path(storage, name)
+    if file_path is not None:
+        response = file_download_response(file_path, content_type=content_type, filename=filename)
+    else:
+        response = FileResponse(
+            storage.open(name, "rb"),
+            content_type=content_type,
+            as_attachment=True,
+            filename=filename,
+        )
+    if content_encoding:
+        response["Content-Encoding"] = content_encoding
+    return response
+
+
+# --------------------------------------------------------------------------------------------------
+# Conditional and Range Requests
+# --------------------------------------------------------------------------------------------------
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(file_path):
+    """
+    Strong ETag of a local file, from its SHA-256.
+
+    The digest is cached while the size and modification time of the file are unchanged, so the
+    file is only read once per version.
+    """
+    stat = os.stat(file_path)
+    path_key = hashlib.sha256(os.path.realpath(file_path).encode()).hexdigest()
+    key = f"file-etag:{path_key}:{stat.st_size}:{stat.st_mtime_ns}"
+    etag = cache.get(key)
+    if etag is None:
+        with open(file_path, "rb") as file:
+            etag = f'"{hashlib.file_digest(file, "sha256").hexdigest()}"'
+        cache.set(key, etag, None)
+    return etag
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def requested_range(request, size, etag):
+    """
+    Return the (first, last) byte positions of a single range requested with a Range header.
+
+    None means the whole file is sent: no or an unsupported Range header (several ranges, other
+    units, invalid syntax) or an If-Range validator that does not match. Raises
+    RangeNotSatisfiable for ranges starting past the end of the file.
+    """
+    header = request.headers.get("Range", "")
+    if not header.startswith("bytes=") or "," in header:
+        return None
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable
+            return max(size - length, 0), size - 1
+        first = int(first)
+        last = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable
+    if first > last:
+        return None
+    return first, min(last, size - 1)
+
+
+def _read_range(file_path, first, last):
+    with open(file_path, "rb") as file:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def conditional_file_response(request, file_path, content_type=None, filename=None, etag=None,
+                              immutable=False):
+    """
+    Build the download response for a local file honouring conditional and range requests.
+
+    If-None-Match / If-Modified-Since are answered with 304 and a single byte range with 206.
+    Offloaded transfers leave ranges to the front proxy. Pass the etag when it is known already,
+    and immutable for content-addressed files that never change under their URL.
+    """
+    etag = etag or file_etag(file_path)
+    stat = os.stat(file_path)
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+
+    if response is None:
+        try:
+            byte_range = (None if offload_header_for(file_path) is not None
+                          else requested_range(request, stat.st_size, etag))
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+        if byte_range is None:
+            response = file_download_response(
+                file_path, content_type=content_type, filename=filename
+            )
+        else:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                _read_range(file_path, first, last),
+                status=206,
+                content_type=response_content_type(file_path, content_type),
+            )
+            response["Content-Range"] = f"bytes {first}-{last}/{stat.st_size}"
+            response["Content-Length"] = last - first + 1
+            response["Content-Disposition"] = content_disposition_header(
+                True, filename or os.path.basename(file_path)
+            )
+        response["Accept-Ranges"] = "bytes"
+        response["Last-Modified"] = http_date(stat.st_mtime)
+
+    response["ETag"] = etag
+    if immutable:
+        patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    else:
+        # Clients may keep a copy but revalidate it (cheaply, with If-None-Match) before each use
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,145 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Idempotency-Key support for endpoints creating things.
+
+Clients retrying a request after a timeout or a 5XX send the same ``Idempotency-Key`` header as the
+first attempt. The response of the first completed attempt is kept in the cache for
+IDEMPOTENCY_KEY_TTL seconds and replayed to retries (marked with ``Idempotent-Replayed: true``)
+instead of doing the work again. Keys are scoped per client and endpoint; reusing one with a
+different request is refused with 422, a retry arriving while the first attempt still runs with
+409. Server errors are not kept, so a retry after one runs the request again.
+"""
+
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    HEADER, OpenApiTypes.STR, location=OpenApiParameter.HEADER, required=False,
+    description=(
+        "Unique key of this request (e.g. a UUID). Retries with the same key receive the response "
+        "of the first attempt instead of repeating it."
+    ),
+)
+
+# Response headers worth replaying
+_REPLAYED_HEADERS = ("Location",)
+
+
+def _principal(request):
+    runner = getattr(request.user, "_runner_info", None)
+    if runner is not None:
+        return f"runner:{runner.pk}"
+    return f"user:{request.user.pk}"
+
+
+def request_fingerprint(request):
+    """Digest of method, path and parsed payload, uploaded files included by content."""
+    digest = hashlib.sha256(f"{request.method} {request.path}\n".encode())
+    data = request.data
+    items = sorted(data.lists()) if hasattr(data, "lists") else [("", [data])]
+    for name, values in items:
+        for value in values:
+            digest.update(f"{name}=".encode())
+            if isinstance(value, UploadedFile):
+                digest.update(f"<file {value.name} {value.size}>".encode())
+                for chunk in value.chunks():
+                    digest.update(chunk)
+                value.seek(0)
+            else:
+                digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def idempotent(view_method=None, *, stored_data=None, replayed_data=None):
+    """
+    Decorator for viewset methods honouring the Idempotency-Key header.
+
+    Requests without the header are handled as usual. stored_data, when given, maps the response
+    data to what is kept for replays, e.g. to leave secrets shown only once out of the cache, and
+    replayed_data(request, data) maps the kept data to the replayed response, e.g. to issue such
+    secrets again.
+    """
+    if view_method is None:
+        return functools.partial(
+            idempotent, stored_data=stored_data, replayed_data=replayed_data
+        )
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."}, status=400
+            )
+
+        scope = f"{_principal(request)} {request.method} {request.path} {key}"
+        cache_key = f"idempotency:{hashlib.sha256(scope.encode()).hexdigest()}"
+        lock_key = f"{cache_key}:lock"
+        fingerprint = request_fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            if not cache.add(lock_key, fingerprint, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                return Response(
+                    {"detail": f"A request with this {HEADER} is already in progress."},
+                    status=409
+                )
+            try:
+                # The first attempt may have completed between the lookup and taking the lock
+                stored = cache.get(cache_key)
+                if stored is None:
+                    response = view_method(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        cache.set(cache_key, {
+                            "fingerprint": fingerprint,
+                            "status": response.status_code,
+                            "data": (response.data if stored_data is None
+                                     else stored_data(response.data)),
+                            "headers": {
+                                name: response[name] for name in _REPLAYED_HEADERS
+                                if response.has_header(name)
+                            },
+                        }, settings.IDEMPOTENCY_KEY_TTL)
+                    return response
+            finally:
+                cache.delete(lock_key)
+
+        if stored["fingerprint"] != fingerprint:
+            return Response(
+                {"detail": f"This {HEADER} was already used for a different request."},
+                status=422
+            )
+        data = stored["data"]
+        if replayed_data is not None and stored["status"] < 400:
+            data = replayed_data(request, data)
+        response = Response(data, status=stored["status"], headers=stored["headers"])
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    return wrapper
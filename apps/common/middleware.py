@@ -0,0 +1,58 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+import os
+
+from django.http import FileResponse, HttpResponseNotFound
+
+from .downloads import OFFLOAD_HEADERS, OFFLOAD_X_ACCEL_REDIRECT, local_path_for
+
+
+class OffloadProxyMiddleware:
+    """
+    Stand-in for the front proxy when download offloading is enabled.
+
+    Resolves X-Accel-Redirect / X-Sendfile responses into file responses, the same way nginx or
+    apache would. Only intended for local development and tests, enable it with
+    FILE_DOWNLOAD_OFFLOAD_EMULATE=True.
+    """
+
+    # Headers the proxies forward from the upstream response to the client.
+    forwarded_headers = ("Content-Type", "Content-Disposition", "Cache-Control", "ETag")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        for mode, header in OFFLOAD_HEADERS.items():
+            if response.has_header(header):
+                return self.serve(response, mode, response[header])
+        return response
+
+    def serve(self, upstream, mode, value):
+        """Serve the file referenced by an offload header."""
+        if mode == OFFLOAD_X_ACCEL_REDIRECT:
+            file_path = local_path_for(value)
+        else:
+            file_path = value
+
+        if not file_path or not os.path.isfile(file_path):
+            return HttpResponseNotFound()
+
+        response = FileResponse(open(file_path, "rb"))
+        for header in self.forwarded_headers:
+            if upstream.has_header(header):
+                response[header] = upstream[header]
+        return response
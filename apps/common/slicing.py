@@ -0,0 +1,242 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Random access to byte, line and CSV row ranges of large local files.
+
+Files are memory-mapped, so only the pages of the requested window are read. Line access goes
+through a sparse index holding the byte offset of every ``LINE_INDEX_STEP``-th line: it is built in
+one pass on first use and cached per process, keyed by path, size and modification time, so later
+slices of the same file seek directly to the nearest indexed line.
+
+Line, tail and CSV reads take an optional max_bytes: a window longer than that (e.g. one huge line
+without newline) is cut, and ``MappedFile.truncated`` tells so.
+"""
+
+import csv
+import io
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+LINE_INDEX_STEP = 1024
+INDEX_CACHE_SIZE = 32
+
+# Newlines are counted per block during the index pass, blocks without an indexed line are skipped
+_BLOCK_SIZE = 16 * 1024
+
+
+# --------------------------------------------------------------------------------------------------
+# Line Index
+# --------------------------------------------------------------------------------------------------
+
+
+class LineIndex:
+    """Byte offsets of every step-th line start of a file, and its number of lines."""
+
+    def __init__(self, offsets, line_count, step=LINE_INDEX_STEP):
+        self.offsets = offsets
+        self.line_count = line_count
+        self.step = step
+
+    @classmethod
+    def build(cls, buffer, step=LINE_INDEX_STEP):
+        offsets = array("Q", [0])
+        size = len(buffer)
+        lines, target, position = 0, step, 0
+        while position < size:
+            end = min(position + _BLOCK_SIZE, size)
+            newlines = buffer[position:end].count(b"\n")
+            if lines + newlines < target:
+                lines += newlines
+                position = end
+                continue
+            while True:
+                newline = buffer.find(b"\n", position, end)
+                if newline < 0:
+                    break
+                lines += 1
+                position = newline + 1
+                if lines == target:
+                    offsets.append(position)
+                    target += step
+            position = end
+
+        # A last line without a trailing newline still counts
+        if size and buffer[size - 1:size] != b"\n":
+            lines += 1
+        return cls(offsets, lines, step)
+
+    def line_start(self, buffer, line):
+        """Byte offset at which a line starts, len(buffer) past the last line."""
+        if line >= self.line_count:
+            return len(buffer)
+        position = self.offsets[line // self.step]
+        for _ in range(line % self.step):
+            position = buffer.find(b"\n", position) + 1
+        return position
+
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def get_line_index(path, buffer):
+    """Return the line index of a file, built on first use and cached until the file changes."""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _index_lock:
+        if key in _index_cache:
+            _index_cache.move_to_end(key)
+            return _index_cache[key]
+
+    index = LineIndex.build(buffer)
+    with _index_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def clear_index_cache():
+    with _index_lock:
+        _index_cache.clear()
+
+
+# --------------------------------------------------------------------------------------------------
+# Slicing
+# --------------------------------------------------------------------------------------------------
+
+
+class MappedFile:
+    """
+    Read-only memory map of a local file, used as a context manager.
+
+        with MappedFile(path) as mapped:
+            mapped.tail(1000)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._buffer = None
+        self._index = None
+        # Whether the last line, tail or CSV read was cut at its max_bytes
+        self.truncated = False
+
+    def __enter__(self):
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Empty files cannot be mapped
+        self._buffer = (mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size
+                        else b"")
+        return self
+
+    def __exit__(self, *exc_info):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    @property
+    def size(self):
+        return len(self._buffer)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = get_line_index(self.path, self._buffer)
+        return self._index
+
+    @property
+    def line_count(self):
+        return self.index.line_count
+
+    def bytes(self, offset, length):
+        """length bytes from offset, a negative offset counts from the end of the file."""
+        if offset < 0:
+            offset = max(self.size + offset, 0)
+        return self._buffer[offset:offset + length]
+
+    def lines(self, start, count, max_bytes=None):
+        """count lines from line start (0-based), with their line endings."""
+        begin = self.index.line_start(self._buffer, start)
+        end = self.index.line_start(self._buffer, start + count)
+        self.truncated = max_bytes is not None and end - begin > max_bytes
+        if self.truncated:
+            end = begin + max_bytes
+        return self._buffer[begin:end]
+
+    def tail(self, count, max_bytes=None):
+        """
+        The last count lines of the file, found scanning backwards from its end. Cut at max_bytes,
+        the end of the file is kept.
+        """
+        end = self.size
+        position = end - 1 if self._buffer[end - 1:end] == b"\n" else end
+        begin = 0
+        for _ in range(count):
+            position = self._buffer.rfind(b"\n", 0, position)
+            if position < 0:
+                break
+        else:
+            begin = position + 1
+        self.truncated = max_bytes is not None and end - begin > max_bytes
+        if self.truncated:
+            begin = end - max_bytes
+        return self._buffer[begin:end]
+
+    def csv_rows(self, start, count, columns=None, encoding="utf-8", max_bytes=None):
+        """
+        CSV text with the header and count data rows from row start (0-based, header excluded).
+
+        columns selects columns by header name or 0-based position. Rows are located by line, so
+        quoted fields must not contain line breaks. With max_bytes, the rows read after the header
+        stop at the last whole line within the limit.
+        """
+        # One byte left for the line ending of a cut header
+        header_line = self.lines(0, 1, None if max_bytes is None else max(max_bytes - 1, 0))
+        truncated = self.truncated
+        header = next(csv.reader([header_line.decode(encoding, errors="replace")]), [])
+        selected = None
+        if columns:
+            selected = [_column_position(header, column) for column in columns]
+
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(_select(header, selected))
+        written = len(output.getvalue().encode(encoding))
+        remaining = None if max_bytes is None else max(max_bytes - written, 0)
+        rows = self.lines(start + 1, count, remaining)
+        if self.truncated:
+            # No partial row
+            rows = rows[:rows.rfind(b"\n") + 1]
+        for row in csv.reader(io.StringIO(rows.decode(encoding, errors="replace"))):
+            writer.writerow(_select(row, selected))
+        self.truncated = truncated or self.truncated
+        return output.getvalue()
+
+
+def _column_position(header, column):
+    if column in header:
+        return header.index(column)
+    if column.isdigit() and int(column) < len(header):
+        return int(column)
+    raise KeyError(column)
+
+
+def _select(row, positions):
+    if positions is None:
+        return row
+    return [row[position] if position < len(row) else "" for position in positions]
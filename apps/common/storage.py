@@ -0,0 +1,192 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Storage backends and direct-transfer helpers.
+
+Job resources and application files live in the "job_resources" and "applications" entries of
+``STORAGES``, so a deployment can move them from the local file system to an S3-compatible object
+store. When the store can presign requests, runners transfer files directly with it and the API
+servers only handle metadata.
+"""
+
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, cached_property, empty
+from django.utils.http import content_disposition_header
+
+try:
+    from storages.backends.s3 import S3Storage
+    from storages.utils import clean_name
+except ImportError:  # django-storages and boto3 are optional
+    S3Storage = None
+
+# --------------------------------------------------------------------------------------------------
+# Backends
+# --------------------------------------------------------------------------------------------------
+
+
+class PreserveFilenameMixin:
+    """Keep original filenames and overwrite existing files rather than renaming uploads."""
+
+    def get_valid_name(self, name):
+        """Return the original filename without Django's aggressive sanitization."""
+        return os.path.basename(name)
+
+    def get_available_name(self, name, max_length=None):
+        """Allow overwrite of existing files instead of creating duplicates."""
+        return name
+
+
+class PreserveFilenameStorage(PreserveFilenameMixin, FileSystemStorage):
+    """
+    Custom storage that preserves original filenames and overwrites existing files.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        """Allow overwrite of existing files instead of creating duplicates."""
+        # FileSystemStorage._save() never replaces a file, it asks for new names until one is free
+        if self.exists(name):
+            self.delete(name)
+        return name
+
+
+class ApplicationStorage(FileSystemStorage):
+    """
+    File system storage in the "applications" directory of MEDIA_ROOT, following MEDIA_ROOT changes.
+    """
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(
+            self._location, os.path.join(settings.MEDIA_ROOT, "applications")
+        )
+
+
+if S3Storage is not None:
+
+    class PreserveFilenameS3Storage(PreserveFilenameMixin, S3Storage):
+        """
+        S3-compatible storage (AWS, MinIO, Ceph, ...) with the same naming rules as the local one.
+        """
+
+
+class AliasedStorage(LazyObject):
+    """
+    Lazily resolves a ``STORAGES`` alias, so model fields follow the settings (and test overrides).
+    """
+
+    def __init__(self, alias):
+        self.__dict__["_alias"] = alias
+        super().__init__()
+
+    def _setup(self):
+        self._wrapped = storages[self.__dict__["_alias"]]
+
+
+job_resource_storage = AliasedStorage("job_resources")
+application_storage = AliasedStorage("applications")
+
+
+@receiver(setting_changed)
+def reset_aliased_storages(setting, **kwargs):
+    if setting in ("STORAGES", "MEDIA_ROOT", "MEDIA_URL"):
+        job_resource_storage._wrapped = empty
+        application_storage._wrapped = empty
+
+
+def get_job_resource_storage():
+    """Storage callable for JobResource.file (keeps migrations independent of the settings)."""
+    return job_resource_storage
+
+
+def get_application_storage():
+    """Storage callable for AppVersion.file."""
+    return application_storage
+
+
+def local_path(storage, name):
+    """Return the local file system path of a stored file, or None for remote storages."""
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def replace_file(storage, name, content):
+    """
+    Overwrite the stored file name with content, never leaving it missing or half written.
+
+    Local files are written under a temporary name next to the original, then renamed over it.
+    Object stores replace an object in a single PUT.
+    """
+    path = local_path(storage, name)
+    if path is None:
+        storage.save(name, content)
+        return
+
+    temporary = storage.save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+    try:
+        with open(storage.path(temporary), "rb") as written:
+            os.fsync(written.fileno())
+        os.replace(storage.path(temporary), path)
+    except OSError:
+        storage.delete(temporary)
+        raise
+
+
+# --------------------------------------------------------------------------------------------------
+# Presigned Transfers
+# --------------------------------------------------------------------------------------------------
+
+
+def supports_presigned_urls(storage):
+    """Whether clients can transfer files of this storage directly using presigned URLs."""
+    if isinstance(storage, LazyObject):
+        if storage._wrapped is empty:
+            storage._setup()
+        storage = storage._wrapped
+    return S3Storage is not None and isinstance(storage, S3Storage)
+
+
+def presigned_download_url(storage, name, expire, filename=None, content_type=None,
+                           content_encoding=None):
+    """Return a URL that downloads the file from the store for the next ``expire`` seconds."""
+    parameters = {}
+    if filename:
+        parameters["ResponseContentDisposition"] = content_disposition_header(True, filename)
+    if content_type:
+        parameters["ResponseContentType"] = content_type
+    if content_encoding:
+        parameters["ResponseContentEncoding"] = content_encoding
+    return storage.url(name, parameters=parameters, expire=expire)
+
+
+def presigned_upload(storage, name, expire, max_size):
+    """
+    Return the URL and form fields of a presigned POST uploading the file under ``name``.
+
+    The store itself rejects uploads larger than ``max_size`` bytes or after ``expire`` seconds.
+    """
+    key = storage._normalize_name(clean_name(name))  # pylint: disable=protected-access
+    return storage.bucket.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=key,
+        Conditions=[["content-length-range", 0, max_size]],
+        ExpiresIn=expire,
+    )
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.http import FileResponse
+from django.test import Client, TestCase, override_settings
+
+from application_registry.models import AppInfo, AppType
+from common.downloads import file_download_response, internal_location_for, local_path_for
+
+
+class DownloadOffloadTests(TestCase):
+
+    def setUp(self):
+        """Set up a media root with a single file in it"""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.locations = {self.media_root: "/protected/media/"}
+
+        os.makedirs(os.path.join(self.media_root, "user_1", "job_1"))
+        self.file_path = os.path.join(self.media_root, "user_1", "job_1", "out put.csv")
+        with open(self.file_path, "wb") as f:
+            f.write(b"a,b\n1,2\n")
+
+    # -------------------------------------------------------------------------
+    # Header construction
+    # -------------------------------------------------------------------------
+
+    def test_streams_when_offload_disabled(self):
+        """Test downloads are streamed by Django when no offload mode is set"""
+        with override_settings(FILE_DOWNLOAD_OFFLOAD=""):
+            response = file_download_response(self.file_path)
+
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content), b"a,b\n1,2\n")
+
+    def test_x_accel_redirect(self):
+        """Test nginx mode maps the file onto the internal location"""
+        with override_settings(FILE_DOWNLOAD_OFFLOAD="x-accel-redirect",
+                               FILE_DOWNLOAD_OFFLOAD_LOCATIONS=self.locations):
+            response = file_download_response(self.file_path, filename="out put.csv")
+
+            self.assertEqual(response["X-Accel-Redirect"],
+                             "/protected/media/user_1/job_1/out%20put.csv")
+            self.assertEqual(local_path_for(response["X-Accel-Redirect"]),
+                             os.path.realpath(self.file_path))
+        self.assertEqual(response.content, b"")
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+    def test_x_sendfile(self):
+        """Test apache mode passes the absolute file path"""
+        with override_settings(FILE_DOWNLOAD_OFFLOAD="x-sendfile"):
+            response = file_download_response(self.file_path)
+
+        self.assertEqual(response["X-Sendfile"], os.path.realpath(self.file_path))
+
+    def test_unmapped_file_is_streamed(self):
+        """Test files outside the mapped locations fall back to streaming"""
+        with override_settings(FILE_DOWNLOAD_OFFLOAD="x-accel-redirect",
+                               FILE_DOWNLOAD_OFFLOAD_LOCATIONS={}):
+            self.assertIsNone(internal_location_for(self.file_path))
+            response = file_download_response(self.file_path)
+
+        self.assertIsInstance(response, FileResponse)
+
+    def test_internal_location_cannot_escape_root(self):
+        """Test a crafted internal URI cannot resolve outside the mapped root"""
+        with override_settings(FILE_DOWNLOAD_OFFLOAD_LOCATIONS=self.locations):
+            self.assertIsNone(local_path_for("/protected/media/../../etc/passwd"))
+
+    # -------------------------------------------------------------------------
+    # Proxy stand-in
+    # -------------------------------------------------------------------------
+
+    def test_program_download_through_proxy_stand_in(self):
+        """Test the program endpoint end-to-end with the emulated front proxy"""
+        app = AppInfo.objects.create(name="solver", type=AppType.PYTHON_SCRIPT,
+                                     file_path=self.file_path)
+        url = f"/application_registry/{app.id}/program/"
+
+        with override_settings(FILE_DOWNLOAD_OFFLOAD="x-accel-redirect",
+                               FILE_DOWNLOAD_OFFLOAD_LOCATIONS=self.locations):
+            # Without the stand-in only the header is returned
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("X-Accel-Redirect", response)
+            self.assertEqual(response.content, b"")
+
+            with self.modify_settings(MIDDLEWARE={
+                    "prepend": "common.middleware.OffloadProxyMiddleware"}):
+                # Fresh client, the middleware chain is loaded on first use
+                response = Client().get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Accel-Redirect", response)
+        self.assertEqual(b"".join(response.streaming_content), b"a,b\n1,2\n")
+        self.assertEqual(response["Content-Type"], "text/x-python")
+        self.assertIn('filename="solver"', response["Content-Disposition"])
+
+
+class ConditionalDownloadTests(TestCase):
+
+    def setUp(self):
+        """Set up a program file registered as an application"""
+        handle, self.file_path = tempfile.mkstemp()
+        self.addCleanup(os.remove, self.file_path)
+        with os.fdopen(handle, "wb") as f:
+            f.write(b"0123456789" * 100)
+        app = AppInfo.objects.create(name="solver", type=AppType.LINUX_BINARY,
+                                     file_path=self.file_path)
+        self.url = f"/application_registry/{app.id}/program/"
+
+    def test_etag_revalidation(self):
+        """Test a matching If-None-Match is answered with an empty 304"""
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertEqual(etag, f'"{hashlib.sha256(b"0123456789" * 100).hexdigest()}"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        with open(self.file_path, "ab") as f:
+            f.write(b"patched")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_byte_ranges(self):
+        """Test single byte ranges, suffix ranges and unsatisfiable ranges"""
+        response = self.client.get(self.url, HTTP_RANGE="bytes=5-14")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"5678901234")
+        self.assertEqual(response["Content-Range"], "bytes 5-14/1000")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1000")
+
+        # A stale If-Range gets the whole current file
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
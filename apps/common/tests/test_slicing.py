@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from common import slicing
+from common.slicing import LineIndex, MappedFile
+
+LINES = [f"line {i}\n".encode() for i in range(5000)]
+
+
+class SlicingTests(SimpleTestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        self.addCleanup(os.remove, self.path)
+        with os.fdopen(handle, "wb") as file:
+            file.writelines(LINES)
+        slicing.clear_index_cache()
+
+    def test_line_index(self):
+        """Test every indexed offset is the start of the corresponding line"""
+        data = b"".join(LINES)
+        index = LineIndex.build(data, step=100)
+
+        self.assertEqual(index.line_count, len(LINES))
+        for position, offset in enumerate(index.offsets[:-1]):
+            self.assertEqual(offset, len(b"".join(LINES[:position * 100])))
+        self.assertEqual(LineIndex.build(b"a\nb").line_count, 2)
+        self.assertEqual(LineIndex.build(b"").line_count, 0)
+
+    def test_lines_and_tail(self):
+        """Test line windows, windows past the end and tail"""
+        with MappedFile(self.path) as mapped:
+            self.assertEqual(mapped.lines(1500, 3), b"".join(LINES[1500:1503]))
+            self.assertEqual(mapped.lines(4998, 10), b"".join(LINES[4998:]))
+            self.assertEqual(mapped.lines(6000, 10), b"")
+            self.assertEqual(mapped.tail(2), b"".join(LINES[-2:]))
+            self.assertEqual(mapped.tail(10000), b"".join(LINES))
+            self.assertEqual(mapped.bytes(-10, 100), LINES[-1])
+
+    def test_max_bytes(self):
+        """Test line reads are cut at max_bytes, tail keeping the end of the file"""
+        with MappedFile(self.path) as mapped:
+            self.assertEqual(mapped.lines(0, 3, max_bytes=100), b"".join(LINES[:3]))
+            self.assertFalse(mapped.truncated)
+            self.assertEqual(mapped.lines(0, 3, max_bytes=10), b"".join(LINES[:3])[:10])
+            self.assertTrue(mapped.truncated)
+            self.assertEqual(mapped.tail(2, max_bytes=5), b"".join(LINES)[-5:])
+            self.assertTrue(mapped.truncated)
+            self.assertEqual(mapped.tail(2, max_bytes=100), b"".join(LINES[-2:]))
+            self.assertFalse(mapped.truncated)
+
+    def test_index_cached_until_modified(self):
+        """Test the index is built once per file version"""
+        with MappedFile(self.path) as mapped:
+            first = mapped.index
+        with MappedFile(self.path) as mapped:
+            self.assertIs(mapped.index, first)
+
+        with open(self.path, "ab") as file:
+            file.write(b"appended\n")
+        with MappedFile(self.path) as mapped:
+            self.assertEqual(mapped.line_count, len(LINES) + 1)
+            self.assertEqual(mapped.tail(1), b"appended\n")
+
+    def test_csv_rows(self):
+        """Test CSV rows keep the header and select columns by name or position"""
+        with open(self.path, "wb") as file:
+            file.write(b"t,p,u\n" + b"".join(f"{i},{i * 2},{i * 3}\n".encode() for i in range(50)))
+
+        with MappedFile(self.path) as mapped:
+            self.assertEqual(mapped.csv_rows(10, 2), "t,p,u\n10,20,30\n11,22,33\n")
+            self.assertEqual(mapped.csv_rows(0, 1, ["u", "0"]), "u,t\n0,0\n")
+            with self.assertRaises(KeyError):
+                mapped.csv_rows(0, 1, ["missing"])
+            # Only whole rows within max_bytes
+            self.assertEqual(mapped.csv_rows(10, 5, max_bytes=24), "t,p,u\n10,20,30\n11,22,33\n")
+            self.assertTrue(mapped.truncated)
@@ -12,7 +12,7 @@
 #  see <https://www.gnu.org/licenses/>.
 
 from django.contrib import admin
-from .models import JobStatus, JobInfo, JobResource
+from .models import FileGarbage, JobStatus, JobInfo, JobResource, UserUsage
 
 
 @admin.register(JobInfo)
@@ -120,4 +120,20 @@ class JobResourceAdmin(admin.ModelAdmin):
     def full_path_display(self, obj):
         """Display full path in the form"""
         return obj.full_file_path
-    full_path_display.short_description = 'Full File Path'
\ No newline at end of file
+    full_path_display.short_description = 'Full File Path'
+
+
+@admin.register(FileGarbage)
+class FileGarbageAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_directory', 'created_at', 'attempts', 'last_error')
+    list_filter = ('is_directory', 'attempts')
+    search_fields = ('name',)
+    readonly_fields = ('name', 'is_directory', 'created_at', 'attempts', 'last_error')
+
+
+@admin.register(UserUsage)
+class UserUsageAdmin(admin.ModelAdmin):
+    list_display = ('user', 'bytes_stored', 'file_count', 'core_seconds', 'max_bytes', 'max_files',
+                    'max_core_seconds', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'bytes_stored', 'file_count', 'core_seconds', 'updated_at')
@@ -0,0 +1,73 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner selection for submitted jobs.
+
+Candidates are the job owner's online runners, in the job's runner pool and meeting its label
+selector when it has them (see runner_manager.selectors). Runners holding the job's application
+version in their program cache come first (no download on the job's critical path), then idle
+runners, then the ones with the fewest unfinished jobs. Ranking is a single query.
+"""
+
+from django.db import connections, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from application_registry.models import RunnerAppCache
+from runner_manager.models import ONLINE_STATES, RunnerInfo, RunnerStatus
+from runner_manager.selectors import parse_selector, selector_q
+
+from .models import FINISHED_STATUSES, JobInfo
+
+
+def eligible_runners(job, runners=None):
+    """Restrict runners (the owner's online ones by default) to the job's pool and selector."""
+    if runners is None:
+        runners = RunnerInfo.objects.filter(owner_id=job.created_by_id, state__in=ONLINE_STATES)
+    if job.runner_pool:
+        runners = runners.filter(pool=job.runner_pool)
+    if job.runner_selector:
+        requirements = parse_selector(job.runner_selector)
+        runners = runners.filter(selector_q(requirements, connections[runners.db].vendor))
+    return runners
+
+
+def rank_runners(job, runners=None):
+    """Return the candidate runners of a job, best first, annotated with warm and active_jobs."""
+    runners = eligible_runners(job, runners)
+    warm = RunnerAppCache.objects.filter(
+        runner=OuterRef('pk'), version_id=job.application_version_id
+    )
+    return runners.annotate(
+        warm=Exists(warm),
+        idle=Q(state=RunnerStatus.IDLE),
+        active_jobs=Count('jobinfo', filter=~Q(jobinfo__status__in=FINISHED_STATUSES)),
+    ).order_by('-warm', '-idle', 'active_jobs', '-last_contact')
+
+
+def select_runner(job, runners=None):
+    """Return the best runner for a job, None when none is online."""
+    return rank_runners(job, runners).first()
+
+
+def dispatch_job(job, runners=None):
+    """Assign an unassigned job to the best runner, which is notified; returns the runner."""
+    with transaction.atomic():
+        job = JobInfo.objects.select_for_update().get(pk=job.pk)
+        if job.assigned_runner_id is not None:
+            return job.assigned_runner
+        runner = select_runner(job, runners)
+        if runner is not None:
+            job.assigned_runner = runner
+            job.save(update_fields=['assigned_runner'])
+    return runner
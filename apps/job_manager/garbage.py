@@ -0,0 +1,127 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Background removal of files queued in FileGarbage.
+
+Entries are claimed with SELECT ... FOR UPDATE SKIP LOCKED (where the database supports it), so any
+number of collectors can drain the queue concurrently.
+"""
+
+import logging
+import os
+import posixpath
+
+from django.db import transaction
+from django.db.models import Q
+
+from common.storage import job_resource_storage, local_path
+
+from .models import FileGarbage, JobResource
+
+logger = logging.getLogger(__name__)
+
+
+def _prune_local_directory(storage, directory):
+    """Remove a local directory once it is empty (object stores have no directories)."""
+    path = local_path(storage, directory) if directory else None
+    if path and os.path.isdir(path) and not os.listdir(path):
+        os.rmdir(path)
+
+
+def _remove_file(storage, name, queued_at):
+    if JobResource.objects.filter(Q(file=name, archive_name='') | Q(archive_name=name)).exists():
+        # Taken again by a new upload after the delete, or an archive with members left
+        return 0
+    if storage.exists(name) and storage.get_modified_time(name) > queued_at:
+        # Written again after the delete by an upload whose row is not committed yet
+        return 0
+    storage.delete(name)
+    _prune_local_directory(storage, posixpath.dirname(name))
+    return 1
+
+
+def _remove_directory(storage, directory, limit):
+    """
+    Remove up to limit files below directory; returns (files removed, whether it is now gone).
+    """
+    live = set()
+    in_use = JobResource.objects.filter(
+        Q(file__startswith=directory + '/') | Q(archive_name__startswith=directory + '/')
+    )
+    for name, archive_name in in_use.values_list('file', 'archive_name'):
+        live.add(archive_name or name)
+    removed, pending, visited = 0, [directory], []
+    while pending:
+        current = pending.pop()
+        try:
+            subdirectories, files = storage.listdir(current)
+        except FileNotFoundError:
+            continue
+        visited.append(current)
+        pending.extend(posixpath.join(current, name) for name in subdirectories)
+        for name in files:
+            name = posixpath.join(current, name)
+            if name in live:
+                continue
+            if removed == limit:
+                return removed, False
+            storage.delete(name)
+            removed += 1
+
+    # Deepest directories first
+    for current in reversed(visited):
+        _prune_local_directory(storage, current)
+    return removed, True
+
+
+def collect_garbage(batch_size=500, max_attempts=5):
+    """
+    Remove one batch of queued files from storage.
+
+    At most batch_size files are deleted. Entries that fail are kept with their error and retried
+    until they reach max_attempts. Returns (files removed, entries cleared, entries failed).
+    """
+    storage = job_resource_storage
+    removed = failed = 0
+
+    with transaction.atomic():
+        entries = (
+            FileGarbage.objects.select_for_update(skip_locked=True)
+            .filter(attempts__lt=max_attempts)
+            .order_by('attempts', 'id')[:batch_size]
+        )
+        done = []
+        for entry in entries:
+            try:
+                if entry.is_directory:
+                    count, finished = _remove_directory(storage, entry.name, batch_size - removed)
+                else:
+                    count, finished = _remove_file(storage, entry.name, entry.created_at), True
+            except OSError as e:
+                logger.warning(f"Failed to remove {entry}: {e}")
+                entry.attempts += 1
+                entry.last_error = str(e)
+                entry.save(update_fields=['attempts', 'last_error'])
+                failed += 1
+                continue
+
+            removed += count
+            if finished:
+                done.append(entry.id)
+            if removed >= batch_size:
+                break
+
+        FileGarbage.objects.filter(id__in=done).delete()
+
+    return removed, len(done), failed
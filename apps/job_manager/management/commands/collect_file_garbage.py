@@ -0,0 +1,50 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from job_manager.garbage import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Remove the files of deleted jobs and resources queued for garbage collection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Maximum number of files removed per batch")
+        parser.add_argument("--max-attempts", type=int, default=5,
+                            help="Give up on an entry after this many failures")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running, polling the queue when it is empty")
+        parser.add_argument("--interval", type=float, default=10.0,
+                            help="Seconds to wait between polls with --loop")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            removed, cleared, failed = collect_garbage(
+                options["batch_size"], options["max_attempts"]
+            )
+            total += removed
+            if removed or failed:
+                self.stdout.write(f"Removed {removed} files ({failed} failures)")
+
+            # Nothing left to do (or only entries that keep failing)
+            if not removed and not cleared:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Garbage collection done, removed {total} files"))
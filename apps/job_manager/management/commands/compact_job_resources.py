@@ -0,0 +1,45 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from job_manager.retention import compact
+
+
+class Command(BaseCommand):
+    help = "Apply the resource retention policies (delete, compress, pack) to finished jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Maximum number of jobs visited per policy and batch")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running, polling for newly eligible jobs when caught up")
+        parser.add_argument("--interval", type=float, default=300.0,
+                            help="Seconds to wait between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            results = compact(options["batch_size"])
+            for resource_type, (jobs, resources) in results.items():
+                if jobs:
+                    self.stdout.write(f"{resource_type}: {resources} resources in {jobs} jobs")
+
+            caught_up = all(jobs < options["batch_size"] for jobs, _ in results.values())
+            if caught_up:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("Compaction done"))
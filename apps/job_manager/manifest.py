@@ -0,0 +1,79 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Compact job resource manifests for delta synchronisation.
+
+A manifest lists filename, type, size, modification time and SHA-256 of every resource of a job and
+is built from a single query (the metadata is stored on the JobResource rows). Clients compare it
+against their local copy, or submit their own manifest and receive only what has to be transferred.
+"""
+
+import hashlib
+
+
+def build_manifest(resources):
+    """Return the manifest entries of a JobResource queryset, in one query."""
+    rows = resources.order_by().values(
+        'id', 'filename', 'resource_type', 'size', 'checksum', 'updated_at'
+    )
+    return [
+        {
+            'id': str(row['id']),
+            'filename': row['filename'],
+            'resource_type': row['resource_type'],
+            'size': row['size'],
+            'mtime': row['updated_at'].isoformat(),
+            'checksum': row['checksum'],
+        }
+        for row in rows
+    ]
+
+
+def manifest_digest(entries):
+    """Digest identifying the content of a manifest, independent of order and timestamps."""
+    digest = hashlib.sha256()
+    for filename, checksum in sorted((e['filename'], e.get('checksum') or '') for e in entries):
+        digest.update(f"{filename}\0{checksum}\n".encode())
+    return digest.hexdigest()
+
+
+def _differs(server, client):
+    """Whether the client's copy of a file differs from the server's."""
+    if client.get('checksum') and server['checksum']:
+        return client['checksum'] != server['checksum']
+    if client.get('size') is not None and server['size'] is not None:
+        return client['size'] != server['size']
+    return True
+
+
+def diff_manifest(server_entries, client_entries, direction):
+    """
+    Compare a client manifest with the server one.
+
+    For ``download`` the server entries the client is missing or holds a different version of are
+    returned, for ``upload`` the client filenames the server is missing or holds a different
+    version of.
+    """
+    server = {entry['filename']: entry for entry in server_entries}
+    client = {entry['filename']: entry for entry in client_entries}
+
+    if direction == 'download':
+        return [
+            entry for filename, entry in server.items()
+            if filename not in client or _differs(entry, client[filename])
+        ]
+    return [
+        filename for filename, entry in client.items()
+        if filename not in server or _differs(server[filename], entry)
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:22
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_file_metadata(apps, schema_editor):
+    """Compute size and checksum of the files uploaded before these columns existed."""
+    JobResource = apps.get_model('job_manager', 'JobResource')
+    for resource in JobResource.objects.filter(checksum='').exclude(file='').iterator():
+        digest, size = hashlib.sha256(), 0
+        try:
+            with resource.file.storage.open(resource.file.name, 'rb') as content:
+                for chunk in iter(lambda: content.read(64 * 1024), b''):
+                    digest.update(chunk)
+                    size += len(chunk)
+        except OSError:
+            continue
+        JobResource.objects.filter(pk=resource.pk).update(size=size, checksum=digest.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_manager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobresource',
+            name='checksum',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 hex digest of the file content', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='jobresource',
+            name='size',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Size of the file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='jobresource',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='When the resource was last modified'),
+        ),
+        migrations.RunPython(backfill_file_metadata, migrations.RunPython.noop),
+    ]
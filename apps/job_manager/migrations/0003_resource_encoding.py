@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_manager', '0002_resource_file_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobresource',
+            name='encoding',
+            field=models.CharField(blank=True, default='', help_text='Content encoding of the stored file (gzip, zstd), empty if stored raw', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='jobresource',
+            name='stored_size',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Size of the file in storage in bytes (smaller than size when compressed)', null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:29
+
+import common.storage
+import job_manager.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_manager', '0003_resource_encoding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobresource',
+            name='file',
+            field=models.FileField(help_text='The actual file/resource', storage=common.storage.get_job_resource_storage, upload_to=job_manager.models.job_resource_upload_path),
+        ),
+    ]
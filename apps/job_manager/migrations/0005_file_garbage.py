@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_manager', '0004_resource_storage_alias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileGarbage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name of the file or directory to remove', max_length=500)),
+                ('is_directory', models.BooleanField(default=False, help_text='Remove everything below name, e.g. the directory of a deleted job')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the entry was queued')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of failed attempts to remove the entry')),
+                ('last_error', models.TextField(blank=True, help_text='Error of the last failed attempt')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['attempts', 'id'], name='job_manager_attempt_e9173e_idx')],
+            },
+        ),
+    ]
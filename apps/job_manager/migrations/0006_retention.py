@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application_registry', '0001_initial'),
+        ('job_manager', '0005_file_garbage'),
+        ('runner_manager', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetentionCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource_type', models.CharField(choices=[('IN', 'INPUT'), ('OUT', 'OUTPUT'), ('CFG', 'CONFIG'), ('LOG', 'LOG'), ('TMP', 'TEMPORARY'), ('RES', 'RESULT')], help_text='Resource type the policy applies to', max_length=3, unique=True)),
+                ('job_updated_at', models.DateTimeField(blank=True, help_text='updated_at of the last job visited', null=True)),
+                ('job_id', models.UUIDField(blank=True, help_text='Id of the last job visited', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When the compactor last advanced')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobresource',
+            name='archive_name',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Storage name of the zip archive holding the file once packed by retention', max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='jobinfo',
+            index=models.Index(fields=['status', 'updated_at'], name='job_manager_status_20d018_idx'),
+        ),
+    ]
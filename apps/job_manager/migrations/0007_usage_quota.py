@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_usage(apps, schema_editor):
+    """Start the usage counters from the resources stored before they existed."""
+    JobResource = apps.get_model('job_manager', 'JobResource')
+    UserUsage = apps.get_model('job_manager', 'UserUsage')
+
+    # Files stored raw take their size in storage
+    JobResource.objects.filter(stored_size=None, encoding='').update(stored_size=models.F('size'))
+
+    owners = (JobResource.objects.order_by().values('job__created_by')
+              .annotate(stored=models.Sum('stored_size'), files=models.Count('id')))
+    UserUsage.objects.bulk_create([
+        UserUsage(user_id=owner['job__created_by'], bytes_stored=owner['stored'] or 0,
+                  file_count=owner['files'])
+        for owner in owners
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('job_manager', '0006_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserUsage',
+            fields=[
+                ('user', models.OneToOneField(help_text='User the usage belongs to', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='usage', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('bytes_stored', models.BigIntegerField(default=0, help_text='Bytes of job resources kept in storage (after compression)')),
+                ('file_count', models.IntegerField(default=0, help_text='Number of job resources')),
+                ('core_seconds', models.FloatField(default=0.0, help_text='Runner core-seconds consumed by finished jobs')),
+                ('max_bytes', models.BigIntegerField(blank=True, help_text='Storage limit in bytes (empty: QUOTA_DEFAULT_MAX_BYTES)', null=True)),
+                ('max_files', models.IntegerField(blank=True, help_text='File count limit (empty: QUOTA_DEFAULT_MAX_FILES)', null=True)),
+                ('max_core_seconds', models.FloatField(blank=True, help_text='Compute limit in core-seconds (empty: QUOTA_DEFAULT_MAX_CORE_SECONDS)', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When the usage last changed')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobinfo',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the job reached a finished status.', null=True),
+        ),
+        migrations.AddField(
+            model_name='jobinfo',
+            name='started_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the job first reported RUNNING.', null=True),
+        ),
+        migrations.RunPython(backfill_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:43
+
+import common.storage
+import job_manager.models
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def backfill_filename(apps, schema_editor):
+    """Fill the filename column of existing resources in batches (NFC is not available in SQL)."""
+    JobResource = apps.get_model('job_manager', 'JobResource')
+    batch = []
+    for resource in JobResource.objects.only('id', 'file').iterator(chunk_size=BATCH_SIZE):
+        resource.filename = job_manager.models.normalize_filename(resource.file.name)
+        batch.append(resource)
+        if len(batch) == BATCH_SIZE:
+            JobResource.objects.bulk_update(batch, ['filename'])
+            batch = []
+    JobResource.objects.bulk_update(batch, ['filename'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_manager', '0007_usage_quota'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobresource',
+            name='filename',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Name of the file without its path, Unicode NFC normalized', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='jobresource',
+            name='file',
+            field=job_manager.models.ResourceFileField(help_text='The actual file/resource', storage=common.storage.get_job_resource_storage, upload_to=job_manager.models.job_resource_upload_path),
+        ),
+        migrations.RunPython(backfill_filename, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobresource',
+            index=models.Index(fields=['job', 'filename'], name='resource_job_filename_idx', opclasses=['', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='jobresource',
+            index=models.Index(fields=['filename'], name='resource_filename_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application_registry', '0002_appversion'),
+        ('job_manager', '0008_resource_filename'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobinfo',
+            name='application_version',
+            field=models.ForeignKey(blank=True, help_text='Application version the job runs, the current one when it was submitted', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='jobs', to='application_registry.appversion'),
+        ),
+    ]
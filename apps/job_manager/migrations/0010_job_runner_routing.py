@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:27
+
+import django.core.validators
+import runner_manager.selectors
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_manager', '0009_job_application_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobinfo',
+            name='runner_pool',
+            field=models.CharField(blank=True, default='', help_text='Pool of the runners which may run the job, any pool when empty', max_length=50, validators=[django.core.validators.RegexValidator('^[A-Za-z0-9_.-]*$', 'Pool names are letters, digits, _ . and -.')]),
+        ),
+        migrations.AddField(
+            model_name='jobinfo',
+            name='runner_selector',
+            field=models.CharField(blank=True, default='', help_text="Label selector of the runners which may run the job, e.g. 'gpu=a100,site in (lyon, paris),!spot'", max_length=500, validators=[runner_manager.selectors.validate_selector]),
+        ),
+    ]
@@ -13,20 +13,37 @@
 
 
 
+import hashlib
+import logging
 import os
+import posixpath
+import tempfile
+import unicodedata
 import uuid
 
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
+from django.core.files import File
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from application_registry.models import AppInfo
-from runner_manager.models import RunnerInfo
+from application_registry.models import AppInfo, AppVersion
+from common.archives import open_zip_member
+from common.compression import DECODE_ERRORS, open_decoded, open_encoder
+from common.storage import (  # noqa: F401, PreserveFilenameStorage is used by migrations
+    PreserveFilenameStorage,
+    get_job_resource_storage,
+    replace_file,
+)
+from runner_manager.models import RunnerInfo, validate_pool
+from runner_manager.selectors import validate_selector
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
 
 # --------------------------------------------------------------------------------------------------
 # Enumerators and Helpers
@@ -49,6 +66,15 @@ class JobStatus(models.TextChoices):
     FAILED_TIMEOUT = "FO", _("FAILED_TIMEOUT")
     FAILED_RUNNER_EXCEPTION = "FE", _("FAILED_RUNNER_EXCEPTION")
 
+FINISHED_STATUSES = [
+    JobStatus.SUCCEEDED,
+    JobStatus.FAILED,
+    JobStatus.FAILED_RESOURCE_ERROR,
+    JobStatus.FAILED_TERMINATED,
+    JobStatus.FAILED_TIMEOUT,
+    JobStatus.FAILED_RUNNER_EXCEPTION,
+]
+
 class ResourceType(models.TextChoices):
     INPUT = "IN", _("INPUT")
     OUTPUT = "OUT", _("OUTPUT") 
@@ -57,21 +83,6 @@ class ResourceType(models.TextChoices):
     TEMP = "TMP", _("TEMPORARY")
     RESULT = "RES", _("RESULT")
 
-class PreserveFilenameStorage(FileSystemStorage):
-    """
-    Custom storage that preserves original filenames and overwrites existing files.
-    """
-    
-    def get_valid_name(self, name):
-        """Return the original filename without Django's aggressive sanitization."""
-        return os.path.basename(name)
-    
-    def get_available_name(self, name, max_length=None):
-        """Allow overwrite of existing files instead of creating duplicates."""
-        return name
-
-preserve_storage = PreserveFilenameStorage()
-
 def job_resource_upload_path(instance, filename):
     """
     Upload path relative to MEDIA_ROOT: user_{user_id}/job_{job_id}/filename
@@ -99,6 +110,25 @@ def job_resource_upload_path(instance, filename):
         timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
         return os.path.join("temp_uploads", f"file_{timestamp}")
 
+def normalize_filename(name):
+    """Basename of a storage name (or a plain filename) in Unicode NFC, as stored in filename"""
+    return unicodedata.normalize('NFC', posixpath.basename(name or ""))
+
+
+class ResourceFileField(models.FileField):
+    """
+    FileField that keeps the model's ``filename`` column in step with the stored file name.
+
+    The name is only final once the file has been saved to storage (upload_to and the storage may
+    rename it), which happens in pre_save, before the filename column is read.
+    """
+
+    def pre_save(self, model_instance, add):
+        file = super().pre_save(model_instance, add)
+        model_instance.filename = normalize_filename(file.name)
+        return file
+
+
 # --------------------------------------------------------------------------------------------------
 # Models
 # --------------------------------------------------------------------------------------------------
@@ -147,6 +177,21 @@ class JobInfo(models.Model):
         null=True,
         blank=True,
     )
+    runner_pool = models.CharField(
+        max_length=50,
+        blank=True,
+        default="",
+        validators=[validate_pool],
+        help_text="Pool of the runners which may run the job, any pool when empty"
+    )
+    runner_selector = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        validators=[validate_selector],
+        help_text="Label selector of the runners which may run the job, e.g. "
+                  "'gpu=a100,site in (lyon, paris),!spot'"
+    )
     application_id = models.ForeignKey(
         AppInfo, 
         on_delete=models.CASCADE,
@@ -154,6 +199,14 @@ class JobInfo(models.Model):
         blank=False,
         help_text="The application id this job will execute"
     )
+    application_version = models.ForeignKey(
+        AppVersion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="jobs",
+        help_text="Application version the job runs, the current one when it was submitted"
+    )
     executable = models.CharField(
         default="",
         max_length=500,
@@ -186,12 +239,63 @@ class JobInfo(models.Model):
         help_text="The exit code of the application which was executed."
     )
 
+    # Execution times, used for compute accounting
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the job first reported RUNNING."
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the job reached a finished status."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
 
     def save(self, *args, **kwargs):
         # Auto-generate local working directory path
         if not self.local_working_directory:
             self.local_working_directory = f"user_{self.created_by.id}/job_{self.id}"
-        super().save(*args, **kwargs)
+
+        # Pin the application version, so later releases do not change what the job runs
+        if self._state.adding and self.application_version_id is None:
+            self.application_version_id = AppInfo.objects.filter(
+                pk=self.application_id_id
+            ).values_list('current_version_id', flat=True).first()
+
+        # Record execution times on the status transitions
+        timestamps = []
+        if self.status == JobStatus.RUNNING and self.started_at is None:
+            self.started_at = timezone.now()
+            timestamps.append('started_at')
+        finishing = self.status in FINISHED_STATUSES and self.finished_at is None
+        if finishing:
+            self.finished_at = timezone.now()
+            timestamps.append('finished_at')
+        if timestamps and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *timestamps}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if finishing and self.started_at is not None:
+                UserUsage.record_compute(self.created_by_id, self.core_seconds())
+
+    def core_seconds(self):
+        """Wall time between start and finish times the logical cores of the assigned runner"""
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        cores = None
+        if self.assigned_runner_id is not None:
+            cores = (self.assigned_runner.system.exclude(cpu_logical_cores=None)
+                     .values_list('cpu_logical_cores', flat=True).first())
+        wall_time = (self.finished_at - self.started_at).total_seconds()
+        return max(wall_time, 0.0) * (cores or 1)
 
     def get_resources_by_type(self, resource_type):
         """Get all resources of a specific type"""
@@ -202,11 +306,13 @@ class JobInfo(models.Model):
         return self.get_resources_by_type(ResourceType.INPUT)
 
     def get_resource_by_filename(self, filename):
-        """Get resource by filename"""
-        try:
-            return self.resources.get(file__icontains=filename)
-        except JobResource.DoesNotExist:
-            return None
+        """Get resource by exact filename (indexed)"""
+        # Without the default ordering, so the (job, filename) index answers it
+        return self.resources.filter(filename=normalize_filename(filename)).order_by().first()
+
+    def get_resources_by_filename_prefix(self, prefix):
+        """Get resources whose filename starts with prefix (indexed)"""
+        return self.resources.filter(filename__startswith=unicodedata.normalize('NFC', prefix))
 
     def get_resource_url(self, filename):
         """Get URL for specific resource (for remote runner to download)"""
@@ -228,6 +334,25 @@ class JobInfo(models.Model):
         return f"{self.id} - {self.name} ({self.created_by.username})"
 
 
+class JobResourceQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Delete the rows, release their storage usage and queue their files for collection"""
+        with transaction.atomic():
+            # Packed files are queued as their archive, kept until its last member is deleted
+            FileGarbage.enqueue({
+                archive_name or name
+                for name, archive_name in self.order_by().values_list('file', 'archive_name')
+            })
+            owners = (self.order_by().values('job__created_by')
+                      .annotate(stored=models.Sum('stored_size'), files=models.Count('id')))
+            for owner in owners:
+                UserUsage.record_storage(
+                    owner['job__created_by'], -(owner['stored'] or 0), -owner['files']
+                )
+            return super().delete()
+
+
 class JobResource(models.Model):
     """
     Simple model for job resources - all files go to root job directory
@@ -250,11 +375,18 @@ class JobResource(models.Model):
         default=ResourceType.INPUT,
         help_text="Type of resource (input, output, config, etc.)"
     )
-    file = models.FileField(
+    file = ResourceFileField(
         upload_to=job_resource_upload_path,
-        storage=preserve_storage, 
+        storage=get_job_resource_storage,
         help_text="The actual file/resource"
     )
+    filename = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Name of the file without its path, Unicode NFC normalized"
+    )
     description = models.CharField(
         max_length=200,
         blank=True,
@@ -276,11 +408,55 @@ class JobResource(models.Model):
         blank=True,
         help_text="Who created/uploaded this resource (user or system)"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the resource was last modified"
+    )
+
+    # File metadata, kept in the row so manifests never have to touch storage
+    size = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Size of the file in bytes"
+    )
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 hex digest of the file content"
+    )
+    encoding = models.CharField(
+        max_length=10,
+        blank=True,
+        default="",
+        help_text="Content encoding of the stored file (gzip, zstd), empty if stored raw"
+    )
+    stored_size = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Size of the file in storage in bytes (smaller than size when compressed)"
+    )
+    archive_name = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Storage name of the zip archive holding the file once packed by retention"
+    )
+
+    objects = JobResourceQuerySet.as_manager()
 
     class Meta:
         ordering = ['resource_type', 'created_at']
         indexes = [
             models.Index(fields=['job', 'resource_type']),
+            # Pattern ops let PostgreSQL use the indexes for prefix (LIKE 'x%') lookups as well
+            models.Index(fields=['job', 'filename'], name='resource_job_filename_idx',
+                         opclasses=['', 'varchar_pattern_ops']),
+            models.Index(fields=['filename'], name='resource_filename_idx',
+                         opclasses=['varchar_pattern_ops']),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -292,17 +468,12 @@ class JobResource(models.Model):
     def __str__(self):
         return f"{self.job.name} - {self.get_resource_type_display()}: {self.filename}"
 
-    @property
-    def filename(self):
-        """Return just the filename without path"""
-        return self.file.name.split('/')[-1] if self.file else ""
-
     @property
     def full_file_path(self):
         """Return the full file system path for debugging"""
         try:
             return self.file.path if self.file else ""
-        except (ValueError, AttributeError):
+        except (ValueError, AttributeError, NotImplementedError):
             return ""
 
     @property
@@ -313,38 +484,325 @@ class JobResource(models.Model):
         except (ValueError, AttributeError):
             return ""
 
+    @property
+    def stored_name(self):
+        """Storage name of the object holding the file content (the archive once packed)"""
+        return self.archive_name or self.file.name
+
+    def open_stored(self):
+        """Open the stored bytes for reading, as they are (still compressed if encoded)."""
+        if self.archive_name:
+            source = self.file.storage.open(self.archive_name, 'rb')
+            return open_zip_member(source, self.filename)
+        return self.file.storage.open(self.file.name, 'rb')
+
+    def open_content(self):
+        """Open the file for reading, decompressing it on the fly if it is stored compressed."""
+        source = self.open_stored()
+        return open_decoded(source, self.encoding) if self.encoding else source
+
+    def _content_chunks(self):
+        """Yield the decoded content of the committed or pending file."""
+        if self.file._committed:
+            with self.open_content() as content:
+                yield from iter(lambda: content.read(CHUNK_SIZE), b"")
+            return
+
+        if not self.encoding:
+            yield from self.file.chunks(CHUNK_SIZE)
+            return
+
+        self.file.seek(0)
+        content = open_decoded(self.file.file, self.encoding, closefd=False)
+        yield from iter(lambda: content.read(CHUNK_SIZE), b"")
+        content.close()
+
+    def update_file_metadata(self):
+        """Compute size, stored size and checksum of the (possibly not yet stored) file."""
+        if not self.file:
+            self.size, self.stored_size, self.checksum = None, None, ""
+            return
+
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in self._content_chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        self.size, self.checksum = size, digest.hexdigest()
+        self.stored_size = self.file.size
+
+    def _storage_compression(self):
+        """The encoding to compress a pending upload with, or "" to store it as it is."""
+        encoding = settings.RESOURCE_STORAGE_COMPRESSION
+        if not encoding or self.encoding:
+            return ""
+        extension = os.path.splitext(self.file.name)[1].lower()
+        if (extension not in settings.RESOURCE_COMPRESSIBLE_EXTENSIONS
+                or self.file.size < settings.RESOURCE_COMPRESSION_MIN_SIZE):
+            return ""
+        return encoding
+
+    @staticmethod
+    def _encode_chunks(chunks, encoding):
+        """Compress chunks into a temporary file, left positioned at its end."""
+        compressed = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        with open_encoder(compressed, encoding) as encoder:
+            for chunk in chunks:
+                encoder.write(chunk)
+        return compressed
+
+    def _compress_pending_file(self, encoding):
+        """Replace the pending upload by a compressed copy, if that turns out smaller."""
+        compressed = self._encode_chunks(self.file.chunks(CHUNK_SIZE), encoding)
+        if compressed.tell() >= self.file.size:
+            compressed.close()
+            return
+        compressed.seek(0)
+        self.file = File(compressed, name=os.path.basename(self.file.name))
+        self.encoding = encoding
+        self.stored_size = self.file.size
+
+    def compress_stored(self, encoding):
+        """
+        Compress the stored file in place, if that turns out smaller; returns whether it did.
+
+        Files already encoded or packed into an archive are left alone.
+        """
+        if not self.file or self.encoding or self.archive_name:
+            return False
+
+        storage, name = self.file.storage, self.file.name
+        with storage.open(name, 'rb') as source:
+            compressed = self._encode_chunks(iter(lambda: source.read(CHUNK_SIZE), b""), encoding)
+        with compressed:
+            stored_size = compressed.tell()
+            if stored_size >= storage.size(name):
+                return False
+            compressed.seek(0)
+            # The original stays in place until the compressed copy replaces it, only then does
+            # the row say it is encoded
+            replace_file(storage, name, File(compressed))
+
+        self.encoding = encoding
+        self.stored_size = stored_size
+        self.save(update_fields=['encoding', 'stored_size', 'updated_at'])
+        return True
+
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # New uploads are hashed, and compressed if configured, before they are stored
+            self.archive_name = ""
+            self.update_file_metadata()
+            encoding = self._storage_compression()
+            if encoding:
+                self._compress_pending_file(encoding)
+        elif self.file and not self.checksum:
+            try:
+                self.update_file_metadata()
+            except DECODE_ERRORS as e:
+                logger.warning(f"Failed to compute metadata for JobResource {self.id}: {e}")
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Charge the difference to the job owner's storage usage
+            previous = 0 if adding else getattr(self, '_stored_size_in_db', None) or 0
+            UserUsage.record_storage(
+                self.job.created_by_id,
+                (self.stored_size or 0) - previous,
+                1 if adding else 0
+            )
+        self._stored_size_in_db = self.stored_size
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_size_in_db = instance.__dict__.get('stored_size')
+        return instance
+
     def delete(self, *args, **kwargs):
-        """Override delete to ensure file is deleted from storage"""
-        # Store file path before deleting the model instance
-        if self.file:
-            # Delete the file from storage
-            self.file.delete(save=False)
-        super().delete(*args, **kwargs)
+        """Delete the row and queue its file (or archive, once packed) for garbage collection"""
+        with transaction.atomic():
+            if self.file:
+                FileGarbage.enqueue([self.stored_name])
+            UserUsage.record_storage(self.job.created_by_id, -(self.stored_size or 0), -1)
+            return super().delete(*args, **kwargs)
 
 
-@receiver(pre_delete, sender=JobResource)
-def cleanup_job_resource_files(sender, instance, **kwargs):
+class FileGarbage(models.Model):
     """
-    Signal handler to clean up files and empty directories when JobResource is deleted.
-    This runs even during cascade deletes (when JobInfo is deleted).
+    Durable queue of stored files and job directories left behind by deletes.
+
+    Deletes only enqueue names, in the same transaction as the rows they remove, and the
+    collect_file_garbage command removes them from storage in batches.
     """
-    if instance.file:
-        try:
-            # Get the file path before deleting
-            file_path = instance.file.path
-            job_folder = os.path.dirname(file_path)
-
-            # Delete the file
-            instance.file.delete(save=False)
-
-            # Check if job folder is now empty and delete it
-            if os.path.isdir(job_folder) and not os.listdir(job_folder):
-                os.rmdir(job_folder)
-
-        except (ValueError, OSError) as e:
-            # Log but don't fail the deletion if file cleanup fails
-            # ValueError: file.path raises this if file doesn't exist
-            # OSError: permission or filesystem errors
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Failed to cleanup file for JobResource {instance.id}: {e}")
\ No newline at end of file
+    name = models.CharField(
+        max_length=500,
+        help_text="Storage name of the file or directory to remove"
+    )
+    is_directory = models.BooleanField(
+        default=False,
+        help_text="Remove everything below name, e.g. the directory of a deleted job"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the entry was queued"
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of failed attempts to remove the entry"
+    )
+    last_error = models.TextField(
+        blank=True,
+        help_text="Error of the last failed attempt"
+    )
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['attempts', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{'/' if self.is_directory else ''}"
+
+    @classmethod
+    def enqueue(cls, names, is_directory=False):
+        """Queue storage names (any iterable, e.g. a values_list) for removal"""
+        cls.objects.bulk_create(
+            (cls(name=name, is_directory=is_directory) for name in names if name),
+            batch_size=1000
+        )
+
+
+class UserUsage(models.Model):
+    """
+    Storage and compute used by a user, maintained incrementally so quota checks are O(1).
+
+    Counters are only changed through F() updates (record_storage, record_compute), never by
+    aggregating resources. Limits left empty fall back to the QUOTA_DEFAULT_* settings.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="usage",
+        help_text="User the usage belongs to"
+    )
+    bytes_stored = models.BigIntegerField(
+        default=0,
+        help_text="Bytes of job resources kept in storage (after compression)"
+    )
+    file_count = models.IntegerField(
+        default=0,
+        help_text="Number of job resources"
+    )
+    core_seconds = models.FloatField(
+        default=0.0,
+        help_text="Runner core-seconds consumed by finished jobs"
+    )
+    max_bytes = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Storage limit in bytes (empty: QUOTA_DEFAULT_MAX_BYTES)"
+    )
+    max_files = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="File count limit (empty: QUOTA_DEFAULT_MAX_FILES)"
+    )
+    max_core_seconds = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Compute limit in core-seconds (empty: QUOTA_DEFAULT_MAX_CORE_SECONDS)"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the usage last changed"
+    )
+
+    def __str__(self):
+        return f"{self.user_id}: {self.bytes_stored} bytes, {self.file_count} files"
+
+    def limit(self, name):
+        """Effective value of the limit field name, None if unlimited"""
+        value = getattr(self, name)
+        if value is None:
+            value = getattr(settings, f"QUOTA_DEFAULT_{name.upper()}", None)
+        return value
+
+    @classmethod
+    def for_user(cls, user_id):
+        return cls.objects.get_or_create(user_id=user_id)[0]
+
+    @classmethod
+    def _increment(cls, user_id, **deltas):
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas or user_id is None:
+            return
+        updates = {field: models.F(field) + delta for field, delta in deltas.items()}
+        if not cls.objects.filter(user_id=user_id).update(**updates):
+            cls.objects.get_or_create(user_id=user_id)
+            cls.objects.filter(user_id=user_id).update(**updates)
+
+    @classmethod
+    def record_storage(cls, user_id, bytes_delta, files_delta):
+        cls._increment(user_id, bytes_stored=bytes_delta, file_count=files_delta)
+
+    @classmethod
+    def record_compute(cls, user_id, core_seconds):
+        cls._increment(user_id, core_seconds=core_seconds)
+
+
+class RetentionCursor(models.Model):
+    """
+    Progress of the retention compactor for one resource type.
+
+    Finished jobs are visited in (updated_at, id) order; the cursor holds the last job visited, so
+    every run continues where the previous one stopped instead of rescanning all jobs.
+    """
+    resource_type = models.CharField(
+        max_length=3,
+        choices=ResourceType.choices,
+        unique=True,
+        help_text="Resource type the policy applies to"
+    )
+    job_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="updated_at of the last job visited"
+    )
+    job_id = models.UUIDField(
+        null=True,
+        blank=True,
+        help_text="Id of the last job visited"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the compactor last advanced"
+    )
+
+    def __str__(self):
+        return f"{self.get_resource_type_display()}: {self.job_updated_at} / {self.job_id}"
+
+
+@receiver(pre_delete, sender=JobInfo)
+def enqueue_job_files(sender, instance, **kwargs):
+    """
+    Queue the job directory for garbage collection when a job is deleted.
+
+    JobResource has no delete signals of its own, so the cascade removes all resources with a
+    single query and the delete takes the same time however many files the job has.
+    """
+    directory = (instance.local_working_directory
+                 or f"user_{instance.created_by_id}/job_{instance.id}")
+    FileGarbage.enqueue([directory], is_directory=True)
+
+    # Resources stored outside the job directory (e.g. temp_uploads) are queued one by one
+    FileGarbage.enqueue(
+        instance.resources.exclude(file__startswith=directory + '/')
+        .order_by().values_list('file', flat=True)
+    )
+
+    usage = instance.resources.aggregate(stored=models.Sum('stored_size'), files=models.Count('id'))
+    UserUsage.record_storage(instance.created_by_id, -(usage['stored'] or 0), -usage['files'])
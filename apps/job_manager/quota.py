@@ -0,0 +1,73 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Quota checks against the incrementally maintained UserUsage counters.
+
+Each check reads a single row, so it can run on every job submission and upload, before the
+uploaded file is written to storage.
+"""
+
+from rest_framework import exceptions, status
+
+from .models import UserUsage
+
+
+class QuotaExceeded(exceptions.APIException):
+    status_code = status.HTTP_403_FORBIDDEN
+    default_detail = "Quota exceeded."
+    default_code = "quota_exceeded"
+
+
+def remaining_bytes(user_id):
+    """Bytes the user may still store, None if unlimited."""
+    usage = UserUsage.for_user(user_id)
+    max_bytes = usage.limit('max_bytes')
+    return None if max_bytes is None else max(max_bytes - usage.bytes_stored, 0)
+
+
+def check_storage(user_id, extra_bytes=0, extra_files=0):
+    """Raise QuotaExceeded if storing extra_bytes in extra_files more would exceed a limit."""
+    usage = UserUsage.for_user(user_id)
+    max_bytes, max_files = usage.limit('max_bytes'), usage.limit('max_files')
+    if max_bytes is not None and usage.bytes_stored + extra_bytes > max_bytes:
+        raise QuotaExceeded(
+            f"Storage quota exceeded: {usage.bytes_stored} of {max_bytes} bytes used, "
+            f"{extra_bytes} more requested."
+        )
+    if max_files is not None and usage.file_count + extra_files > max_files:
+        raise QuotaExceeded(f"File quota exceeded: {usage.file_count} of {max_files} files used.")
+
+
+def check_compute(user_id):
+    """Raise QuotaExceeded if the user has used up their core-seconds."""
+    usage = UserUsage.for_user(user_id)
+    max_core_seconds = usage.limit('max_core_seconds')
+    if max_core_seconds is not None and usage.core_seconds >= max_core_seconds:
+        raise QuotaExceeded(
+            f"Compute quota exceeded: {usage.core_seconds:.0f} of {max_core_seconds:.0f} "
+            f"core-seconds used."
+        )
+
+
+def check_job_submission(user_id):
+    """A new job is refused once any of the user's quotas is exhausted."""
+    check_compute(user_id)
+    check_storage(user_id)
+
+
+def check_upload(job, upload, replaced=None):
+    """Check an upload to job, replacing the resource replaced (if any), against the quota."""
+    size = getattr(upload, 'size', None) or 0
+    previous = (replaced.stored_size or 0) if replaced is not None else 0
+    check_storage(job.created_by_id, size - previous, 0 if replaced is not None else 1)
@@ -0,0 +1,184 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Retention policies for the resources of finished jobs (RESOURCE_RETENTION_POLICIES).
+
+The compactor visits finished jobs once they have been idle for a policy's "after_days" and applies
+its action to the resources of that type. Progress is kept per resource type in a RetentionCursor,
+so each run only looks at jobs that became eligible since the previous one.
+"""
+
+import logging
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from common.compression import GZIP, check_encoding
+
+from .models import (
+    CHUNK_SIZE,
+    FINISHED_STATUSES,
+    FileGarbage,
+    JobInfo,
+    JobResource,
+    ResourceType,
+    RetentionCursor,
+)
+
+logger = logging.getLogger(__name__)
+
+ACTION_DELETE = "delete"
+ACTION_COMPRESS = "compress"
+ACTION_PACK = "pack"
+
+
+def get_policies():
+    """Return the validated retention policies, keyed by resource type."""
+    policies = {}
+    for resource_type, policy in settings.RESOURCE_RETENTION_POLICIES.items():
+        if resource_type not in ResourceType.values:
+            raise ValueError(f"Unknown resource type in retention policies: {resource_type}")
+        action = policy.get("action")
+        if action not in (ACTION_DELETE, ACTION_COMPRESS, ACTION_PACK):
+            raise ValueError(f"Unknown retention action for {resource_type}: {action}")
+        if action == ACTION_COMPRESS:
+            check_encoding(policy.get("encoding", GZIP))
+        policies[resource_type] = policy
+    return policies
+
+
+# --------------------------------------------------------------------------------------------------
+# Actions
+# --------------------------------------------------------------------------------------------------
+
+
+def delete_resources(job, resources, policy):
+    return resources.delete()[0]
+
+
+def compress_resources(job, resources, policy):
+    encoding = policy.get("encoding", GZIP)
+    compressed = 0
+    for resource in resources.filter(encoding="", archive_name=""):
+        try:
+            compressed += resource.compress_stored(encoding)
+        except OSError as e:
+            logger.warning(f"Failed to compress JobResource {resource.id}: {e}")
+    return compressed
+
+
+def pack_resources(job, resources, policy):
+    """
+    Move the files into one zip per job and resource type.
+
+    Members hold the stored bytes as they are (compressed files keep their encoding), and the
+    original files are queued for garbage collection once the rows point at the archive.
+    """
+    resources = list(resources.filter(archive_name=""))
+    if not resources:
+        return 0
+
+    storage = resources[0].file.storage
+    resource_type = resources[0].resource_type
+    timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+    archive_name = f"{job.local_working_directory}/.packed/{resource_type.lower()}_{timestamp}.zip"
+
+    packed = []
+    with tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE) as buffer:
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for resource in resources:
+                compress_type = zipfile.ZIP_STORED if resource.encoding else zipfile.ZIP_DEFLATED
+                info = zipfile.ZipInfo(
+                    resource.filename,
+                    date_time=max(resource.created_at.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+                )
+                info.compress_type = compress_type
+                try:
+                    with resource.open_stored() as source, \
+                            archive.open(info, 'w', force_zip64=True) as destination:
+                        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                            destination.write(chunk)
+                except FileNotFoundError:
+                    logger.warning(f"Skipping missing file for JobResource {resource.id} in pack")
+                    continue
+                packed.append(resource)
+        if not packed:
+            return 0
+        buffer.seek(0)
+        archive_name = storage.save(archive_name, File(buffer))
+
+    with transaction.atomic():
+        JobResource.objects.filter(id__in=[r.id for r in packed]).update(
+            archive_name=archive_name, updated_at=timezone.now()
+        )
+        FileGarbage.enqueue(r.file.name for r in packed)
+    return len(packed)
+
+
+ACTIONS = {
+    ACTION_DELETE: delete_resources,
+    ACTION_COMPRESS: compress_resources,
+    ACTION_PACK: pack_resources,
+}
+
+
+# --------------------------------------------------------------------------------------------------
+# Compactor
+# --------------------------------------------------------------------------------------------------
+
+
+def apply_policy(resource_type, policy, batch_size=100, now=None):
+    """
+    Apply one policy to the next batch of eligible jobs and advance its cursor.
+
+    Returns (jobs visited, resources affected); fewer jobs than batch_size means it caught up.
+    """
+    now = now or timezone.now()
+    cursor, _ = RetentionCursor.objects.get_or_create(resource_type=resource_type)
+
+    jobs = JobInfo.objects.filter(
+        status__in=FINISHED_STATUSES,
+        updated_at__lte=now - timedelta(days=policy.get("after_days", 0)),
+    )
+    if cursor.job_updated_at is not None:
+        jobs = jobs.filter(
+            Q(updated_at__gt=cursor.job_updated_at)
+            | Q(updated_at=cursor.job_updated_at, id__gt=cursor.job_id)
+        )
+    jobs = list(jobs.order_by('updated_at', 'id')[:batch_size])
+
+    action = ACTIONS[policy["action"]]
+    affected = 0
+    for job in jobs:
+        affected += action(job, job.resources.filter(resource_type=resource_type), policy)
+
+        # Saved after every job, an interrupted run does not repeat finished work
+        cursor.job_updated_at, cursor.job_id = job.updated_at, job.id
+        cursor.save()
+
+    return len(jobs), affected
+
+
+def compact(batch_size=100, now=None):
+    """Apply every policy to one batch of jobs; returns {resource type: (jobs, resources)}."""
+    return {
+        resource_type: apply_policy(resource_type, policy, batch_size, now)
+        for resource_type, policy in get_policies().items()
+    }
@@ -11,11 +11,56 @@
 # You should have received a copy of the GNU General Public License along with this program. If not,
 #  see <https://www.gnu.org/licenses/>.
 
+import logging
+
+from django.conf import settings
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 from rest_framework import serializers
 
-from .models import JobInfo, JobResource
+from application_registry.schema import MAX_VALIDATED_SIZE, validate_config
+from common.compression import (
+    DECODE_ERRORS,
+    available_encodings,
+    check_decodable,
+    has_signature,
+    open_decoded,
+)
+from runner_manager.selectors import matches, parse_selector
+
+from .models import JobInfo, JobResource, ResourceType, UserUsage
+
+logger = logging.getLogger(__name__)
+
+
+class EncodedUploadMixin:
+    """
+    Validates the optional ``encoding`` of an upload, declaring that the file was sent compressed.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        encoding = attrs.get("encoding")
+        if not encoding:
+            return attrs
+
+        if encoding not in available_encodings():
+            raise serializers.ValidationError(
+                {"encoding": f"Must be one of {available_encodings()}."}
+            )
+        upload = attrs.get("file")
+        if upload is None or not has_signature(upload, encoding):
+            raise serializers.ValidationError(
+                {"encoding": f"The uploaded file is not {encoding} encoded."}
+            )
+        try:
+            # The magic bytes may head a truncated or corrupt stream, which would fail on save
+            check_decodable(upload, encoding)
+        except DECODE_ERRORS:
+            raise serializers.ValidationError(
+                {"encoding": f"The uploaded file is not valid {encoding} data."}
+            )
+        return attrs
 
 
 class JobInfoSerializer(serializers.ModelSerializer):
@@ -32,7 +77,10 @@ class JobInfoSerializer(serializers.ModelSerializer):
             "created_by",
             "status",
             "assigned_runner",
+            "runner_pool",
+            "runner_selector",
             "application_id",
+            "application_version",
             "executable",
             "command_line_args",
             "exit_code",
@@ -40,10 +88,35 @@ class JobInfoSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["updated_at", "created_by"]
 
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        version = attrs.get("application_version")
+        application = attrs.get("application_id", getattr(self.instance, "application_id", None))
+        if version is not None and version.application_id != application.pk:
+            raise serializers.ValidationError(
+                {"application_version": "Not a version of the job's application."}
+            )
+
+        runner = attrs.get("assigned_runner")
+        if runner is not None:
+            pool = attrs.get("runner_pool", getattr(self.instance, "runner_pool", ""))
+            selector = attrs.get("runner_selector", getattr(self.instance, "runner_selector", ""))
+            if pool and runner.pool != pool:
+                raise serializers.ValidationError({"assigned_runner": "Runner not in the pool."})
+            if selector and not matches(runner.labels, parse_selector(selector)):
+                raise serializers.ValidationError(
+                    {"assigned_runner": "Runner labels do not match the selector."}
+                )
+        return attrs
+
 
 class JobInfoRunnerSerializer(serializers.ModelSerializer):
     """Serializer for runners - excludes yaml_file which should be requested separately"""
     created_by = serializers.StringRelatedField(read_only=True)
+    application_sha256 = serializers.CharField(
+        source="application_version.sha256", read_only=True, default=None,
+        help_text="Hash of the program version to run, cache key for the program download"
+    )
 
     class Meta:
         model = JobInfo
@@ -57,6 +130,8 @@ class JobInfoRunnerSerializer(serializers.ModelSerializer):
             "status",
             "assigned_runner",
             "application_id",
+            "application_version",
+            "application_sha256",
             "executable",
             "command_line_args",
             "resources",
@@ -65,11 +140,44 @@ class JobInfoRunnerSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "name", "priority", "created_at",
                             "updated_at", "created_by", "assigned_runner",
-                            "application_id", "executable", 
+                            "application_id", "application_version", "executable",
                             "command_line_args", "resources"]
         
 
-class JobResourceSerializer(serializers.ModelSerializer):
+class ConfigSchemaMixin:
+    """
+    Validates uploaded CONFIG files (JSON or YAML) against the input schema of the job's
+    application, so invalid jobs are rejected at submission instead of failing on a runner.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        upload = attrs.get("file")
+        resource_type = attrs.get("resource_type", getattr(self.instance, "resource_type", None))
+        if upload is None or resource_type != ResourceType.CONFIG:
+            return attrs
+        job = attrs.get("job", getattr(self.instance, "job", None))
+
+        encoding = attrs.get("encoding")
+        try:
+            source = open_decoded(upload, encoding, closefd=False) if encoding else upload
+            content = source.read(MAX_VALIDATED_SIZE + 1)
+        except Exception:
+            raise serializers.ValidationError({"encoding": f"Cannot decode the {encoding} file."})
+        finally:
+            upload.seek(0)
+        try:
+            errors = validate_config(job.application_id, content, upload.name)
+        except Exception as error:
+            # A broken or missing schema is the administrator's problem, not the user's
+            logger.warning(f"Cannot validate {upload.name} of job {job.id}: {error}")
+            return attrs
+        if errors:
+            raise serializers.ValidationError({"file": errors})
+        return attrs
+
+
+class JobResourceSerializer(ConfigSchemaMixin, EncodedUploadMixin, serializers.ModelSerializer):
     """For authenticated users - full CRUD access"""
     created_by = serializers.StringRelatedField(read_only=True)
     file = serializers.FileField(allow_empty_file=True)  # Allow empty files
@@ -90,13 +198,17 @@ class JobResourceSerializer(serializers.ModelSerializer):
             "created_by",
             "filename",
             "file_url",
+            "size",
+            "checksum",
+            "encoding",
+            "stored_size",
         ]
-        read_only_fields = ["id", "created_at", "created_by"]
+        read_only_fields = ["id", "created_at", "created_by", "size", "checksum", "stored_size"]
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_filename(self, obj) -> str:
         """Return just the filename without path"""
-        return obj.file.name.split('/')[-1] if obj.file else ""
+        return obj.filename
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_file_url(self, obj) -> str:
@@ -107,7 +219,7 @@ class JobResourceSerializer(serializers.ModelSerializer):
             return ""
 
 
-class JobResourceRunnerSerializer(serializers.ModelSerializer):
+class JobResourceRunnerSerializer(EncodedUploadMixin, serializers.ModelSerializer):
     """For runners - read/upload access to assigned jobs"""
     download_url = serializers.SerializerMethodField()
     file = serializers.FileField(allow_empty_file=True)  # Allow empty files
@@ -127,8 +239,13 @@ class JobResourceRunnerSerializer(serializers.ModelSerializer):
             "filename", 
             "file_url",
             "download_url",
+            "size",
+            "checksum",
+            "encoding",
+            "stored_size",
         ]
-        read_only_fields = ["id", "filename", "file_url", "download_url"]
+        read_only_fields = ["id", "filename", "file_url", "download_url", "size", "checksum",
+                            "stored_size"]
     
     @extend_schema_field(OpenApiTypes.STR)
     def get_download_url(self, obj) -> str:
@@ -141,7 +258,7 @@ class JobResourceRunnerSerializer(serializers.ModelSerializer):
     @extend_schema_field(OpenApiTypes.STR)
     def get_filename(self, obj) -> str:
         """Return just the filename without path"""
-        return obj.file.name.split('/')[-1] if obj.file else ""
+        return obj.filename
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_file_url(self, obj) -> str:
@@ -149,4 +266,128 @@ class JobResourceRunnerSerializer(serializers.ModelSerializer):
         try:
             return obj.file.url if obj.file else ""
         except (ValueError, AttributeError):
-            return ""
\ No newline at end of file
+            return ""
+
+
+class ManifestEntrySerializer(serializers.Serializer):
+    """One file of a client-side manifest"""
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+    checksum = serializers.CharField(max_length=64, required=False, allow_blank=True)
+
+
+class ManifestSyncSerializer(serializers.Serializer):
+    """Client manifest submitted to the sync endpoint"""
+    DIRECTION_DOWNLOAD = "download"
+    DIRECTION_UPLOAD = "upload"
+
+    direction = serializers.ChoiceField(
+        choices=[DIRECTION_DOWNLOAD, DIRECTION_UPLOAD], default=DIRECTION_DOWNLOAD
+    )
+    digest = serializers.CharField(max_length=64, required=False, allow_blank=True)
+    resources = ManifestEntrySerializer(many=True, required=False, default=list)
+
+
+class PresignedUploadSerializer(serializers.Serializer):
+    """Resource a runner is about to upload directly to the object store"""
+    job = serializers.PrimaryKeyRelatedField(queryset=JobInfo.objects.all())
+    resource_type = serializers.ChoiceField(choices=ResourceType.choices)
+    filename = serializers.CharField(max_length=255)
+    original_file_path = serializers.CharField(max_length=500, required=False, allow_blank=True)
+
+
+class PresignedUploadConfirmSerializer(serializers.Serializer):
+    """Registers a file uploaded to the object store as a resource"""
+    job = serializers.PrimaryKeyRelatedField(queryset=JobInfo.objects.all())
+    resource_type = serializers.ChoiceField(choices=ResourceType.choices)
+    name = serializers.CharField(max_length=500, help_text="Storage name from presign_upload")
+    description = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    original_file_path = serializers.CharField(max_length=500, required=False, allow_blank=True)
+    encoding = serializers.CharField(max_length=10, required=False, allow_blank=True)
+    size = serializers.IntegerField(required=False, min_value=0,
+                                    help_text="Size of the (decoded) file in bytes")
+    checksum = serializers.RegexField(r'^[0-9a-f]{64}$', required=False,
+                                      help_text="SHA-256 hex digest of the (decoded) file")
+
+    def validate(self, attrs):
+        encoding = attrs.get("encoding")
+        if encoding and encoding not in available_encodings():
+            raise serializers.ValidationError(
+                {"encoding": f"Must be one of {available_encodings()}."}
+            )
+        if encoding and "checksum" in attrs and "size" not in attrs:
+            raise serializers.ValidationError(
+                {"size": "Required with a checksum for encoded uploads."}
+            )
+        return attrs
+
+
+class UserUsageSerializer(serializers.ModelSerializer):
+    """Usage counters with the effective limits (null when unlimited)"""
+    max_bytes = serializers.SerializerMethodField()
+    max_files = serializers.SerializerMethodField()
+    max_core_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserUsage
+        fields = [
+            "bytes_stored",
+            "file_count",
+            "core_seconds",
+            "max_bytes",
+            "max_files",
+            "max_core_seconds",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_max_bytes(self, obj):
+        return obj.limit('max_bytes')
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_max_files(self, obj):
+        return obj.limit('max_files')
+
+    @extend_schema_field(OpenApiTypes.FLOAT)
+    def get_max_core_seconds(self, obj):
+        return obj.limit('max_core_seconds')
+
+
+class ResourceSliceSerializer(serializers.Serializer):
+    """Query parameters of the resource slice endpoint"""
+    MODE_BYTES = "bytes"
+    MODE_LINES = "lines"
+    MODE_TAIL = "tail"
+    MODE_CSV = "csv"
+
+    mode = serializers.ChoiceField(
+        choices=[MODE_BYTES, MODE_LINES, MODE_TAIL, MODE_CSV], default=MODE_LINES
+    )
+    offset = serializers.IntegerField(
+        default=0, help_text="First byte (bytes mode), negative values count from the end"
+    )
+    length = serializers.IntegerField(
+        required=False, min_value=1, help_text="Number of bytes (bytes mode)"
+    )
+    start = serializers.IntegerField(
+        default=0, min_value=0, help_text="First line, or first row after the header (0-based)"
+    )
+    count = serializers.IntegerField(
+        required=False, min_value=1, help_text="Number of lines or rows"
+    )
+    columns = serializers.CharField(
+        required=False, allow_blank=True,
+        help_text="Comma separated CSV column names or 0-based positions (csv mode)"
+    )
+
+    def validate(self, attrs):
+        if attrs["mode"] == self.MODE_BYTES:
+            limit, key = settings.RESOURCE_SLICE_MAX_BYTES, "length"
+        else:
+            limit, key = settings.RESOURCE_SLICE_MAX_LINES, "count"
+        attrs.setdefault(key, limit)
+        if attrs[key] > limit:
+            raise serializers.ValidationError({key: f"Must be at most {limit}."})
+        attrs["columns"] = [c.strip() for c in attrs.get("columns", "").split(",") if c.strip()]
+        return attrs
@@ -13,20 +13,18 @@
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from runner_manager import messaging
 from .models import JobInfo, JobStatus
 
 @receiver(post_save, sender=JobInfo)
 def notify_runner_on_new_job(sender, instance, created, **kwargs):
     """Notify runner when job is created or assigned"""
-    if instance.assigned_runner and instance.status == JobStatus.QUEUED:
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f"runner_{instance.assigned_runner.id}",
+    if instance.assigned_runner_id and instance.status == JobStatus.QUEUED:
+        messaging.send(
+            instance.assigned_runner_id,
+            "new_job",
             {
-                "type": "job_notification",
                 "job_id": str(instance.id),
                 "message": "New job assigned"
             }
-        )
\ No newline at end of file
+        )
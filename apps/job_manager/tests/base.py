@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from application_registry.models import AppInfo
+from job_manager.models import JobInfo, JobStatus
+from runner_manager.models import RunnerInfo, RunnerStatus
+
+RUNNER_TOKEN = 'secret_token'
+
+
+class MediaRootMixin:
+    """Runs each test with MEDIA_ROOT in a fresh temporary directory, and media_settings."""
+
+    media_settings = {}
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root, **self.media_settings)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class JobTestCase(MediaRootMixin, TestCase):
+    """
+    Test case with the user 'testuser' and the application "test_app" in a temporary MEDIA_ROOT.
+    Tests add the runner, jobs and clients they need with the helpers below.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.app = AppInfo.objects.create(name="test_app", file_path="/dev/null")
+
+    def create_runner(self, state=RunnerStatus.BUSY, token=RUNNER_TOKEN):
+        return RunnerInfo.objects.create(owner=self.user, token=token, state=state)
+
+    def create_job(self, status=JobStatus.RUNNING, runner=None):
+        return JobInfo.objects.create(created_by=self.user, application_id=self.app,
+                                      assigned_runner=runner, status=status)
+
+    def runner_api_client(self, token=RUNNER_TOKEN):
+        """Client authenticated with a runner token"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        return client
+
+    def user_api_client(self, user=None):
+        """Client authenticated as a user, the test user by default"""
+        client = APIClient()
+        client.force_authenticate(user or self.user)
+        return client
+
+
+def create_user(username='testuser', password='testpass123'):
+    return get_user_model().objects.create_user(username=username, password=password)
@@ -0,0 +1,74 @@
+import io
+import os
+import tarfile
+import zipfile
+
+from django.core.files.base import ContentFile
+
+from common.archives import ArchiveMember, stream_tar, stream_zip
+from job_manager.models import JobResource, JobStatus, ResourceType
+from job_manager.tests.base import JobTestCase
+
+
+class JobArchiveTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a job with a few resources of different types"""
+        super().setUp()
+        self.client = self.user_api_client()
+        self.job = self.create_job(JobStatus.SUCCEEDED)
+        self.files = {
+            "input.yaml": (ResourceType.INPUT, b"sleep_time: 1\n"),
+            "result.csv": (ResourceType.OUTPUT, b"x,y\n" * 1000),
+            "run.log": (ResourceType.LOG, b"done\n"),
+        }
+        for filename, (resource_type, content) in self.files.items():
+            resource = JobResource(job=self.job, resource_type=resource_type)
+            resource.file.save(filename, ContentFile(content), save=False)
+            resource.save()
+
+        self.url = f"/job_manager/users/{self.job.id}/archive/"
+
+    def test_zip_archive(self):
+        """Test all resources are streamed as a zip archive"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertTrue(response.streaming)
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(set(archive.namelist()), set(self.files))
+        for filename, (_, content) in self.files.items():
+            self.assertEqual(archive.read(filename), content)
+
+    def test_tar_archive_filtered_by_type(self):
+        """Test the tar format and the resource type filter"""
+        response = self.client.get(self.url, {
+            'archive_format': 'tar', 'resource_type': ResourceType.OUTPUT
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-tar')
+
+        archive = tarfile.open(fileobj=io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(archive.getnames(), ["result.csv"])
+        self.assertEqual(archive.extractfile("result.csv").read(), self.files["result.csv"][1])
+
+    def test_invalid_parameters(self):
+        """Test unknown formats and resource types are rejected"""
+        self.assertEqual(self.client.get(self.url, {'archive_format': 'rar'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'resource_type': 'XYZ'}).status_code, 400)
+
+    def test_streaming_is_chunked(self):
+        """Test members are emitted in chunks instead of being buffered whole"""
+        content = os.urandom(1024 * 1024)  # incompressible, so deflate emits as it goes
+        member = ArchiveMember(
+            name="big.bin", size=len(content), mtime=self.job.created_at,
+            open=lambda: io.BytesIO(content),
+        )
+
+        for stream in (stream_tar, stream_zip):
+            chunks = list(stream([member], chunk_size=16 * 1024))
+            self.assertGreater(len(chunks), 16)
+            self.assertLess(max(len(chunk) for chunk in chunks), 64 * 1024)
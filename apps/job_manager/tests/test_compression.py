@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import unittest
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from common import compression
+from job_manager.models import JobResource, ResourceType
+from job_manager.tests.base import JobTestCase
+
+CSV = b"".join(f"{i},{i * 0.5},{i % 7}\n".encode() for i in range(5000))
+
+
+class ResourceCompressionTests(JobTestCase):
+
+    media_settings = {"RESOURCE_STORAGE_COMPRESSION": compression.GZIP}
+
+    def setUp(self):
+        """Set up a runner with a running job"""
+        super().setUp()
+        self.runner = self.create_runner()
+        self.job = self.create_job(runner=self.runner)
+        self.client = self.runner_api_client()
+
+    def create_resource(self, filename, content):
+        # Assigned rather than file.save(), so it is pending like an upload through the API
+        resource = JobResource(job=self.job, resource_type=ResourceType.OUTPUT,
+                               file=ContentFile(content, name=filename))
+        resource.save()
+        return resource
+
+    def download_url(self, resource):
+        return f"/job_manager/resources/runner/{resource.id}/download/"
+
+    def test_compressed_at_rest(self):
+        """Test text outputs are stored gzip compressed with metadata of the raw content"""
+        resource = self.create_resource("result.csv", CSV)
+
+        self.assertEqual(resource.encoding, compression.GZIP)
+        self.assertEqual(resource.size, len(CSV))
+        self.assertLess(resource.stored_size, len(CSV) / 2)
+        self.assertEqual(resource.checksum, hashlib.sha256(CSV).hexdigest())
+        with open(resource.file.path, 'rb') as stored:
+            self.assertEqual(gzip.decompress(stored.read()), CSV)
+
+    def test_small_and_binary_files_stored_raw(self):
+        """Test files below the size threshold or of unknown type are not compressed"""
+        self.assertEqual(self.create_resource("small.csv", b"1,2\n").encoding, "")
+        self.assertEqual(self.create_resource("field.bin", CSV).encoding, "")
+
+    def test_download_decompressed(self):
+        """Test clients not accepting gzip receive the raw content"""
+        resource = self.create_resource("result.csv", CSV)
+
+        response = self.client.get(self.download_url(resource))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(int(response['Content-Length']), len(CSV))
+        self.assertEqual(b"".join(response.streaming_content), CSV)
+
+    def test_download_passthrough(self):
+        """Test clients accepting gzip receive the stored bytes as they are"""
+        resource = self.create_resource("result.csv", CSV)
+
+        response = self.client.get(self.download_url(resource),
+                                   HTTP_ACCEPT_ENCODING='zstd;q=0, gzip')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        body = b"".join(response.streaming_content)
+        self.assertEqual(len(body), resource.stored_size)
+        self.assertEqual(gzip.decompress(body), CSV)
+
+    def test_upload_precompressed(self):
+        """Test runners can upload files already compressed"""
+        upload = SimpleUploadedFile("log.txt", gzip.compress(CSV))
+
+        response = self.client.post('/job_manager/resources/runner/', {
+            'job': str(self.job.id), 'resource_type': ResourceType.LOG,
+            'file': upload, 'encoding': 'gzip'
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        resource = JobResource.objects.get(id=response.json()['id'])
+        self.assertEqual(resource.encoding, compression.GZIP)
+        self.assertEqual(resource.size, len(CSV))
+        self.assertEqual(resource.checksum, hashlib.sha256(CSV).hexdigest())
+
+    def test_upload_wrong_encoding_rejected(self):
+        """Test an upload claiming an encoding it does not have is rejected"""
+        upload = SimpleUploadedFile("log.txt", CSV)
+
+        response = self.client.post('/job_manager/resources/runner/', {
+            'job': str(self.job.id), 'file': upload, 'encoding': 'gzip'
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_upload_truncated_rejected(self):
+        """Test a compressed upload cut short, though with the right magic bytes, is rejected"""
+        encoded = {'gzip': gzip.compress(CSV)}
+        if compression.zstandard:
+            encoded['zstd'] = compression.zstandard.ZstdCompressor().compress(CSV)
+
+        for encoding, content in encoded.items():
+            with self.subTest(encoding=encoding):
+                upload = SimpleUploadedFile("log.txt", content[:len(content) // 2])
+                response = self.client.post('/job_manager/resources/runner/', {
+                    'job': str(self.job.id), 'file': upload, 'encoding': encoding
+                }, format='multipart')
+
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn('encoding', response.json())
+        self.assertFalse(JobResource.objects.exists())
+
+    @unittest.skipUnless(compression.zstandard, "zstandard is not installed")
+    def test_zstd_round_trip(self):
+        """Test zstd storage decodes back to the raw content"""
+        with override_settings(RESOURCE_STORAGE_COMPRESSION=compression.ZSTD):
+            resource = self.create_resource("mesh.vtk", CSV)
+
+        self.assertEqual(resource.encoding, compression.ZSTD)
+        with resource.open_content() as content:
+            self.assertEqual(content.read(), CSV)
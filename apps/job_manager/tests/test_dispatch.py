@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from application_registry.models import AppInfo, AppVersion, RunnerAppCache
+from job_manager.dispatch import rank_runners
+from job_manager.models import JobInfo, JobStatus
+from runner_manager.models import RunnerInfo, RunnerStatus
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class DispatchTests(TestCase):
+
+    def setUp(self):
+        """Set up an application version and runners in different states"""
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.app = AppInfo.objects.create(name="test_app", file_path="/dev/null")
+        self.version = AppVersion.objects.create(
+            application=self.app, sha256="a" * 64, file="sha256/aa/" + "a" * 64, size=1
+        )
+        self.app.current_version = self.version
+        self.app.save()
+
+        def runner(name, state):
+            return RunnerInfo.objects.create(owner=self.user, name=name, state=state,
+                                             last_contact=timezone.now())
+        self.idle = runner("idle", RunnerStatus.IDLE)
+        self.busy = runner("busy", RunnerStatus.BUSY)
+        self.offline = runner("offline", RunnerStatus.OFFLINE)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self):
+        with override_settings(JOB_AUTO_DISPATCH=True):
+            response = self.client.post('/job_manager/users/', {
+                'name': 'job', 'application_id': str(self.app.id),
+            })
+        self.assertEqual(response.status_code, 201)
+        return JobInfo.objects.get(pk=response.data['id'])
+
+    def test_prefers_idle_runner(self):
+        """Test without warm runners idle ones are preferred and offline ones never chosen"""
+        job = self.submit()
+
+        self.assertEqual(job.assigned_runner, self.idle)
+        self.assertEqual(job.application_version, self.version)
+
+    def test_prefers_warm_runner(self):
+        """Test a runner holding the application version wins over an idle one"""
+        RunnerAppCache.objects.create(runner=self.busy, version=self.version)
+
+        self.assertEqual(self.submit().assigned_runner, self.busy)
+
+    def test_ranking_counts_unfinished_jobs(self):
+        """Test among equal runners the one with fewer unfinished jobs ranks first"""
+        self.busy.state = RunnerStatus.IDLE
+        self.busy.save()
+        JobInfo.objects.create(created_by=self.user, application_id=self.app,
+                               assigned_runner=self.idle, status=JobStatus.RUNNING)
+        JobInfo.objects.create(created_by=self.user, application_id=self.app,
+                               assigned_runner=self.busy, status=JobStatus.SUCCEEDED)
+        job = JobInfo.objects.create(created_by=self.user, application_id=self.app)
+
+        with self.assertNumQueries(1):
+            ranked = list(rank_runners(job))
+
+        self.assertEqual(ranked, [self.busy, self.idle])
+        self.assertEqual([runner.active_jobs for runner in ranked], [0, 1])
+
+    def test_routing_by_pool_and_labels(self):
+        """Test only runners of the job's pool meeting its selector are candidates"""
+        RunnerInfo.objects.filter(pk=self.busy.pk).update(pool='gpu', labels={'gpu': 'a100'})
+        RunnerInfo.objects.filter(pk=self.idle.pk).update(labels={'gpu': 't4'})
+        job = JobInfo.objects.create(created_by=self.user, application_id=self.app,
+                                     runner_selector='gpu in (a100, h100)')
+        with self.assertNumQueries(1):
+            self.assertEqual(list(rank_runners(job)), [self.busy])
+
+        job.runner_pool = 'cpu'
+        self.assertEqual(list(rank_runners(job)), [])
+
+        with override_settings(JOB_AUTO_DISPATCH=True):
+            response = self.client.post('/job_manager/users/', {
+                'name': 'job', 'application_id': str(self.app.id), 'runner_pool': 'gpu',
+            })
+        self.assertEqual(JobInfo.objects.get(pk=response.data['id']).assigned_runner, self.busy)
+
+    def test_invalid_routing_is_rejected(self):
+        """Test malformed selectors and runners not meeting the selector are rejected"""
+        response = self.client.post('/job_manager/users/', {
+            'name': 'job', 'application_id': str(self.app.id), 'runner_selector': 'gpu in a100',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('runner_selector', response.data)
+
+        response = self.client.post('/job_manager/users/', {
+            'name': 'job', 'application_id': str(self.app.id), 'runner_selector': 'gpu',
+            'assigned_runner': str(self.idle.id),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assigned_runner', response.data)
@@ -0,0 +1,61 @@
+import unicodedata
+
+from django.core.files.base import ContentFile
+
+from job_manager.models import JobResource, ResourceType
+from job_manager.tests.base import JobTestCase
+
+
+class ResourceFilenameTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a runner with a running job holding similarly named files"""
+        super().setUp()
+        self.runner = self.create_runner()
+        self.job = self.create_job(runner=self.runner)
+        for filename in ["out.csv", "about.csv", "out_0001.vtk", "out_0002.vtk"]:
+            self.create_resource(filename)
+        self.client = self.runner_api_client()
+
+    def create_resource(self, filename):
+        return JobResource.objects.create(job=self.job, resource_type=ResourceType.OUTPUT,
+                                          file=ContentFile(b"data", name=filename))
+
+    def test_filename_is_stored_name(self):
+        """Test the column holds the final, NFC normalized basename"""
+        decomposed = unicodedata.normalize('NFD', "résumé.txt")
+        resource = self.create_resource(decomposed)
+
+        self.assertEqual(resource.filename, unicodedata.normalize('NFC', "résumé.txt"))
+        self.assertEqual(self.job.get_resource_by_filename(decomposed), resource)
+
+        # Generic upload names are replaced by upload_to, the column follows
+        generated = self.create_resource("file")
+        self.assertNotEqual(generated.filename, "file")
+        self.assertEqual(generated.filename, generated.file.name.split('/')[-1])
+
+    def test_exact_and_prefix_lookups(self):
+        """Test lookups match whole names only, or a prefix"""
+        self.assertEqual(self.job.get_resource_by_filename("out.csv").filename, "out.csv")
+        self.assertIsNone(self.job.get_resource_by_filename("ut.csv"))
+        self.assertEqual(
+            sorted(self.job.get_resources_by_filename_prefix("out_").values_list('filename',
+                                                                                 flat=True)),
+            ["out_0001.vtk", "out_0002.vtk"]
+        )
+
+    def test_runner_filters(self):
+        """Test the runner list filters by exact filename and by prefix"""
+        url = '/job_manager/resources/runner/'
+
+        response = self.client.get(url, {'filename': 'out.csv'})
+        self.assertEqual([r['filename'] for r in response.json()], ["out.csv"])
+
+        response = self.client.get(url, {'filename_prefix': 'out'})
+        self.assertEqual(len(response.json()), 3)
+
+    def test_lookups_use_index(self):
+        """Test exact lookups are index searches, not table scans"""
+        for queryset in [self.job.resources.filter(filename="out.csv").order_by(),
+                         JobResource.objects.filter(filename="out.csv")]:
+            self.assertIn("filename_idx", queryset.explain())
@@ -0,0 +1,103 @@
+import os
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from job_manager.models import FileGarbage, JobResource, JobStatus, ResourceType
+from job_manager.tests.base import JobTestCase
+
+
+class FileGarbageTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a job in a temporary media root"""
+        super().setUp()
+        self.job = self.create_job()
+
+    def create_job(self, status=JobStatus.SUCCEEDED, runner=None):
+        return super().create_job(status, runner)
+
+    def create_resources(self, job, count):
+        for i in range(count):
+            JobResource.objects.create(job=job, resource_type=ResourceType.OUTPUT,
+                                       file=ContentFile(b"data", name=f"out_{i}.bin"))
+
+    def job_directory(self, job):
+        return os.path.join(self.media_root, job.local_working_directory)
+
+    def collect(self):
+        call_command('collect_file_garbage', batch_size=3, stdout=StringIO())
+
+    def test_job_delete_is_constant_time(self):
+        """Test deleting a job takes the same queries however many resources it has"""
+        small = self.create_job()
+        self.create_resources(small, 2)
+        self.create_resources(self.job, 20)
+
+        with self.assertNumQueries(6) as small_delete:
+            small.delete()
+        with self.assertNumQueries(len(small_delete.captured_queries)):
+            self.job.delete()
+
+        # Files are only queued, the collector removes them
+        self.assertEqual(len(os.listdir(self.job_directory(self.job))), 20)
+        self.assertEqual(FileGarbage.objects.filter(is_directory=True).count(), 2)
+
+        self.collect()
+
+        self.assertFalse(os.path.exists(self.job_directory(self.job)))
+        self.assertFalse(os.path.exists(self.job_directory(small)))
+        self.assertFalse(FileGarbage.objects.exists())
+
+    def test_resource_delete_queues_file(self):
+        """Test single and bulk resource deletes queue their files"""
+        self.create_resources(self.job, 3)
+
+        self.job.resources.first().delete()
+        self.job.resources.all().delete()
+
+        self.assertEqual(FileGarbage.objects.filter(is_directory=False).count(), 3)
+        self.assertEqual(len(os.listdir(self.job_directory(self.job))), 3)
+        self.collect()
+        self.assertFalse(os.path.exists(self.job_directory(self.job)))
+
+    def test_reused_name_is_kept(self):
+        """Test a file uploaded again under a queued name is not collected"""
+        self.create_resources(self.job, 1)
+        self.job.resources.get().delete()
+        self.create_resources(self.job, 1)
+
+        self.collect()
+
+        self.assertTrue(os.path.exists(os.path.join(self.job_directory(self.job), "out_0.bin")))
+        self.assertFalse(FileGarbage.objects.exists())
+
+    def test_name_written_after_delete_is_kept(self):
+        """Test a file written again before its new row is committed is not collected"""
+        self.create_resources(self.job, 1)
+        self.job.resources.get().delete()
+        FileGarbage.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        # An upload in progress: the file is stored, its row not committed yet
+        path = os.path.join(self.job_directory(self.job), "out_0.bin")
+        with open(path, "wb") as new_file:
+            new_file.write(b"new data")
+
+        self.collect()
+
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(FileGarbage.objects.exists())
+
+    def test_failures_are_retried_and_recorded(self):
+        """Test entries that cannot be removed are kept with their error"""
+        self.create_resources(self.job, 1)
+        # Queued as a file, removing the non-empty directory fails
+        FileGarbage.enqueue([self.job.local_working_directory])
+
+        self.collect()
+
+        entry = FileGarbage.objects.get()
+        self.assertEqual(entry.attempts, 1)
+        self.assertIn("Directory not empty", entry.last_error)
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from job_manager.models import JobInfo, JobResource, ResourceType
+from job_manager.tests.base import JobTestCase
+
+
+class IdempotencyKeyTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a user, a runner and a running job"""
+        super().setUp()
+        cache.clear()
+        self.runner = self.create_runner()
+        self.job = self.create_job(runner=self.runner)
+        self.user_client = self.user_api_client()
+        self.runner_client = self.runner_api_client()
+
+    def submit_job(self, key, name='job'):
+        return self.user_client.post('/job_manager/users/', {
+            'name': name, 'application_id': str(self.app.id),
+        }, HTTP_IDEMPOTENCY_KEY=key)
+
+    def upload(self, key, content=b"result"):
+        return self.runner_client.post('/job_manager/resources/runner/', {
+            'job': str(self.job.id),
+            'resource_type': ResourceType.OUTPUT,
+            'file': SimpleUploadedFile("out.csv", content),
+        }, format='multipart', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_job_creation_replayed(self):
+        """Test a retried job submission returns the first response without a second job"""
+        first = self.submit_job('key-1')
+        retry = self.submit_job('key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(JobInfo.objects.count(), 2)
+
+        self.assertEqual(self.submit_job('key-2').status_code, 201)
+        self.assertEqual(JobInfo.objects.count(), 3)
+
+    def test_upload_replayed(self):
+        """Test a retried upload does not store the file again"""
+        first = self.upload('upload-1')
+        retry = self.upload('upload-1')
+
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(JobResource.objects.count(), 1)
+
+    def test_key_reused_for_different_request(self):
+        """Test a key sent with a different payload is refused"""
+        self.upload('upload-1')
+
+        self.assertEqual(self.upload('upload-1', content=b"other").status_code, 422)
+        self.assertEqual(self.submit_job('key-1').status_code, 201)
+
+    def test_request_in_progress(self):
+        """Test a retry arriving while the first attempt still runs is refused"""
+        # The lock of the key is held by the first attempt
+        with mock.patch.object(cache, 'add', return_value=False):
+            self.assertEqual(self.submit_job('key-1').status_code, 409)
+        self.assertEqual(JobInfo.objects.count(), 1)
@@ -0,0 +1,84 @@
+import hashlib
+
+from django.core.files.base import ContentFile
+
+from job_manager.manifest import manifest_digest
+from job_manager.models import JobResource, JobStatus, ResourceType
+from job_manager.tests.base import JobTestCase
+
+
+class JobManifestTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a job with a few output files"""
+        super().setUp()
+        self.client = self.user_api_client()
+        self.job = self.create_job(JobStatus.SUCCEEDED)
+        self.contents = {f"out_{i}.csv": f"{i},{i * i}\n".encode() for i in range(5)}
+        for filename, content in self.contents.items():
+            resource = JobResource(job=self.job, resource_type=ResourceType.OUTPUT)
+            resource.file.save(filename, ContentFile(content), save=False)
+            resource.save()
+
+        self.manifest_url = f"/job_manager/users/{self.job.id}/manifest/"
+        self.sync_url = f"/job_manager/users/{self.job.id}/sync/"
+
+    def client_manifest(self):
+        return [
+            {'filename': name, 'size': len(content),
+             'checksum': hashlib.sha256(content).hexdigest()}
+            for name, content in self.contents.items()
+        ]
+
+    def test_metadata_computed_on_upload(self):
+        """Test size and checksum are stored when the file is uploaded"""
+        resource = self.job.resources.get(file__endswith="out_3.csv")
+        self.assertEqual(resource.size, len(self.contents["out_3.csv"]))
+        self.assertEqual(resource.checksum,
+                         hashlib.sha256(self.contents["out_3.csv"]).hexdigest())
+
+    def test_manifest(self):
+        """Test the manifest lists every resource from a constant number of queries"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.manifest_url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual({e['filename'] for e in data['resources']}, set(self.contents))
+        entry = next(e for e in data['resources'] if e['filename'] == "out_0.csv")
+        self.assertEqual(entry['size'], len(self.contents["out_0.csv"]))
+        self.assertEqual(entry['resource_type'], ResourceType.OUTPUT)
+        self.assertIn('mtime', entry)
+        self.assertEqual(data['digest'], manifest_digest(self.client_manifest()))
+
+    def test_sync_download(self):
+        """Test only missing and changed files are returned for download"""
+        manifest = self.client_manifest()
+        del manifest[0]  # missing on the client
+        manifest[0]['checksum'] = "0" * 64  # changed on the client
+
+        response = self.client.post(self.sync_url, {'resources': manifest}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        fetch = {entry['filename'] for entry in response.json()['fetch']}
+        self.assertEqual(fetch, {"out_0.csv", "out_1.csv"})
+
+    def test_sync_upload(self):
+        """Test only files the server lacks are requested for upload"""
+        manifest = self.client_manifest() + [{'filename': "new.csv", 'size': 3}]
+
+        response = self.client.post(
+            self.sync_url, {'direction': 'upload', 'resources': manifest}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['upload'], ["new.csv"])
+
+    def test_sync_digest_short_circuit(self):
+        """Test a matching digest needs no manifest at all"""
+        digest = manifest_digest(self.client_manifest())
+
+        response = self.client.post(self.sync_url, {'digest': digest}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'digest': digest, 'fetch': []})
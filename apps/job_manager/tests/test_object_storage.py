@@ -0,0 +1,127 @@
+import hashlib
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+
+from common.storage import job_resource_storage
+from job_manager.models import JobResource, ResourceType
+from job_manager.tests.base import JobTestCase
+
+try:
+    import boto3
+    import requests
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+BUCKET = "fyn-test"
+
+S3_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "job_resources": {
+        "BACKEND": "common.storage.PreserveFilenameS3Storage",
+        "OPTIONS": {
+            "bucket_name": BUCKET,
+            "region_name": "us-east-1",
+            "access_key": "testing",
+            "secret_key": "testing",
+            "location": "jobs",
+            "file_overwrite": True,
+            "signature_version": "s3v4",
+        },
+    },
+}
+
+
+class RunnerResourceMixin:
+
+    def setUp(self):
+        """Set up a runner with a running job"""
+        super().setUp()
+        self.runner = self.create_runner()
+        self.job = self.create_job(runner=self.runner)
+        self.client = self.runner_api_client()
+
+
+@unittest.skipIf(mock_aws is None, "moto, boto3 and django-storages are required")
+@override_settings(STORAGES=S3_STORAGES)
+class ObjectStorageTests(RunnerResourceMixin, JobTestCase):
+
+    def setUp(self):
+        """Start an in-process S3 stand-in with an empty bucket"""
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        super().setUp()
+
+    def presign(self, filename):
+        response = self.client.post('/job_manager/resources/runner/presign_upload/', {
+            'job': str(self.job.id), 'resource_type': ResourceType.OUTPUT, 'filename': filename,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_presigned_upload_and_confirm(self):
+        """Test a runner uploads straight to the store and registers the file afterwards"""
+        content = b"t,p\n0,1\n"
+        upload = self.presign("result.csv")
+        self.assertEqual(upload['name'], f"user_{self.user.id}/job_{self.job.id}/result.csv")
+
+        stored = requests.post(upload['url'], data=upload['fields'],
+                               files={'file': ("result.csv", content)})
+        self.assertLess(stored.status_code, 300)
+
+        response = self.client.post('/job_manager/resources/runner/confirm_upload/', {
+            'job': str(self.job.id), 'resource_type': ResourceType.OUTPUT,
+            'name': upload['name'], 'size': len(content),
+        })
+
+        self.assertEqual(response.status_code, 201)
+        resource = JobResource.objects.get(id=response.json()['id'])
+        self.assertEqual(resource.filename, "result.csv")
+        self.assertEqual(resource.size, len(content))
+        self.assertEqual(resource.checksum, hashlib.sha256(content).hexdigest())
+
+    def test_confirm_rejects_foreign_or_missing_names(self):
+        """Test only existing uploads inside the job's directory can be registered"""
+        url = '/job_manager/resources/runner/confirm_upload/'
+        for name in [f"user_{self.user.id}/job_{self.job.id}/missing.csv", "user_1/job_2/x.csv"]:
+            response = self.client.post(url, {
+                'job': str(self.job.id), 'resource_type': ResourceType.OUTPUT, 'name': name,
+            })
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('name', response.json())
+
+    def test_download_redirects_to_presigned_url(self):
+        """Test downloads are answered with a short-lived URL of the store"""
+        resource = JobResource.objects.create(
+            job=self.job, resource_type=ResourceType.OUTPUT,
+            file=ContentFile(b"data", name="field.bin")
+        )
+
+        with override_settings(PRESIGNED_URL_EXPIRY=60):
+            response = self.client.get(f"/job_manager/resources/runner/{resource.id}/download/")
+
+        self.assertEqual(response.status_code, 302)
+        query = parse_qs(urlparse(response['Location']).query)
+        self.assertEqual(query['X-Amz-Expires'], ['60'])
+        self.assertIn('field.bin', query['response-content-disposition'][0])
+        self.assertEqual(requests.get(response['Location']).content, b"data")
+
+
+class LocalStorageTests(RunnerResourceMixin, JobTestCase):
+
+    def test_presign_not_available(self):
+        """Test direct uploads are refused when files are kept on the API servers"""
+        response = self.client.post('/job_manager/resources/runner/presign_upload/', {
+            'job': str(self.job.id), 'resource_type': ResourceType.OUTPUT, 'filename': "a.csv",
+        })
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_storage_follows_media_root(self):
+        """Test the resource storage is resolved from the current settings"""
+        self.assertEqual(job_resource_storage.location, self.media_root)
@@ -0,0 +1,130 @@
+import os
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from job_manager.models import JobInfo, JobResource, JobStatus, ResourceType, UserUsage
+from job_manager.quota import check_storage
+from job_manager.tests.base import JobTestCase
+from runner_manager.models import SystemInfo
+
+
+@override_settings(RESOURCE_STORAGE_COMPRESSION="")
+class UsageQuotaTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a runner with a running job"""
+        super().setUp()
+        self.runner = self.create_runner()
+        SystemInfo.objects.create(runner=self.runner, cpu_logical_cores=4)
+        self.job = self.create_job(runner=self.runner)
+        self.runner_client = self.runner_api_client()
+        self.user_client = self.user_api_client()
+
+    def usage(self):
+        return UserUsage.for_user(self.user.id)
+
+    def create_resource(self, filename, content):
+        return JobResource.objects.create(job=self.job, resource_type=ResourceType.OUTPUT,
+                                          file=ContentFile(content, name=filename))
+
+    def upload(self, filename, content):
+        return self.runner_client.post('/job_manager/resources/runner/', {
+            'job': str(self.job.id),
+            'resource_type': ResourceType.OUTPUT,
+            'file': SimpleUploadedFile(filename, content),
+        }, format='multipart')
+
+    # -------------------------------------------------------------------------
+    # Accounting
+    # -------------------------------------------------------------------------
+
+    def test_storage_counters_follow_uploads_and_deletes(self):
+        """Test uploads, replacements and every kind of delete update the counters"""
+        first = self.create_resource("a.bin", b"x" * 100)
+        self.create_resource("b.bin", b"x" * 50)
+        self.assertEqual((self.usage().bytes_stored, self.usage().file_count), (150, 2))
+
+        first = JobResource.objects.get(id=first.id)
+        first.file = ContentFile(b"x" * 10, name="a.bin")
+        first.save()
+        self.assertEqual((self.usage().bytes_stored, self.usage().file_count), (60, 2))
+
+        first.delete()
+        self.assertEqual((self.usage().bytes_stored, self.usage().file_count), (50, 1))
+
+        self.job.resources.all().delete()
+        self.assertEqual((self.usage().bytes_stored, self.usage().file_count), (0, 0))
+
+        self.create_resource("c.bin", b"x" * 20)
+        self.job.delete()
+        self.assertEqual((self.usage().bytes_stored, self.usage().file_count), (0, 0))
+
+    def test_core_seconds_on_completion(self):
+        """Test finishing a job charges its wall time times the runner's cores"""
+        self.assertIsNotNone(self.job.started_at)
+        JobInfo.objects.filter(id=self.job.id).update(
+            started_at=self.job.started_at - timedelta(seconds=100)
+        )
+
+        response = self.runner_client.patch(f'/job_manager/runner/{self.job.id}/',
+                                            {'status': JobStatus.SUCCEEDED})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(self.usage().core_seconds, 400, delta=4)
+
+        # Only charged once
+        self.job.refresh_from_db()
+        self.job.save()
+        self.assertAlmostEqual(self.usage().core_seconds, 400, delta=4)
+
+    # -------------------------------------------------------------------------
+    # Enforcement
+    # -------------------------------------------------------------------------
+
+    def test_upload_over_quota_rejected(self):
+        """Test an upload that does not fit is refused before anything is stored"""
+        UserUsage.objects.update_or_create(user=self.user, defaults={'max_bytes': 100})
+        self.assertEqual(self.upload("fits.bin", b"x" * 60).status_code, 201)
+
+        response = self.upload("too_big.bin", b"x" * 60)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("Storage quota exceeded", response.json()['detail'])
+        self.assertFalse(os.path.exists(
+            os.path.join(self.media_root, self.job.local_working_directory, "too_big.bin")
+        ))
+        self.assertEqual(self.usage().bytes_stored, 60)
+
+    def test_job_submission_over_compute_quota_rejected(self):
+        """Test users out of core-seconds cannot submit new jobs"""
+        with override_settings(QUOTA_DEFAULT_MAX_CORE_SECONDS=10):
+            UserUsage.objects.update_or_create(user=self.user, defaults={'core_seconds': 10})
+            response = self.user_client.post('/job_manager/users/', {
+                'name': 'job', 'application_id': str(self.app.id),
+            })
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(JobInfo.objects.count(), 1)
+
+    def test_check_is_constant_time(self):
+        """Test a quota check reads a single row however many resources exist"""
+        for i in range(10):
+            self.create_resource(f"{i}.bin", b"x")
+
+        with self.assertNumQueries(1):
+            check_storage(self.user.id, 10, 1)
+
+    def test_usage_endpoint(self):
+        """Test users can see their usage and effective limits"""
+        self.create_resource("a.bin", b"x" * 100)
+
+        with override_settings(QUOTA_DEFAULT_MAX_FILES=5):
+            response = self.user_client.get('/job_manager/users/usage/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['bytes_stored'], 100)
+        self.assertEqual(response.json()['max_files'], 5)
+        self.assertIsNone(response.json()['max_bytes'])
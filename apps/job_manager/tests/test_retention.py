@@ -0,0 +1,132 @@
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from job_manager.models import FileGarbage, JobResource, JobStatus, ResourceType, RetentionCursor
+from job_manager.retention import compact
+from job_manager.tests.base import JobTestCase
+from runner_manager.models import RunnerStatus
+
+LOG = b"".join(f"[INFO] iteration {i} residual {1.0 / (i + 1):.6e}\n".encode() for i in range(2000))
+
+POLICIES = {
+    "TMP": {"action": "delete", "after_days": 0},
+    "LOG": {"action": "compress", "after_days": 7},
+    "OUT": {"action": "pack", "after_days": 30},
+}
+
+
+@override_settings(RESOURCE_RETENTION_POLICIES=POLICIES, RESOURCE_STORAGE_COMPRESSION="")
+class RetentionTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a finished job with one resource of every policy"""
+        super().setUp()
+        self.runner = self.create_runner(RunnerStatus.IDLE)
+        self.job = self.create_job(JobStatus.SUCCEEDED)
+        self.client = self.runner_api_client()
+
+    def create_job(self, status, runner=None):
+        job = super().create_job(status, runner or self.runner)
+        for resource_type, filename, content in [
+                (ResourceType.TEMP, "scratch.tmp", b"scratch"),
+                (ResourceType.LOG, "solver.log", LOG),
+                (ResourceType.OUTPUT, "field.csv", b"x,y\n1,2\n"),
+                (ResourceType.OUTPUT, "mesh.bin", b"\x00\x01" * 100)]:
+            JobResource.objects.create(job=job, resource_type=resource_type,
+                                       file=ContentFile(content, name=filename))
+        return job
+
+    def download(self, job, filename):
+        resource = job.resources.get(file__endswith=filename)
+        response = self.client.get(f"/job_manager/resources/runner/{resource.id}/download/")
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_policies_applied_by_age(self):
+        """Test each policy only applies once the job has been idle long enough"""
+        compact(now=timezone.now() + timedelta(days=1))
+
+        self.assertFalse(self.job.resources.filter(resource_type=ResourceType.TEMP).exists())
+        self.assertEqual(self.job.resources.get(resource_type=ResourceType.LOG).encoding, "")
+
+        compact(now=timezone.now() + timedelta(days=8))
+
+        log = self.job.resources.get(resource_type=ResourceType.LOG)
+        self.assertEqual(log.encoding, "gzip")
+        self.assertLess(log.stored_size, log.size / 2)
+        self.assertFalse(self.job.resources.exclude(archive_name="").exists())
+
+        compact(now=timezone.now() + timedelta(days=31))
+
+        outputs = self.job.resources.filter(resource_type=ResourceType.OUTPUT)
+        self.assertEqual(len({resource.archive_name for resource in outputs}), 1)
+        self.assertTrue(outputs[0].archive_name.endswith(".zip"))
+
+    def test_compacted_resources_stay_downloadable(self):
+        """Test compressed and packed files are served unchanged once the originals are gone"""
+        compact(now=timezone.now() + timedelta(days=31))
+        self.assertEqual(FileGarbage.objects.count(), 3)
+        call_command('collect_file_garbage', stdout=StringIO())
+
+        self.assertEqual(self.download(self.job, "solver.log"), LOG)
+        self.assertEqual(self.download(self.job, "field.csv"), b"x,y\n1,2\n")
+        self.assertEqual(self.download(self.job, "mesh.bin"), b"\x00\x01" * 100)
+
+        response = self.client.get(f"/job_manager/runner/{self.job.id}/archive/?archive_format=tar")
+        self.assertEqual(response.status_code, 200)
+
+    def test_archive_collected_with_its_last_member(self):
+        """Test a packed archive is kept while members are left and collected after the last"""
+        compact(now=timezone.now() + timedelta(days=31))
+        outputs = self.job.resources.filter(resource_type=ResourceType.OUTPUT)
+        archive = os.path.join(self.media_root, outputs[0].archive_name)
+
+        outputs.get(file__endswith="field.csv").delete()
+        call_command('collect_file_garbage', stdout=StringIO())
+        self.assertTrue(os.path.exists(archive))
+        self.assertEqual(self.download(self.job, "mesh.bin"), b"\x00\x01" * 100)
+
+        outputs.all().delete()
+        call_command('collect_file_garbage', stdout=StringIO())
+        self.assertFalse(os.path.exists(archive))
+        self.assertFalse(FileGarbage.objects.exists())
+
+    def test_failed_compression_keeps_the_original(self):
+        """Test a compression failing before the compressed copy is in place keeps the file"""
+        log = self.job.resources.get(resource_type=ResourceType.LOG)
+        directory = os.path.dirname(log.file.path)
+
+        with mock.patch("common.storage.os.replace", side_effect=OSError("disk full")):
+            compact(now=timezone.now() + timedelta(days=8))
+
+        log.refresh_from_db()
+        self.assertEqual((log.encoding, log.stored_size), ("", len(LOG)))
+        with log.file.open("rb") as stored:
+            self.assertEqual(stored.read(), LOG)
+        # No temporary copy left behind
+        self.assertEqual([name for name in os.listdir(directory) if name.startswith("solver")],
+                         ["solver.log"])
+
+        self.assertTrue(log.compress_stored("gzip"))
+        self.assertEqual(self.download(self.job, "solver.log"), LOG)
+
+    def test_cursor_skips_visited_and_running_jobs(self):
+        """Test the compactor continues where it stopped and leaves unfinished jobs alone"""
+        running = self.create_job(JobStatus.RUNNING)
+        later = timezone.now() + timedelta(days=31)
+
+        compact(now=later)
+        cursor = RetentionCursor.objects.get(resource_type=ResourceType.OUTPUT)
+        self.assertEqual(cursor.job_id, self.job.id)
+        self.assertEqual(running.resources.count(), 4)
+
+        with self.assertNumQueries(len(POLICIES) * 2):
+            results = compact(now=later)
+        self.assertEqual(results["OUT"], (0, 0))
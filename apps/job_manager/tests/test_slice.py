@@ -0,0 +1,89 @@
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from common import compression
+from job_manager.models import JobResource, ResourceType
+from job_manager.tests.base import JobTestCase
+
+LOG = b"".join(f"step {i} residual {1.0 / (i + 1):.6e}\n".encode() for i in range(3000))
+
+
+class ResourceSliceTests(JobTestCase):
+
+    def setUp(self):
+        """Set up a runner with a running job and a log resource"""
+        super().setUp()
+        self.runner = self.create_runner()
+        self.job = self.create_job(runner=self.runner)
+        self.resource = JobResource.objects.create(
+            job=self.job, resource_type=ResourceType.LOG, file=ContentFile(LOG, name="solver.log")
+        )
+        self.client = self.runner_api_client()
+
+    def get_slice(self, **params):
+        return self.client.get(
+            f"/job_manager/resources/runner/{self.resource.id}/slice/", params
+        )
+
+    def test_line_slices(self):
+        """Test line windows and tail of a log"""
+        lines = LOG.splitlines(keepends=True)
+
+        response = self.get_slice(mode='lines', start=100, count=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"".join(lines[100:105]))
+        self.assertEqual(response['X-Total-Lines'], str(len(lines)))
+
+        response = self.get_slice(mode='tail', count=3)
+        self.assertEqual(response.content, b"".join(lines[-3:]))
+
+    def test_byte_slice(self):
+        """Test byte windows and the size limit"""
+        response = self.get_slice(mode='bytes', offset=10, length=20)
+        self.assertEqual(response.content, LOG[10:30])
+        self.assertEqual(response['X-File-Size'], str(len(LOG)))
+
+        with override_settings(RESOURCE_SLICE_MAX_BYTES=10):
+            self.assertEqual(self.get_slice(mode='bytes', length=20).status_code, 400)
+
+    def test_user_slice(self):
+        """Test the job owner can slice resources too"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(f"/job_manager/resources/users/{self.resource.id}/slice/",
+                              {'mode': 'tail', 'count': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, LOG.splitlines(keepends=True)[-1])
+
+    def test_compressed_file_conflict(self):
+        """Test compressed files are refused rather than sliced as raw bytes"""
+        self.resource.compress_stored(compression.GZIP)
+
+        self.assertEqual(self.get_slice(mode='tail', count=1).status_code, 409)
+
+    def test_line_slices_are_capped(self):
+        """Test a file without newlines is cut at RESOURCE_SLICE_MAX_BYTES in every mode"""
+        content = b"x" * 4096
+        self.resource = JobResource.objects.create(
+            job=self.job, resource_type=ResourceType.LOG, file=ContentFile(content, name="one.log")
+        )
+        with override_settings(RESOURCE_SLICE_MAX_BYTES=1000):
+            response = self.get_slice(mode='lines', start=0, count=10)
+            self.assertEqual(response.content, content[:1000])
+            self.assertEqual(response['X-Truncated'], 'true')
+
+            response = self.get_slice(mode='tail', count=1)
+            self.assertEqual(len(response.content), 1000)
+            self.assertEqual(response['X-Truncated'], 'true')
+
+            response = self.get_slice(mode='csv', count=10)
+            self.assertLessEqual(len(response.content), 1000)
+            self.assertEqual(response['X-Truncated'], 'true')
+
+        response = self.get_slice(mode='tail', count=1)
+        self.assertEqual(response.content, content)
+        self.assertFalse(response.has_header('X-Truncated'))
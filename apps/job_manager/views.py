@@ -11,10 +11,15 @@
 # You should have received a copy of the GNU General Public License along with this program. If not,
 #  see <https://www.gnu.org/licenses/>.
 
+import logging
 import mimetypes
 import os
+import unicodedata
 
-from django.http import FileResponse, Http404
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import serializers, viewsets
@@ -25,19 +30,260 @@ from rest_framework.permissions import (
     IsAuthenticated,
 )
 
+from common.archives import ARCHIVE_FORMATS, ArchiveMember, stream_archive
+from common.compression import client_accepts
+from common.downloads import storage_download_response
+from common.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from common.slicing import MappedFile
+from common.storage import (
+    job_resource_storage,
+    local_path,
+    presigned_upload,
+    supports_presigned_urls,
+)
 from runner_manager.authentication import RunnerTokenAuthentication
 from runner_manager.permissions import IsAuthenticatedRunner
 
-from .models import JobInfo, JobResource
+from .dispatch import dispatch_job
+from .manifest import build_manifest, diff_manifest, manifest_digest
+from .models import (
+    FileGarbage,
+    JobInfo,
+    JobResource,
+    ResourceType,
+    UserUsage,
+    normalize_filename,
+)
+from .quota import (
+    QuotaExceeded,
+    check_job_submission,
+    check_storage,
+    check_upload,
+    remaining_bytes,
+)
 from .serializers import (
     JobInfoRunnerSerializer,
     JobInfoSerializer,
     JobResourceRunnerSerializer,
     JobResourceSerializer,
+    ManifestSyncSerializer,
+    PresignedUploadConfirmSerializer,
+    PresignedUploadSerializer,
+    ResourceSliceSerializer,
+    UserUsageSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def resource_download_response(request, resource):
+    """
+    Serve a resource file.
+
+    Files stored compressed are passed through as they are, with a Content-Encoding header, when
+    the client accepts the encoding, and decompressed on the fly otherwise. Files in an object store
+    are downloaded from it directly through a presigned URL, files packed by retention are read
+    from their archive.
+    """
+    content_type, _ = mimetypes.guess_type(resource.filename)
+    content_type = content_type or 'application/octet-stream'
+    passthrough = bool(resource.encoding) and client_accepts(request, resource.encoding)
 
-class JobInfoViewSet(viewsets.ModelViewSet):
+    if resource.archive_name or (resource.encoding and not passthrough):
+        response = FileResponse(
+            resource.open_stored() if passthrough else resource.open_content(),
+            content_type=content_type,
+            as_attachment=True,
+            filename=resource.filename
+        )
+        length = resource.stored_size if passthrough else resource.size
+        if length is not None:
+            response['Content-Length'] = length
+        if passthrough:
+            response['Content-Encoding'] = resource.encoding
+    else:
+        response = storage_download_response(
+            resource.file.storage, resource.file.name, content_type=content_type,
+            filename=resource.filename, content_encoding=resource.encoding
+        )
+
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+class JobResourceArchiveMixin:
+    """
+    Adds an ``archive`` action streaming all of a job's resources as a single tar or zip file.
+    """
+
+    def _archive_members(self, resources):
+        """Yield archive members lazily, skipping resources whose file has gone missing."""
+        for resource in resources.iterator():
+            storage, name = resource.file.storage, resource.stored_name
+            if not name or not storage.exists(name):
+                logger.warning(f"Skipping missing file for JobResource {resource.id} in archive")
+                continue
+            decoded = resource.encoding or resource.archive_name
+            yield ArchiveMember(
+                name=resource.filename,
+                size=resource.size if decoded else storage.size(name),
+                mtime=resource.created_at,
+                open=resource.open_content,
+            )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('archive_format', OpenApiTypes.STR, enum=list(ARCHIVE_FORMATS),
+                             description='Archive format (default: zip)'),
+            OpenApiParameter('resource_type', OpenApiTypes.STR, enum=ResourceType.values,
+                             description='Only include resources of this type'),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+        description='Download all resources of a job as a single archive, generated on the fly'
+    )
+    @action(detail=True, methods=['get'])
+    def archive(self, request, pk=None):
+        job = self.get_object()
+
+        archive_format = request.query_params.get('archive_format', 'zip')
+        if archive_format not in ARCHIVE_FORMATS:
+            raise serializers.ValidationError(
+                {'archive_format': f"Must be one of {list(ARCHIVE_FORMATS)}."}
+            )
+
+        resources = job.resources.all()
+        resource_type = request.query_params.get('resource_type')
+        if resource_type:
+            if resource_type not in ResourceType.values:
+                raise serializers.ValidationError(
+                    {'resource_type': f"Must be one of {ResourceType.values}."}
+                )
+            resources = resources.filter(resource_type=resource_type)
+
+        response = StreamingHttpResponse(
+            stream_archive(archive_format, self._archive_members(resources)),
+            content_type=ARCHIVE_FORMATS[archive_format],
+        )
+        response['Content-Disposition'] = content_disposition_header(
+            True, f"job_{job.id}.{archive_format}"
+        )
+        return response
+
+
+class JobResourceManifestMixin:
+    """
+    Adds ``manifest`` and ``sync`` actions used by clients and runners for delta synchronisation.
+    """
+
+    @extend_schema(
+        responses={200: OpenApiTypes.OBJECT},
+        description='Filename, type, size, mtime and SHA-256 of every resource of a job'
+    )
+    @action(detail=True, methods=['get'])
+    def manifest(self, request, pk=None):
+        job = self.get_object()
+        entries = build_manifest(job.resources.all())
+        return Response({
+            'job': str(job.id),
+            'digest': manifest_digest(entries),
+            'resources': entries,
+        })
+
+    @extend_schema(
+        request=ManifestSyncSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            'Submit the client manifest and receive only the resources to fetch (direction '
+            '"download") or the filenames to upload (direction "upload"). A matching manifest '
+            '"digest" short-circuits the comparison.'
+        )
+    )
+    @action(detail=True, methods=['post'])
+    def sync(self, request, pk=None):
+        job = self.get_object()
+        serializer = ManifestSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        direction = serializer.validated_data['direction']
+        key = 'fetch' if direction == ManifestSyncSerializer.DIRECTION_DOWNLOAD else 'upload'
+
+        server_entries = build_manifest(job.resources.all())
+        digest = manifest_digest(server_entries)
+        if serializer.validated_data.get('digest') == digest:
+            return Response({'digest': digest, key: []})
+
+        changes = diff_manifest(
+            server_entries, serializer.validated_data['resources'], direction
+        )
+        return Response({'digest': digest, key: changes})
+
+
+class JobResourceSliceMixin:
+    """
+    Adds a ``slice`` action serving a window of a resource file instead of the whole file.
+    """
+
+    @extend_schema(
+        parameters=[ResourceSliceSerializer],
+        responses={200: OpenApiTypes.BINARY},
+        description=(
+            'Part of a resource file: "bytes" (offset, length), "lines" (start, count), "tail" '
+            '(last count lines) or "csv" (header plus count rows from start, optional columns). '
+            'Responses are cut at RESOURCE_SLICE_MAX_BYTES, with an X-Truncated: true header. '
+            'Only available for uncompressed files kept on the API servers (409 otherwise).'
+        )
+    )
+    @action(detail=True, methods=['get'])
+    def slice(self, request, pk=None):
+        resource = self.get_object()
+        serializer = ResourceSliceSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        if resource.encoding or resource.archive_name:
+            return Response(
+                {"detail": "The file is stored compressed, download it instead."}, status=409
+            )
+        path = local_path(resource.file.storage, resource.file.name) if resource.file else None
+        if path is None:
+            return Response(
+                {"detail": "Slicing is not supported by the configured storage."}, status=409
+            )
+        if not os.path.isfile(path):
+            raise Http404("File not found")
+
+        headers = {}
+        limit = settings.RESOURCE_SLICE_MAX_BYTES
+        with MappedFile(path) as mapped:
+            mode = params['mode']
+            if mode == ResourceSliceSerializer.MODE_BYTES:
+                content = mapped.bytes(params['offset'], params['length'])
+                content_type = 'application/octet-stream'
+                headers['X-File-Size'] = mapped.size
+            elif mode == ResourceSliceSerializer.MODE_CSV:
+                try:
+                    content = mapped.csv_rows(params['start'], params['count'], params['columns'],
+                                              max_bytes=limit)
+                except KeyError as error:
+                    raise serializers.ValidationError(
+                        {'columns': f"Unknown column: {error.args[0]}"}
+                    )
+                content_type = 'text/csv; charset=utf-8'
+                headers['X-Total-Rows'] = max(mapped.line_count - 1, 0)
+            else:
+                if mode == ResourceSliceSerializer.MODE_TAIL:
+                    content = mapped.tail(params['count'], max_bytes=limit)
+                else:
+                    content = mapped.lines(params['start'], params['count'], max_bytes=limit)
+                    headers['X-Total-Lines'] = mapped.line_count
+                content_type = 'text/plain; charset=utf-8'
+            if mapped.truncated:
+                # Whole lines or rows would exceed RESOURCE_SLICE_MAX_BYTES
+                headers['X-Truncated'] = 'true'
+
+        return HttpResponse(content, content_type=content_type, headers=headers)
+
+
+class JobInfoViewSet(JobResourceArchiveMixin, JobResourceManifestMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows jobs to be viewed or edited.
     """
@@ -45,12 +291,29 @@ class JobInfoViewSet(viewsets.ModelViewSet):
     serializer_class = JobInfoSerializer
     permission_classes = [IsAuthenticated]
 
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Set created_by to current user when creating a job"""
-        serializer.save(created_by=self.request.user)
+        check_job_submission(self.request.user.id)
+        job = serializer.save(created_by=self.request.user)
+        if settings.JOB_AUTO_DISPATCH and job.assigned_runner_id is None:
+            job.assigned_runner = dispatch_job(job)
+
+    @extend_schema(
+        responses={200: UserUsageSerializer},
+        description='Storage and compute used by the current user, with the applicable limits'
+    )
+    @action(detail=False, methods=['get'])
+    def usage(self, request):
+        return Response(UserUsageSerializer(UserUsage.for_user(request.user.id)).data)
 
 
-class JobInfoRunnerViewSet(viewsets.ModelViewSet):
+class JobInfoRunnerViewSet(JobResourceArchiveMixin, JobResourceManifestMixin,
+                           viewsets.ModelViewSet):
     """
     API endpoint for runners to view and update their assigned jobs.
     """
@@ -65,7 +328,7 @@ class JobInfoRunnerViewSet(viewsets.ModelViewSet):
                 hasattr(self.request.user, '_runner_info')):
             return JobInfo.objects.filter(
                 assigned_runner=self.request.user._runner_info
-            )
+            ).select_related('application_version')
         return JobInfo.objects.none()
     
     def update(self, request, *args, **kwargs):
@@ -95,7 +358,7 @@ class JobInfoRunnerViewSet(viewsets.ModelViewSet):
         return Response({"detail": "Runners cannot delete jobs."}, status=405)
 
 
-class JobResourceViewSet(viewsets.ModelViewSet):
+class JobResourceViewSet(JobResourceSliceMixin, viewsets.ModelViewSet):
     """
     API endpoint for users to manage job resources.
     """
@@ -103,8 +366,24 @@ class JobResourceViewSet(viewsets.ModelViewSet):
     serializer_class = JobResourceSerializer
     permission_classes = [IsAuthenticated]
 
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        """Check the job owner's quota before the file is stored"""
+        check_upload(serializer.validated_data['job'], serializer.validated_data.get('file'))
+        serializer.save()
 
-class JobResourceRunnerViewSet(viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        if 'file' in serializer.validated_data:
+            check_upload(serializer.validated_data.get('job', serializer.instance.job),
+                         serializer.validated_data['file'], replaced=serializer.instance)
+        serializer.save()
+
+
+class JobResourceRunnerViewSet(JobResourceSliceMixin, viewsets.ModelViewSet):
     serializer_class = JobResourceRunnerSerializer
     authentication_classes = [RunnerTokenAuthentication]
     permission_classes = [IsAuthenticatedRunner]
@@ -128,7 +407,13 @@ class JobResourceRunnerViewSet(viewsets.ModelViewSet):
             
             filename = self.request.query_params.get('filename')
             if filename:
-                queryset = queryset.filter(file__icontains=filename)
+                queryset = queryset.filter(filename=normalize_filename(filename))
+
+            filename_prefix = self.request.query_params.get('filename_prefix')
+            if filename_prefix:
+                queryset = queryset.filter(
+                    filename__startswith=unicodedata.normalize('NFC', filename_prefix)
+                )
             
             return queryset
         return JobResource.objects.none()
@@ -137,13 +422,20 @@ class JobResourceRunnerViewSet(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter('job_id', OpenApiTypes.UUID, description='Filter by job ID'),
             OpenApiParameter('resource_type', OpenApiTypes.STR, description='Filter by resource type'),
-            OpenApiParameter('filename', OpenApiTypes.STR, description='Filter by filename'),
+            OpenApiParameter('filename', OpenApiTypes.STR, description='Filter by exact filename'),
+            OpenApiParameter('filename_prefix', OpenApiTypes.STR,
+                             description='Filter by filename prefix'),
         ],
         description='List resources for assigned jobs with optional filters'
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
-    
+
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Validate job assignment before creating resource"""
         job = serializer.validated_data['job']
@@ -155,6 +447,9 @@ class JobResourceRunnerViewSet(viewsets.ModelViewSet):
                 "You can only upload resources to jobs assigned to you."
             )
         
+        # Charged to the job owner, checked before the file is stored
+        check_upload(job, serializer.validated_data.get('file'))
+
         # Set created_by to None for runner uploads (system upload)
         serializer.save(created_by=None)
     
@@ -168,6 +463,8 @@ class JobResourceRunnerViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError(
                 "You can only update resources for jobs assigned to you."
             )
+        if 'file' in serializer.validated_data:
+            check_upload(job, serializer.validated_data['file'], replaced=serializer.instance)
         
         serializer.save()
     
@@ -183,16 +480,122 @@ class JobResourceRunnerViewSet(viewsets.ModelViewSet):
     def download(self, request, pk=None):
         resource = self.get_object()
         
-        if not resource.file or not os.path.exists(resource.file.path):
+        if not resource.file or not resource.file.storage.exists(resource.stored_name):
             raise Http404("File not found")
         
-        content_type, _ = mimetypes.guess_type(resource.file.path)
-        if content_type is None:
-            content_type = 'application/octet-stream'
-        
-        return FileResponse(
-            open(resource.file.path, 'rb'),
-            content_type=content_type,
-            as_attachment=True,
-            filename=resource.filename
+        return resource_download_response(request, resource)
+
+    def _check_assigned(self, job):
+        if (not hasattr(self.request.user, '_runner_info') or
+                job.assigned_runner != self.request.user._runner_info):
+            raise serializers.ValidationError(
+                "You can only upload resources to jobs assigned to you."
+            )
+
+    @extend_schema(
+        request=PresignedUploadSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            'Get a presigned POST to upload a resource file straight to the object store. The '
+            'upload is registered afterwards with confirm_upload. Not available when files are '
+            'kept on the API servers, upload through this endpoint instead.'
+        )
+    )
+    @action(detail=False, methods=['post'])
+    def presign_upload(self, request):
+        if not supports_presigned_urls(job_resource_storage):
+            return Response(
+                {"detail": "Direct uploads are not supported by the configured storage."},
+                status=400
+            )
+        serializer = PresignedUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.validated_data['job']
+        self._check_assigned(job)
+
+        resource = JobResource(
+            job=job,
+            resource_type=serializer.validated_data['resource_type'],
+            original_file_path=serializer.validated_data.get('original_file_path', ''),
+        )
+        name = JobResource._meta.get_field('file').generate_filename(
+            resource, serializer.validated_data['filename']
+        )
+
+        # The store enforces the remaining storage quota as the upload size limit
+        check_storage(job.created_by_id, extra_files=1)
+        max_size = settings.PRESIGNED_UPLOAD_MAX_SIZE
+        remaining = remaining_bytes(job.created_by_id)
+        if remaining is not None:
+            if not remaining:
+                raise QuotaExceeded("Storage quota exceeded.")
+            max_size = min(max_size, remaining)
+
+        upload = presigned_upload(
+            job_resource_storage, name, settings.PRESIGNED_URL_EXPIRY, max_size
+        )
+        return Response({
+            'name': name,
+            'url': upload['url'],
+            'fields': upload['fields'],
+            'expires_in': settings.PRESIGNED_URL_EXPIRY,
+        })
+
+    @extend_schema(
+        request=PresignedUploadConfirmSerializer,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        responses={201: JobResourceRunnerSerializer},
+        description='Register a file uploaded with presign_upload as a resource of the job'
+    )
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def confirm_upload(self, request):
+        serializer = PresignedUploadConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job = data['job']
+        self._check_assigned(job)
+
+        # The name must be one presign_upload could have handed out for this job
+        name = data['name']
+        job_directory = f"user_{job.created_by_id}/job_{job.id}/"
+        if (not name.startswith(job_directory) or '/' in name[len(job_directory):]
+                or not job_resource_storage.exists(name)):
+            raise serializers.ValidationError({'name': "No upload found for this job."})
+
+        stored_size = job_resource_storage.size(name)
+        if not data.get('encoding') and data.get('size') not in (None, stored_size):
+            raise serializers.ValidationError(
+                {'size': f"The uploaded file has {stored_size} bytes."}
+            )
+
+        existing = JobResource.objects.filter(job=job, file=name).first()
+        try:
+            check_storage(
+                job.created_by_id,
+                stored_size - ((existing.stored_size or 0) if existing else 0),
+                0 if existing else 1
+            )
+        except QuotaExceeded:
+            if existing is None:
+                FileGarbage.enqueue([name])
+            raise
+
+        resource = existing or JobResource(job=job)
+        resource.file.name = name
+        resource.archive_name = ''
+        resource.resource_type = data['resource_type']
+        resource.description = data.get('description', '')
+        resource.original_file_path = data.get('original_file_path', '')
+        resource.encoding = data.get('encoding', '')
+        resource.stored_size = stored_size
+        resource.size = data.get('size', stored_size)
+        # Without a declared checksum save() hashes the file, reading it back from the store
+        resource.checksum = data.get('checksum', '')
+        resource.created_by = None
+        resource.save()
+
+        return Response(
+            JobResourceRunnerSerializer(resource, context=self.get_serializer_context()).data,
+            status=201
         )
\ No newline at end of file
@@ -14,6 +14,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from runner_manager.fleet import with_overview
 from runner_manager.models import RunnerInfo, SystemInfo
 from job_manager.models import JobInfo
 
@@ -23,22 +24,38 @@ class RunnerInfoAdmin(admin.ModelAdmin):
     list_display = (
         "id",
         "name",
-        "token",
+        "token_prefix",
         "state",
+        "pool",
         "get_system_name",
         "owner",
         "last_contact",
+        "queued_jobs",
+        "active_jobs",
     )
+    list_select_related = ("owner",)
+    list_filter = ("state", "pool")
 
     readonly_fields = (
         "assigned_jobs_list",
         "get_system_name",
     )
 
+    def get_queryset(self, request):
+        # Job counts and systems of all listed runners in two queries
+        return with_overview(super().get_queryset(request))
+
+    def queued_jobs(self, obj):
+        return obj.queued_jobs
+
+    def active_jobs(self, obj):
+        return obj.active_jobs
+
     def get_system_name(self, obj):
         """Get system name from related SystemInfo"""
-        if hasattr(obj, "system") and obj.system.exists():
-            system = obj.system.first()
+        systems = obj.system.all()
+        if systems:
+            system = systems[0]
             url = reverse("admin:runner_manager_systeminfo_change", args=[system.id])
             return format_html(
                 '<a href="{}">{}</a> - {}', url, system.id, system.system_name
@@ -58,6 +75,8 @@ class RunnerInfoAdmin(admin.ModelAdmin):
         return "No assigned jobs"
 
     get_system_name.short_description = "System Name"
+    queued_jobs.admin_order_field = "queued_jobs"
+    active_jobs.admin_order_field = "active_jobs"
     assigned_jobs_list.short_description = "All Queued Jobs"
 
 
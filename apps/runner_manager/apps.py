@@ -18,3 +18,6 @@ class RunnerManagerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "runner_manager"
     label = "runner_manager"
+
+    def ready(self):
+        import runner_manager.signals  # noqa: F401
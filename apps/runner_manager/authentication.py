@@ -15,19 +15,18 @@ from rest_framework.authentication import TokenAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from drf_spectacular.extensions import OpenApiAuthenticationExtension
 
-from .models import RunnerInfo
+from . import token_cache
 
 
 class RunnerTokenAuthentication(TokenAuthentication):
     """
     Custom token authentication for runner agents.
-    Authenticates runner machines using their unique tokens.
+    Authenticates runner machines using their unique tokens, looked up through token_cache.
     """
 
     def authenticate_credentials(self, key):
-        try:
-            runner = RunnerInfo.objects.select_related("owner").get(token=key)
-        except RunnerInfo.DoesNotExist:
+        runner = token_cache.get_runner(key)
+        if runner is None:
             raise AuthenticationFailed("Invalid runner token.")
 
         if not runner.owner.is_active:
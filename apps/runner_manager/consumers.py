@@ -15,32 +15,41 @@ import json
 import uuid
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from runner_manager.models import RunnerInfo
-from django.core.exceptions import ObjectDoesNotExist
+from runner_manager import liveness, messaging, token_cache
+
+# Channel group every connected runner joins
+RUNNERS_GROUP = "runners"
 
 
 class RunnerConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.runner_id = self.scope["url_route"]["kwargs"]["runner_id"]
-        self.runner_group_name = f"runner_{self.runner_id}"
+        self.runner_group_name = messaging.runner_group(self.runner_id)
         self.joined_group = False
+        # Highest sequence replayed on connect, live copies of these messages are skipped
+        self.replayed_sequence = 0
         
-        try:
-            runner = await self.get_runner(self.runner_id)
-            token = self.get_token_from_headers()
-
-            if token and token == runner.token:
-                # Join runner-specific group
-                await self.channel_layer.group_add(
-                    self.runner_group_name,
-                    self.channel_name
-                )
-                self.joined_group = True
-                await self.accept()
-            else:
-                await self.close()
-
-        except ObjectDoesNotExist:
+        runner = await self.get_runner(self.get_header("token"))
+
+        if runner is not None and str(runner.id) == str(self.runner_id):
+            # Join runner-specific group
+            await self.channel_layer.group_add(
+                self.runner_group_name,
+                self.channel_name
+            )
+            # And the group of all runners, for fleet-wide announcements
+            await self.channel_layer.group_add(RUNNERS_GROUP, self.channel_name)
+            # And the group of its pool, for pool broadcasts
+            self.pool_group_name = (
+                messaging.pool_group(runner.owner_id, runner.pool) if runner.pool else None
+            )
+            if self.pool_group_name:
+                await self.channel_layer.group_add(self.pool_group_name, self.channel_name)
+            self.joined_group = True
+            await self.register_connection()
+            await self.accept()
+            await self.replay(self.get_last_sequence())
+        else:
             await self.close()
 
     async def disconnect(self, close_code):
@@ -50,33 +59,121 @@ class RunnerConsumer(AsyncWebsocketConsumer):
                 self.runner_group_name,
                 self.channel_name
             )
+            await self.channel_layer.group_discard(RUNNERS_GROUP, self.channel_name)
+            if self.pool_group_name:
+                await self.channel_layer.group_discard(self.pool_group_name, self.channel_name)
+            # The runner is gone, don't wait for its heartbeats to time out, unless it already
+            # reconnected and this is the late close of its previous connection
+            await self.unregister_connection()
 
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
+        if text_data_json.get("type") == "ack":
+            sequence = self.parse_sequence(text_data_json.get("sequence"))
+            if sequence is None:
+                # Nothing acknowledged, the messages are pushed again later
+                await self.send(text_data=json.dumps({
+                    "type": "error",
+                    "detail": "An ack needs a non-negative integer sequence.",
+                }))
+                return
+            # Every message up to this sequence was handled
+            await self.acknowledge(sequence)
+            return
         message = text_data_json["message"]
         await self.send(text_data=json.dumps({"message": message}))
 
-    # Handler for job notifications from channel layer
-    async def job_notification(self, event):
+    async def replay(self, last_sequence):
+        """
+        Send the messages the runner did not acknowledge, after the last sequence it handled
+        when given (earlier ones count as acknowledged).
+        """
+        if last_sequence is not None:
+            await self.acknowledge(last_sequence)
+        messages = await self.get_pending(last_sequence)
+        for message in messages:
+            await self.send(text_data=json.dumps(message.to_json()))
+            self.replayed_sequence = message.sequence
+        await self.mark_sent([message.pk for message in messages])
+
+    # Handler for sequenced messages from channel layer (see runner_manager.messaging)
+    async def runner_message(self, event):
+        """
+        Receives runner_message events, sent to the runner group by messaging.push().
+        The runner acknowledges them by sequence; unacknowledged ones are pushed again.
+        """
+        message = event["message"]
+        if message["sequence"] <= self.replayed_sequence and not event.get("redelivery"):
+            return
+        await self.send(text_data=json.dumps(message))
+
+    # Handler for pool broadcasts (see runner_manager.messaging.broadcast_to_pool)
+    async def pool_message(self, event):
+        """
+        Receives pool_message events sent to the runners of a pool, not sequenced.
+        """
+        await self.send(text_data=json.dumps(event["message"]))
+
+    # Handler for application prefetch announcements
+    async def app_prefetch(self, event):
         """
-        Receives job_notification events from channel layer.
-        This is called when channel_layer.group_send() is used.
+        Receives app_prefetch events sent to all runners when an application version is published.
+        The runner may download the program ahead of its first job and report it as prefetched.
         """
-        # Send message to WebSocket client
         await self.send(text_data=json.dumps({
             'id': str(uuid.uuid4()),
-            'type': 'new_job',
-            'job_id': event['job_id'],
-            'message': event.get('message', 'New job available')
+            'type': 'prefetch',
+            'application_id': event['application_id'],
+            'sha256': event['sha256'],
+            'size': event['size'],
+            'url': event['url'],
         }))
 
-    def get_token_from_headers(self):
-        """Extract token from headers"""
+    def get_header(self, name):
+        """Extract a header value"""
         for header_name, header_value in self.scope["headers"]:
-            if header_name.decode("utf-8") == "token":
+            if header_name.decode("utf-8") == name:
                 return header_value.decode("utf-8")
         return None
 
+    @staticmethod
+    def parse_sequence(value):
+        """A message sequence sent by the runner, None unless a non-negative integer"""
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            return None
+        try:
+            sequence = int(value)
+        except ValueError:
+            return None
+        return sequence if sequence >= 0 else None
+
+    def get_last_sequence(self):
+        """Last message sequence handled by a reconnecting runner, from the last-sequence header"""
+        try:
+            return int(self.get_header("last-sequence"))
+        except (TypeError, ValueError):
+            return None
+
+    @database_sync_to_async
+    def get_runner(self, token):
+        return token_cache.get_runner(token)
+
+    @database_sync_to_async
+    def register_connection(self):
+        self.connection_generation = liveness.connected(self.runner_id)
+
+    @database_sync_to_async
+    def unregister_connection(self):
+        return liveness.disconnected(self.runner_id, self.connection_generation)
+
+    @database_sync_to_async
+    def acknowledge(self, sequence):
+        return messaging.acknowledge(self.runner_id, sequence)
+
+    @database_sync_to_async
+    def get_pending(self, last_sequence):
+        return messaging.pending(self.runner_id, after=last_sequence)
+
     @database_sync_to_async
-    def get_runner(self, runner_id):
-        return RunnerInfo.objects.get(id=runner_id)
+    def mark_sent(self, message_ids):
+        return messaging.mark_sent(message_ids)
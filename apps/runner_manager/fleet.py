@@ -0,0 +1,89 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Fleet overview: runners with their hardware, job counts and liveness in a constant number of
+queries (the annotated runners, then their SystemInfo rows), whatever the size of the fleet.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
+
+from job_manager.models import FINISHED_STATUSES, JobStatus
+
+from . import heartbeats
+from .models import ONLINE_STATES, RunnerInfo, SystemInfo
+
+
+def with_overview(runners):
+    """Annotate runners with queued_jobs and active_jobs, and prefetch their SystemInfo."""
+    return runners.annotate(
+        queued_jobs=Count("jobinfo", filter=Q(jobinfo__status=JobStatus.QUEUED)),
+        active_jobs=Count(
+            "jobinfo",
+            filter=~Q(jobinfo__status__in=[*FINISHED_STATUSES, JobStatus.QUEUED]),
+        ),
+    ).prefetch_related(Prefetch("system", queryset=SystemInfo.objects.order_by("id")))
+
+
+def fleet_overview(runners, now=None):
+    """List the overview of runners (a queryset), see with_overview."""
+    now = now or timezone.now()
+    deadline = now - datetime.timedelta(seconds=settings.RUNNER_HEARTBEAT_TIMEOUT)
+    runners = list(with_overview(runners.order_by("name", "id")))
+    last_contacts = heartbeats.last_contacts(runners)
+
+    overview = []
+    for runner in runners:
+        systems = runner.system.all()
+        last_contact = last_contacts[runner.pk]
+        overview.append({
+            "id": runner.id,
+            "name": runner.name,
+            "state": runner.state,
+            "pool": runner.pool,
+            "labels": runner.labels,
+            "last_contact": last_contact,
+            "alive": (runner.state in ONLINE_STATES and last_contact is not None
+                      and last_contact >= deadline),
+            "queued_jobs": runner.queued_jobs,
+            "active_jobs": runner.active_jobs,
+            "system": systems[0].to_json() if systems else None,
+        })
+    return overview
+
+
+def user_pools(user):
+    """The pools of a user's runners with their runner and online runner counts."""
+    return list(
+        RunnerInfo.objects.filter(owner=user).exclude(pool="")
+        .values("pool")
+        .annotate(runners=Count("id"), online=Count("id", filter=Q(state__in=ONLINE_STATES)))
+        .order_by("pool")
+    )
+
+
+def user_fleet_overview(user):
+    """Overview of a user's runners, cached FLEET_OVERVIEW_CACHE_TTL seconds."""
+    ttl = settings.FLEET_OVERVIEW_CACHE_TTL
+    key = f"fleet-overview:{user.pk}"
+    overview = cache.get(key) if ttl > 0 else None
+    if overview is None:
+        overview = fleet_overview(RunnerInfo.objects.filter(owner=user))
+        if ttl > 0:
+            cache.set(key, overview, ttl)
+    return overview
@@ -0,0 +1,132 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner heartbeat coalescing.
+
+A heartbeat that does not change the runner's state only refreshes its last contact time. It is
+written to the Django cache, where liveness reads find it, and buffered in the process; the buffer
+is written to RunnerInfo.last_contact with one bulk update at most every
+RUNNER_HEARTBEAT_FLUSH_INTERVAL seconds (on the next heartbeat after the interval, and at exit).
+The database value may therefore lag by that interval: read last contact times through
+last_contact() / last_contacts(), which take the newer of both. Flushes never move a stored time
+backwards, whatever order the processes flush in.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import RunnerInfo
+
+logger = logging.getLogger(__name__)
+
+# Cached heartbeats outlive many flush intervals, so a flush can never miss one
+_TTL_FLUSH_INTERVALS = 10
+_MIN_TTL = 300
+
+_pending = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _cache_key(runner_id):
+    return f"runner-heartbeat:{runner_id}"
+
+
+def record(runner_id, when):
+    """Record a heartbeat of a runner at datetime when."""
+    interval = settings.RUNNER_HEARTBEAT_FLUSH_INTERVAL
+    if interval <= 0:
+        _write({runner_id: when})
+        return
+
+    cache.set(_cache_key(runner_id), when, max(interval * _TTL_FLUSH_INTERVALS, _MIN_TTL))
+    with _lock:
+        _pending[runner_id] = when
+        due = time.monotonic() - _last_flush >= interval
+    if due:
+        try:
+            flush()
+        except Exception:
+            # Still readable from the cache; the runners' next heartbeats are buffered again
+            logger.exception("Could not flush runner heartbeats")
+
+
+def discard(runner_id):
+    """Forget the buffered heartbeat of a runner whose row was just written."""
+    with _lock:
+        _pending.pop(runner_id, None)
+    cache.delete(_cache_key(runner_id))
+
+
+def flush():
+    """Write the buffered heartbeats of this process in bulk, returns the number of runners."""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    _write(pending)
+    return len(pending)
+
+
+def _write(contacts, batch_size=500):
+    """
+    Write runner ids to last contact times, one UPDATE per batch. Times only move forward: another
+    process, or a state change, may have written a newer one already.
+    """
+    contacts = list(contacts.items())
+    for start in range(0, len(contacts), batch_size):
+        batch = contacts[start:start + batch_size]
+        when = Case(*(When(pk=runner_id, then=Value(time)) for runner_id, time in batch),
+                    output_field=models.DateTimeField())
+        RunnerInfo.objects.filter(pk__in=[runner_id for runner_id, _ in batch]).update(
+            last_contact=Greatest(Coalesce(F("last_contact"), when), when)
+        )
+
+
+def last_contacts(runners):
+    """Map runner ids to their last contact time, for runners with last_contact loaded."""
+    runners = list(runners)
+    cached = cache.get_many([_cache_key(runner.pk) for runner in runners])
+    contacts = {}
+    for runner in runners:
+        heartbeat = cached.get(_cache_key(runner.pk))
+        stored = runner.last_contact
+        contacts[runner.pk] = max(heartbeat, stored) if heartbeat and stored else heartbeat or stored
+    return contacts
+
+
+def last_contact(runner):
+    return last_contacts([runner])[runner.pk]
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception("Could not flush runner heartbeats")
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,130 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner liveness: online runners without a heartbeat for RUNNER_HEARTBEAT_TIMEOUT seconds, or whose
+WebSocket closed, are marked OFFLINE.
+
+Stale runners are found with a range query on the (state, last_contact) index; candidates with a
+newer heartbeat still buffered (see runner_manager.heartbeats) are spared. With JOB_AUTO_DISPATCH,
+their queued jobs move to another eligible online runner of their owner (the new_job message to the
+offline runner is dropped). Otherwise, or when no other runner can take a job, the job keeps the
+runner it was submitted to, which gets its new_job message replayed when it reconnects.
+
+A runner reconnecting before its old WebSocket is closed must not be marked OFFLINE by that late
+close: each connection takes the next connection generation of its runner (an UPDATE of the runner
+row, like message sequences), and a closing connection only marks the runner OFFLINE while its
+generation is still the latest, checked in the same locked query. No shared cache is needed.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import heartbeats
+from .models import ONLINE_STATES, RunnerInfo, RunnerMessage, RunnerStatus
+
+logger = logging.getLogger(__name__)
+
+
+def find_stale_runners(now=None):
+    """Return the ids of online runners whose last heartbeat is older than the timeout."""
+    now = now or timezone.now()
+    deadline = now - datetime.timedelta(seconds=settings.RUNNER_HEARTBEAT_TIMEOUT)
+    candidates = RunnerInfo.objects.filter(
+        Q(last_contact__lt=deadline) | Q(last_contact__isnull=True), state__in=ONLINE_STATES
+    ).only("id", "last_contact")
+    contacts = heartbeats.last_contacts(candidates)
+    return [
+        runner_id for runner_id, last_contact in contacts.items()
+        if last_contact is None or last_contact < deadline
+    ]
+
+
+def connected(runner_id):
+    """Count a new WebSocket connection of a runner, returns its connection generation."""
+    with transaction.atomic():
+        runners = RunnerInfo.objects.filter(pk=runner_id)
+        runners.update(connection_generation=F("connection_generation") + 1)
+        return runners.values_list("connection_generation", flat=True).get()
+
+
+def disconnected(runner_id, generation):
+    """
+    Mark a runner OFFLINE after its WebSocket connection of the given generation closed, unless it
+    connected again since; returns whether it was marked.
+    """
+    return bool(mark_offline([runner_id], connection_generation=generation))
+
+
+def mark_offline(runner_ids, connection_generation=None):
+    """
+    Mark online runners OFFLINE and move their queued jobs if possible, returns the ids marked.
+    With connection_generation, only runners whose latest connection is that one are marked.
+    """
+    runners = RunnerInfo.objects.select_for_update().filter(
+        pk__in=runner_ids, state__in=ONLINE_STATES
+    )
+    if connection_generation is not None:
+        runners = runners.filter(connection_generation=connection_generation)
+    with transaction.atomic():
+        marked = list(runners.values_list("id", flat=True))
+        RunnerInfo.objects.filter(pk__in=marked).update(state=RunnerStatus.OFFLINE)
+    if marked:
+        logger.info("Runners marked offline: %s", ", ".join(str(pk) for pk in marked))
+        requeue_jobs(marked)
+    return marked
+
+
+def requeue_jobs(runner_ids):
+    """
+    Move the queued jobs of offline runners to other online runners, with JOB_AUTO_DISPATCH only;
+    returns the number moved. Jobs no other runner can take stay where they are.
+    """
+    if not settings.JOB_AUTO_DISPATCH:
+        return 0
+
+    from job_manager.dispatch import select_runner
+    from job_manager.models import JobInfo, JobStatus
+
+    moved = 0
+    queued = JobInfo.objects.filter(assigned_runner_id__in=runner_ids, status=JobStatus.QUEUED)
+    for job_id in queued.values_list("id", flat=True):
+        try:
+            with transaction.atomic():
+                job = JobInfo.objects.select_for_update().get(pk=job_id)
+                previous = job.assigned_runner_id
+                if job.status != JobStatus.QUEUED or previous not in runner_ids:
+                    continue
+                runner = select_runner(job)
+                if runner is None:
+                    continue
+                # The new runner is notified on save, the old one must not get the job on replay
+                job.assigned_runner = runner
+                job.save(update_fields=["assigned_runner"])
+                RunnerMessage.objects.filter(
+                    runner_id=previous, message_type="new_job", payload__job_id=str(job.pk)
+                ).delete()
+                moved += 1
+        except Exception:
+            logger.exception("Could not move queued job %s of offline runner", job_id)
+    return moved
+
+
+def check_runners(now=None):
+    """Mark the runners which stopped sending heartbeats OFFLINE, returns the ids marked."""
+    return mark_offline(find_stale_runners(now))
@@ -0,0 +1,49 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from runner_manager import messaging
+from runner_manager.liveness import check_runners
+from runner_manager.provisioning import cleanup_jobs
+
+
+class Command(BaseCommand):
+    help = ("Mark runners without recent heartbeats OFFLINE and requeue their queued jobs, push "
+            "unacknowledged runner messages again and clean up the jobs of deleted runners")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running, checking the runners periodically")
+        parser.add_argument("--interval", type=float,
+                            default=settings.RUNNER_LIVENESS_CHECK_INTERVAL,
+                            help="Seconds to wait between checks with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            marked = check_runners()
+            if marked:
+                self.stdout.write(f"Marked {len(marked)} runners offline")
+            redelivered = messaging.redeliver()
+            expired = messaging.expire()
+            if redelivered or expired:
+                self.stdout.write(f"Redelivered {redelivered} runner messages, expired {expired}")
+            cleaned, failed = cleanup_jobs()
+            if cleaned or failed:
+                self.stdout.write(f"Cleaned up {cleaned} jobs of deleted runners, {failed} failed")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,41 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from runner_manager.metrics import apply_retention, rollup
+
+
+class Command(BaseCommand):
+    help = "Roll runner metric samples up per minute and hour, and apply their retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lookback", type=int, default=None,
+                            help="Seconds of samples to roll up (RUNNER_METRIC_ROLLUP_LOOKBACK)")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running, rolling up periodically")
+        parser.add_argument("--interval", type=float, default=60.0,
+                            help="Seconds to wait between runs with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            minutes, hours = rollup(lookback=options["lookback"])
+            deleted = apply_retention()
+            self.stdout.write(
+                f"Updated {minutes} minute and {hours} hour rollups, deleted {deleted} expired rows"
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
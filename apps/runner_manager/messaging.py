@@ -0,0 +1,146 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Reliable runner messages: each message to a runner gets the next sequence number of that runner
+and is stored as a RunnerMessage row until the runner acknowledges it.
+
+Runners acknowledge cumulatively (``{"type": "ack", "sequence": n}``: every message up to ``n`` was
+handled), which deletes the rows, so the table only holds messages in flight. Messages without
+acknowledgement after RUNNER_MESSAGE_ACK_TIMEOUT seconds are pushed again by the liveness monitor,
+at most RUNNER_MESSAGE_MAX_ATTEMPTS times; a reconnecting runner sends the last sequence it handled
+and gets everything after it replayed. Unacknowledged messages expire after
+RUNNER_MESSAGE_RETENTION seconds.
+
+Broadcasts to the connected runners of a pool (see broadcast_to_pool) are not sequenced: like
+application prefetch announcements they are best effort, runners missing them are not caught up.
+"""
+
+import datetime
+import logging
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ONLINE_STATES, RunnerInfo, RunnerMessage
+
+logger = logging.getLogger(__name__)
+
+
+def runner_group(runner_id):
+    """Channel group of the WebSocket of a runner."""
+    return f"runner_{runner_id}"
+
+
+def pool_group(owner_id, pool):
+    """Channel group of the WebSockets of a pool of runners, pools are named per owner."""
+    return f"pool_{owner_id}_{pool}"
+
+
+def send(runner_id, message_type, payload):
+    """Queue a message to a runner, pushed once the current transaction commits."""
+    with transaction.atomic():
+        runners = RunnerInfo.objects.filter(pk=runner_id)
+        # The UPDATE locks the runner row until commit, so sequences are unique and gapless
+        runners.update(last_message_sequence=F("last_message_sequence") + 1)
+        sequence = runners.values_list("last_message_sequence", flat=True).get()
+        message = RunnerMessage.objects.create(
+            runner_id=runner_id, sequence=sequence, message_type=message_type, payload=payload
+        )
+    transaction.on_commit(lambda: push([message]))
+    return message
+
+
+def push(messages, redelivery=False, now=None):
+    """Send messages to the WebSockets of their runners, returns the number sent."""
+    channel_layer = get_channel_layer()
+    sent = []
+    for message in messages:
+        try:
+            async_to_sync(channel_layer.group_send)(runner_group(message.runner_id), {
+                "type": "runner_message",
+                "redelivery": redelivery,
+                "message": message.to_json(),
+            })
+        except Exception as error:
+            # Left to the redelivery of the liveness monitor
+            logger.warning(f"Cannot send message {message.sequence} to runner "
+                           f"{message.runner_id}: {error}")
+        else:
+            sent.append(message.pk)
+    mark_sent(sent, now)
+    return len(sent)
+
+
+def mark_sent(message_ids, now=None):
+    """Count a delivery attempt of messages."""
+    if message_ids:
+        RunnerMessage.objects.filter(pk__in=message_ids).update(
+            sent_at=now or timezone.now(), attempts=F("attempts") + 1
+        )
+
+
+def acknowledge(runner_id, sequence):
+    """Drop the messages of a runner up to sequence, returns the number dropped."""
+    deleted, _ = RunnerMessage.objects.filter(runner_id=runner_id, sequence__lte=sequence).delete()
+    return deleted
+
+
+def pending(runner_id, after=None):
+    """Unacknowledged messages of a runner in sequence order, those after a sequence only."""
+    messages = RunnerMessage.objects.filter(runner_id=runner_id)
+    if after is not None:
+        messages = messages.filter(sequence__gt=after)
+    return list(messages.order_by("sequence"))
+
+
+def redeliver(now=None):
+    """Push again the messages of online runners left unacknowledged, returns the number sent."""
+    now = now or timezone.now()
+    deadline = now - datetime.timedelta(seconds=settings.RUNNER_MESSAGE_ACK_TIMEOUT)
+    messages = RunnerMessage.objects.filter(
+        Q(sent_at__lt=deadline) | Q(sent_at__isnull=True, created_at__lt=deadline),
+        attempts__lt=settings.RUNNER_MESSAGE_MAX_ATTEMPTS,
+        runner__state__in=ONLINE_STATES,
+    ).order_by("runner_id", "sequence")
+    return push(list(messages), redelivery=True, now=now)
+
+
+def expire(now=None):
+    """Delete the messages older than RUNNER_MESSAGE_RETENTION, returns the number deleted."""
+    now = now or timezone.now()
+    deadline = now - datetime.timedelta(seconds=settings.RUNNER_MESSAGE_RETENTION)
+    deleted, _ = RunnerMessage.objects.filter(created_at__lt=deadline).delete()
+    if deleted:
+        logger.info("Expired %d unacknowledged runner messages", deleted)
+    return deleted
+
+
+def broadcast_to_pool(owner_id, pool, message_type, payload):
+    """Send a message to the connected runners of a pool once the current transaction commits."""
+    message = {"id": str(uuid.uuid4()), "type": message_type, **payload}
+
+    def broadcast():
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                pool_group(owner_id, pool), {"type": "pool_message", "message": message}
+            )
+        except Exception as error:
+            logger.warning(f"Cannot broadcast to pool {pool}: {error}")
+
+    transaction.on_commit(broadcast)
@@ -0,0 +1,201 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner telemetry: raw samples, 1 minute and 1 hour rollups, retention and series queries.
+
+Runners push samples of their dynamic metrics (RunnerMetric). rollup() aggregates the samples of
+the last RUNNER_METRIC_ROLLUP_LOOKBACK seconds per runner and minute, then those minutes per hour,
+upserting RunnerMetricRollup rows so it can run repeatedly (and late samples are picked up).
+Aggregation happens in the database, grouped by the (runner, time) indexes. apply_retention()
+drops raw samples and rollups past their retention. Both run from manage.py rollup_runner_metrics.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, Sum
+from django.db.models.functions import TruncHour, TruncMinute
+from django.utils import timezone
+
+from .models import MetricResolution, RunnerMetric, RunnerMetricRollup
+
+RAW = "raw"
+
+METRIC_FIELDS = ["cpu_load", "memory_used", "disk_available", "gpu_utilization"]
+ROLLUP_FIELDS = [
+    "samples",
+    "cpu_load_avg",
+    "cpu_load_max",
+    "memory_used_avg",
+    "memory_used_max",
+    "disk_available_min",
+    "gpu_utilization_avg",
+    "gpu_utilization_max",
+]
+
+_UTC = datetime.timezone.utc
+
+
+def _floor(moment, resolution):
+    moment = moment.astimezone(_UTC).replace(second=0, microsecond=0)
+    if resolution == MetricResolution.HOUR:
+        moment = moment.replace(minute=0)
+    return moment
+
+
+def _upsert(rollups):
+    RunnerMetricRollup.objects.bulk_create(
+        rollups,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["runner", "resolution", "bucket"],
+        update_fields=ROLLUP_FIELDS,
+    )
+    return len(rollups)
+
+
+def _int(value):
+    return None if value is None else round(value)
+
+
+def rollup_minutes(since, until):
+    """Aggregate the raw samples of [since, until) per runner and minute."""
+    rows = (
+        RunnerMetric.objects.filter(recorded_at__gte=since, recorded_at__lt=until)
+        .annotate(minute=TruncMinute("recorded_at", tzinfo=_UTC))
+        .values("runner_id", "minute")
+        .annotate(
+            samples=Count("id"),
+            cpu_load_avg=Avg("cpu_load"),
+            cpu_load_max=Max("cpu_load"),
+            memory_used_avg=Avg("memory_used"),
+            memory_used_max=Max("memory_used"),
+            disk_available_min=Min("disk_available"),
+            gpu_utilization_avg=Avg("gpu_utilization"),
+            gpu_utilization_max=Max("gpu_utilization"),
+        )
+        .order_by()
+    )
+    return _upsert([
+        RunnerMetricRollup(
+            runner_id=row["runner_id"],
+            resolution=MetricResolution.MINUTE,
+            bucket=row["minute"],
+            samples=row["samples"],
+            cpu_load_avg=row["cpu_load_avg"],
+            cpu_load_max=row["cpu_load_max"],
+            memory_used_avg=_int(row["memory_used_avg"]),
+            memory_used_max=row["memory_used_max"],
+            disk_available_min=row["disk_available_min"],
+            gpu_utilization_avg=row["gpu_utilization_avg"],
+            gpu_utilization_max=row["gpu_utilization_max"],
+        )
+        for row in rows
+    ])
+
+
+def rollup_hours(since, until):
+    """Aggregate the minute rollups of [since, until) per runner and hour, weighting by samples."""
+    rows = (
+        RunnerMetricRollup.objects.filter(
+            resolution=MetricResolution.MINUTE, bucket__gte=since, bucket__lt=until
+        )
+        .annotate(hour=TruncHour("bucket", tzinfo=_UTC))
+        .values("runner_id", "hour")
+        .annotate(
+            total=Sum("samples"),
+            cpu_load_sum=Sum(F("cpu_load_avg") * F("samples"), output_field=FloatField()),
+            cpu_load_max=Max("cpu_load_max"),
+            memory_used_sum=Sum(F("memory_used_avg") * F("samples"), output_field=FloatField()),
+            memory_used_max=Max("memory_used_max"),
+            disk_available_min=Min("disk_available_min"),
+            gpu_samples=Sum("samples", filter=Q(gpu_utilization_avg__isnull=False)),
+            gpu_utilization_sum=Sum(
+                F("gpu_utilization_avg") * F("samples"), output_field=FloatField()
+            ),
+            gpu_utilization_max=Max("gpu_utilization_max"),
+        )
+        .order_by()
+    )
+    return _upsert([
+        RunnerMetricRollup(
+            runner_id=row["runner_id"],
+            resolution=MetricResolution.HOUR,
+            bucket=row["hour"],
+            samples=row["total"],
+            cpu_load_avg=row["cpu_load_sum"] / row["total"],
+            cpu_load_max=row["cpu_load_max"],
+            memory_used_avg=round(row["memory_used_sum"] / row["total"]),
+            memory_used_max=row["memory_used_max"],
+            disk_available_min=row["disk_available_min"],
+            gpu_utilization_avg=(row["gpu_utilization_sum"] / row["gpu_samples"]
+                                 if row["gpu_samples"] else None),
+            gpu_utilization_max=row["gpu_utilization_max"],
+        )
+        for row in rows
+    ])
+
+
+def rollup(now=None, lookback=None):
+    """Refresh the rollups of the buckets touched in the last lookback seconds (partial included)."""
+    now = now or timezone.now()
+    lookback = settings.RUNNER_METRIC_ROLLUP_LOOKBACK if lookback is None else lookback
+    minutes_since = _floor(now - datetime.timedelta(seconds=lookback), MetricResolution.MINUTE)
+    # Samples are timestamped by the runners, allow for some clock skew
+    until = now + datetime.timedelta(minutes=1)
+    minutes = rollup_minutes(minutes_since, until)
+    hours = rollup_hours(_floor(minutes_since, MetricResolution.HOUR), until)
+    return minutes, hours
+
+
+def apply_retention(now=None):
+    """Delete samples and rollups past their retention, returns the number of rows deleted."""
+    now = now or timezone.now()
+
+    def before(seconds):
+        return now - datetime.timedelta(seconds=seconds)
+
+    deleted = RunnerMetric.objects.filter(
+        recorded_at__lt=before(settings.RUNNER_METRIC_RETENTION_RAW)
+    ).delete()[0]
+    for resolution, retention in (
+        (MetricResolution.MINUTE, settings.RUNNER_METRIC_RETENTION_MINUTE),
+        (MetricResolution.HOUR, settings.RUNNER_METRIC_RETENTION_HOUR),
+    ):
+        deleted += RunnerMetricRollup.objects.filter(
+            resolution=resolution, bucket__lt=before(retention)
+        ).delete()[0]
+    return deleted
+
+
+def series(runner_ids, resolution, since, until):
+    """
+    Return (fields, series) of runners over [since, until): series maps each runner id with data
+    to its rows, lists of values in the order of fields, oldest first. One indexed query.
+    """
+    if resolution == RAW:
+        fields = ["recorded_at"] + METRIC_FIELDS
+        queryset = RunnerMetric.objects.filter(
+            runner_id__in=runner_ids, recorded_at__gte=since, recorded_at__lt=until
+        ).order_by("runner_id", "recorded_at")
+    else:
+        fields = ["bucket"] + ROLLUP_FIELDS
+        queryset = RunnerMetricRollup.objects.filter(
+            runner_id__in=runner_ids, resolution=resolution, bucket__gte=since, bucket__lt=until
+        ).order_by("runner_id", "bucket")
+
+    result = {}
+    for runner_id, *values in queryset.values_list("runner_id", *fields):
+        result.setdefault(str(runner_id), []).append(values)
+    return fields, result
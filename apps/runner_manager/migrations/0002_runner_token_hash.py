@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:06
+
+from django.db import migrations, models
+
+from runner_manager.tokens import hash_token, token_prefix
+
+BATCH_SIZE = 2000
+
+
+def hash_tokens(apps, schema_editor):
+    """Replace the stored tokens by their prefix and keyed hash, runners keep their tokens."""
+    RunnerInfo = apps.get_model('runner_manager', 'RunnerInfo')
+    batch = []
+    for runner in RunnerInfo.objects.only('id', 'token').iterator(chunk_size=BATCH_SIZE):
+        if runner.token:
+            runner.token_prefix = token_prefix(runner.token)
+            runner.token_hash = hash_token(runner.token)
+            batch.append(runner)
+        if len(batch) == BATCH_SIZE:
+            RunnerInfo.objects.bulk_update(batch, ['token_prefix', 'token_hash'])
+            batch = []
+    RunnerInfo.objects.bulk_update(batch, ['token_prefix', 'token_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='runnerinfo',
+            name='token_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='runnerinfo',
+            name='token_prefix',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=8),
+        ),
+        # Tokens cannot be recovered from their hashes: migrating back leaves runners without one,
+        # they have to be added again
+        migrations.RunPython(hash_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='runnerinfo',
+            name='token',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0002_runner_token_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='runnerinfo',
+            index=models.Index(fields=['state', 'last_contact'], name='runner_state_contact_idx'),
+        ),
+    ]
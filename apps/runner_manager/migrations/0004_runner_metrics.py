@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0003_runner_state_contact_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RunnerMetric',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('recorded_at', models.DateTimeField()),
+                ('cpu_load', models.FloatField()),
+                ('memory_used', models.BigIntegerField()),
+                ('disk_available', models.BigIntegerField()),
+                ('gpu_utilization', models.FloatField(null=True)),
+                ('runner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='runner_manager.runnerinfo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['runner', 'recorded_at'], name='runner_metric_time_idx'), models.Index(fields=['recorded_at'], name='runner_metric_retention_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RunnerMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('resolution', models.CharField(choices=[('1m', '1 minute'), ('1h', '1 hour')], max_length=2)),
+                ('bucket', models.DateTimeField()),
+                ('samples', models.PositiveIntegerField()),
+                ('cpu_load_avg', models.FloatField()),
+                ('cpu_load_max', models.FloatField()),
+                ('memory_used_avg', models.BigIntegerField()),
+                ('memory_used_max', models.BigIntegerField()),
+                ('disk_available_min', models.BigIntegerField()),
+                ('gpu_utilization_avg', models.FloatField(null=True)),
+                ('gpu_utilization_max', models.FloatField(null=True)),
+                ('runner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_rollups', to='runner_manager.runnerinfo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolution', 'bucket'], name='runner_rollup_retention_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='runnermetricrollup',
+            constraint=models.UniqueConstraint(fields=('runner', 'resolution', 'bucket'), name='unique_runner_metric_rollup'),
+        ),
+    ]
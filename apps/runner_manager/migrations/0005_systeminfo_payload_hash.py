@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0004_runner_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systeminfo',
+            name='payload_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0005_systeminfo_payload_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='runnerinfo',
+            name='last_message_sequence',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='RunnerMessage',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('message_type', models.CharField(max_length=50)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('runner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='runner_manager.runnerinfo')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='runnermessage',
+            constraint=models.UniqueConstraint(fields=('runner', 'sequence'), name='unique_runner_message'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:27
+
+import django.core.validators
+import runner_manager.selectors
+from django.db import migrations, models
+
+
+def create_labels_index(apps, schema_editor):
+    # GIN index of label containment (labels @> '{"key": "value"}'), PostgreSQL only
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX runner_labels_gin_idx ON runner_manager_runnerinfo '
+            'USING gin (labels jsonb_path_ops)'
+        )
+
+
+def drop_labels_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS runner_labels_gin_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0006_runner_messages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='runnerinfo',
+            name='labels',
+            field=models.JSONField(blank=True, default=dict, validators=[runner_manager.selectors.validate_labels]),
+        ),
+        migrations.AddField(
+            model_name='runnerinfo',
+            name='pool',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=50, validators=[django.core.validators.RegexValidator('^[A-Za-z0-9_.-]*$', 'Pool names are letters, digits, _ . and -.')]),
+        ),
+        migrations.RunPython(create_labels_index, drop_labels_index),
+    ]
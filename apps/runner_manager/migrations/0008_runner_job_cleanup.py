@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0007_runner_pools_labels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RunnerJobCleanup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('job_id', models.UUIDField(unique=True)),
+                ('runner_id', models.UUIDField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner_manager', '0008_runner_job_cleanup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='runnerinfo',
+            name='connection_generation',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -11,11 +11,17 @@
 # You should have received a copy of the GNU General Public License along with this program. If not,
 #  see <https://www.gnu.org/licenses/>.
 
+import hashlib
+import json
 import uuid
 
 from django.conf import settings
+from django.core.validators import RegexValidator
 from django.db import models
 
+from .selectors import validate_labels
+from .tokens import hash_token, token_prefix, verify_token
+
 
 class RunnerStatus(models.TextChoices):
     IDLE = "ID", ("IDLE")
@@ -24,12 +30,21 @@ class RunnerStatus(models.TextChoices):
     UNREGISTERED = "UR", ("UNREGISTERED")
 
 
+# States of runners able to take jobs
+ONLINE_STATES = [RunnerStatus.IDLE, RunnerStatus.BUSY]
+
+# Pool names are part of channel group names, see runner_manager.messaging.pool_group
+validate_pool = RegexValidator(r"^[A-Za-z0-9_.-]*$", "Pool names are letters, digits, _ . and -.")
+
+
 class RunnerInfo(models.Model):
 
     # meta data
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=100, blank=False, null=False, default="")
-    token = models.CharField(max_length=100, blank=False, null=False, default="")
+    # The token itself is not stored, see runner_manager.tokens
+    token_prefix = models.CharField(max_length=8, default="", db_index=True, editable=False)
+    token_hash = models.CharField(max_length=64, default="", editable=False)
     state = models.CharField(
         max_length=20,
         default=RunnerStatus.UNREGISTERED.value,
@@ -40,6 +55,68 @@ class RunnerInfo(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     last_contact = models.DateTimeField(blank=True, null=True)
+    # Routing: jobs select runners by pool and labels, see runner_manager.selectors
+    pool = models.CharField(
+        max_length=50, blank=True, default="", db_index=True, validators=[validate_pool]
+    )
+    labels = models.JSONField(default=dict, blank=True, validators=[validate_labels])
+    # Sequence of the last message queued for the runner, see runner_manager.messaging
+    last_message_sequence = models.PositiveBigIntegerField(default=0, editable=False)
+    # Number of the runner's latest WebSocket connection, see runner_manager.liveness
+    connection_generation = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Liveness monitor: online runners with an old last contact
+            models.Index(fields=["state", "last_contact"], name="runner_state_contact_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Token hash as loaded, so a rotation can invalidate the cached lookup of the old one
+        if "token_hash" in field_names:
+            instance._loaded_token_hash = values[field_names.index("token_hash")]
+        return instance
+
+    @classmethod
+    def get_by_token(cls, token, queryset=None):
+        """Return the runner of a token or None: one probe of the prefix index, then a
+        constant-time compare of the hash."""
+        if not token:
+            return None
+        queryset = cls.objects.all() if queryset is None else queryset
+        for runner in queryset.filter(token_prefix=token_prefix(token)):
+            if runner.check_token(token):
+                return runner
+        return None
+
+    @property
+    def token(self):
+        """The plain token, only known on the instance that issued it."""
+        return getattr(self, "_token", None)
+
+    @token.setter
+    def token(self, token):
+        self._token = token
+        self.token_prefix = token_prefix(token)
+        self.token_hash = hash_token(token)
+
+    def check_token(self, token):
+        return verify_token(token, self.token_hash)
+
+    def save(self, *args, **kwargs):
+        # The message sequence and connection generation only move forward with an UPDATE (see
+        # runner_manager.messaging and liveness), a full save of an instance loaded earlier must
+        # not rewind them
+        if kwargs.get("update_fields") is None and not self._state.adding:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name not in ("last_message_sequence", "connection_generation")
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Runner {self.id} - Owner: {self.owner} - State: {self.state}"
@@ -92,16 +169,31 @@ class SystemInfo(models.Model):
     gpu_core_count = models.IntegerField(null=True)
     gpu_driver_version = models.CharField(max_length=100, null=True)
 
+    # SHA-256 of the last payload reported through update_system, see hash_payload()
+    payload_hash = models.CharField(max_length=64, default="", editable=False)
+
+    @classmethod
+    def reported_fields(cls):
+        """Names of the fields a runner may report."""
+        return [field.name for field in cls._meta.concrete_fields
+                if field.name not in ("id", "runner", "payload_hash")]
+
+    @staticmethod
+    def hash_payload(payload):
+        """SHA-256 of the canonical JSON of a reported payload."""
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
     def to_json(self):
         return {
             "id": self.id,
-            "runner_id": self.runner.id,
+            "runner_id": self.runner_id,
             "system_name": self.system_name,
             "system_release": self.system_release,
             "system_version": self.system_version,
             "system_architecture": self.system_architecture,
             "cpu_model": self.cpu_model,
-            "cpu_clock_speed_advertised": self.cpu_clock_speed,
+            "cpu_clock_speed_advertised": self.cpu_clock_speed_advertised,
             "cpu_clock_speed_actual": self.cpu_clock_speed_actual,
             "cpu_logical_cores": self.cpu_logical_cores,
             "cpu_physical_cores": self.cpu_physical_cores,
@@ -122,3 +214,110 @@ class SystemInfo(models.Model):
 
     def __str__(self):
         return f"System {self.id} - Runner: {self.runner}"
+
+
+# ---------------------------------------------------------------------------------
+
+
+class RunnerMetric(models.Model):
+    """
+    Sample of the dynamic metrics of a runner, kept RUNNER_METRIC_RETENTION_RAW seconds and
+    summarised in RunnerMetricRollup (see runner_manager.metrics).
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    runner = models.ForeignKey(RunnerInfo, on_delete=models.CASCADE, related_name="metrics")
+    recorded_at = models.DateTimeField()
+
+    cpu_load = models.FloatField()
+    memory_used = models.BigIntegerField()
+    disk_available = models.BigIntegerField()
+    gpu_utilization = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["runner", "recorded_at"], name="runner_metric_time_idx"),
+            models.Index(fields=["recorded_at"], name="runner_metric_retention_idx"),
+        ]
+
+
+class MetricResolution(models.TextChoices):
+    MINUTE = "1m", ("1 minute")
+    HOUR = "1h", ("1 hour")
+
+
+class RunnerMetricRollup(models.Model):
+    """Aggregate of the metric samples of a runner over a minute or an hour."""
+
+    id = models.BigAutoField(primary_key=True)
+    runner = models.ForeignKey(RunnerInfo, on_delete=models.CASCADE, related_name="metric_rollups")
+    resolution = models.CharField(max_length=2, choices=MetricResolution.choices)
+    bucket = models.DateTimeField()
+    samples = models.PositiveIntegerField()
+
+    cpu_load_avg = models.FloatField()
+    cpu_load_max = models.FloatField()
+    memory_used_avg = models.BigIntegerField()
+    memory_used_max = models.BigIntegerField()
+    disk_available_min = models.BigIntegerField()
+    gpu_utilization_avg = models.FloatField(null=True)
+    gpu_utilization_max = models.FloatField(null=True)
+
+    class Meta:
+        constraints = [
+            # Also the index of the series queries
+            models.UniqueConstraint(
+                fields=["runner", "resolution", "bucket"], name="unique_runner_metric_rollup"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["resolution", "bucket"], name="runner_rollup_retention_idx"),
+        ]
+
+
+class RunnerMessage(models.Model):
+    """
+    WebSocket message to a runner, kept until the runner acknowledges its sequence (see
+    runner_manager.messaging).
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    runner = models.ForeignKey(RunnerInfo, on_delete=models.CASCADE, related_name="messages")
+    sequence = models.PositiveBigIntegerField()
+    message_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index of acknowledgements and replays
+            models.UniqueConstraint(fields=["runner", "sequence"], name="unique_runner_message"),
+        ]
+
+    def to_json(self):
+        return {
+            "id": str(self.sequence),
+            "sequence": self.sequence,
+            "type": self.message_type,
+            **self.payload,
+        }
+
+
+class RunnerJobCleanup(models.Model):
+    """
+    Durable queue of the unfinished jobs of deleted runners.
+
+    Runner deletes enqueue the jobs in the same transaction, the liveness monitor dispatches the
+    queued ones again and fails the others in batches (see runner_manager.provisioning).
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    # Not a foreign key, so that job deletes do not pay for this queue; gone jobs are skipped
+    job_id = models.UUIDField(unique=True)
+    # The deleted runner, for the logs
+    runner_id = models.UUIDField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
@@ -0,0 +1,144 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Bulk runner provisioning and teardown.
+
+Provisioning creates any number of runners with fresh tokens in one transaction and one INSERT.
+Tokens are never kept in clear: a client which lost them can have them reissued while the runners
+are still unregistered.
+Deleting runners (one, or a whole pool) enqueues their unfinished jobs in RunnerJobCleanup in the
+same transaction; cleanup_jobs(), run by the liveness monitor, then dispatches the queued ones
+again (with JOB_AUTO_DISPATCH) and fails the others as terminated.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from job_manager.models import FINISHED_STATUSES, JobInfo, JobStatus
+
+from . import token_cache
+from .models import RunnerInfo, RunnerJobCleanup, RunnerStatus
+from .tokens import generate_token
+
+logger = logging.getLogger(__name__)
+
+
+def provision_runners(owner, count, name_prefix="runner", pool="", labels=None):
+    """Create count runners of owner, returns them (their plain token included) in name order."""
+    width = len(str(count))
+    runners = []
+    for index in range(1, count + 1):
+        runner = RunnerInfo(
+            owner=owner,
+            name=f"{name_prefix}-{index:0{width}d}",
+            state=RunnerStatus.UNREGISTERED,
+            pool=pool,
+            labels=labels or {},
+        )
+        runner.token = generate_token()
+        runners.append(runner)
+
+    with transaction.atomic():
+        RunnerInfo.objects.bulk_create(runners)
+    # bulk_create sends no post_save, forget lookups cached for these tokens like the signal does
+    token_cache.invalidate(*(runner.token_hash for runner in runners))
+    return runners
+
+
+def reissue_tokens(owner, runner_ids):
+    """
+    Give fresh tokens to the runners of owner among runner_ids still UNREGISTERED, for a client
+    which lost the response provisioning them; returns {runner id: token}. Registered runners are
+    left alone, registration gave them a token of their own.
+    """
+    with transaction.atomic():
+        runners = list(
+            RunnerInfo.objects.select_for_update()
+            .filter(owner=owner, pk__in=runner_ids, state=RunnerStatus.UNREGISTERED)
+            .only("id", "token_prefix", "token_hash")
+        )
+        previous = [runner.token_hash for runner in runners]
+        for runner in runners:
+            runner.token = generate_token()
+        RunnerInfo.objects.bulk_update(runners, ["token_prefix", "token_hash"])
+    token_cache.invalidate(*previous)
+    return {str(runner.id): runner.token for runner in runners}
+
+
+def delete_runners(runners):
+    """
+    Delete runners (a queryset) and enqueue their unfinished jobs for cleanup, returns the number
+    of runners deleted and of unfinished jobs found (some may have been queued already).
+    """
+    with transaction.atomic():
+        runner_ids = list(runners.select_for_update().values_list("id", flat=True))
+        jobs = list(
+            JobInfo.objects.filter(assigned_runner_id__in=runner_ids)
+            .exclude(status__in=FINISHED_STATUSES)
+            .values_list("id", "assigned_runner_id")
+        )
+        # With ignore_conflicts, bulk_create returns every object, inserted or not
+        RunnerJobCleanup.objects.bulk_create(
+            [RunnerJobCleanup(job_id=job_id, runner_id=runner_id) for job_id, runner_id in jobs],
+            ignore_conflicts=True,
+        )
+        RunnerInfo.objects.filter(pk__in=runner_ids).delete()
+    return len(runner_ids), len(jobs)
+
+
+def cleanup_jobs(batch_size=500, max_attempts=5):
+    """
+    Clean up one batch of the jobs of deleted runners: queued jobs are dispatched again (with
+    JOB_AUTO_DISPATCH), the others marked FAILED_TERMINATED. Entries that fail are kept with their
+    error until they reach max_attempts. Returns (jobs cleaned up, entries failed).
+    """
+    from job_manager.dispatch import dispatch_job
+
+    done, failed = [], 0
+    with transaction.atomic():
+        entries = list(
+            RunnerJobCleanup.objects.select_for_update(skip_locked=True)
+            .filter(attempts__lt=max_attempts)
+            .order_by("attempts", "id")[:batch_size]
+        )
+        jobs = JobInfo.objects.in_bulk([entry.job_id for entry in entries])
+        for entry in entries:
+            job = jobs.get(entry.job_id)
+            if job is None:
+                # Deleted since
+                done.append(entry.id)
+                continue
+            try:
+                with transaction.atomic():
+                    if job.status == JobStatus.QUEUED:
+                        if settings.JOB_AUTO_DISPATCH and job.assigned_runner_id is None:
+                            dispatch_job(job)
+                    elif job.status not in FINISHED_STATUSES:
+                        job.status = JobStatus.FAILED_TERMINATED
+                        job.save(update_fields=["status"])
+            except Exception as e:
+                logger.warning(f"Failed to clean up job {entry.job_id} of deleted runner "
+                               f"{entry.runner_id}: {e}")
+                entry.attempts += 1
+                entry.last_error = str(e)
+                entry.save(update_fields=["attempts", "last_error"])
+                failed += 1
+                continue
+            done.append(entry.id)
+
+        RunnerJobCleanup.objects.filter(id__in=done).delete()
+
+    return len(done), failed
@@ -0,0 +1,150 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner labels and label selectors.
+
+Labels are string key/value pairs stored in ``RunnerInfo.labels`` (GIN-indexed on PostgreSQL).
+Selectors follow Kubernetes label selectors: comma separated requirements a runner must all meet.
+
+    gpu=a100,site in (lyon, paris),!spot,memory!=small,licensed
+
+``key=value`` (or ``==``), ``key!=value`` (the label differs or is not set), ``key in (a, b)``,
+``key notin (a, b)`` (not set counts as not in), ``key`` (the label is set) and ``!key`` (it is
+not). On PostgreSQL, equality and ``in`` use JSON containment so that the GIN index applies.
+"""
+
+import re
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.lookups import Exact, In
+
+KEY_PATTERN = r"[A-Za-z0-9](?:[A-Za-z0-9_./-]{0,61}[A-Za-z0-9])?"
+VALUE_PATTERN = r"[A-Za-z0-9](?:[A-Za-z0-9_.-]{0,61}[A-Za-z0-9])?"
+MAX_LABELS = 64
+
+EQUALS = "="
+NOT_EQUALS = "!="
+IN = "in"
+NOT_IN = "notin"
+EXISTS = "exists"
+NOT_EXISTS = "!"
+
+Requirement = namedtuple("Requirement", ["key", "operator", "values"])
+
+_KEY = re.compile(KEY_PATTERN)
+_VALUE = re.compile(VALUE_PATTERN)
+_REQUIREMENT = re.compile(
+    rf"""\s*(?:
+        !\s*(?P<absent>{KEY_PATTERN})
+        | (?P<key>{KEY_PATTERN})
+          (?: \s*(?P<operator>==|=|!=)\s*(?P<value>{VALUE_PATTERN})
+            | \s+(?P<set_operator>in|notin)\s*\((?P<values>[^()]*)\)
+          )?
+    )\s*(?:,|$)""",
+    re.VERBOSE,
+)
+
+
+def validate_labels(labels):
+    """Validator of runner labels: a dict of label keys to label values."""
+    if not isinstance(labels, dict):
+        raise ValidationError("Labels must be an object of keys to values.")
+    if len(labels) > MAX_LABELS:
+        raise ValidationError(f"At most {MAX_LABELS} labels.")
+    for key, value in labels.items():
+        if not _KEY.fullmatch(key):
+            raise ValidationError(f"Invalid label key: {key!r}.")
+        if not isinstance(value, str) or not _VALUE.fullmatch(value):
+            raise ValidationError(f"Invalid value of label {key!r}: {value!r}.")
+
+
+def parse_selector(selector):
+    """Parse a selector into a list of requirements, raises ValidationError when malformed."""
+    requirements = []
+    position = 0
+    while position < len(selector) and not selector[position:].isspace():
+        match = _REQUIREMENT.match(selector, position)
+        if match is None or match.end() == position:
+            raise ValidationError(f"Invalid selector at position {position}: {selector!r}.")
+        if match["absent"]:
+            requirements.append(Requirement(match["absent"], NOT_EXISTS, ()))
+        elif match["operator"]:
+            operator = NOT_EQUALS if match["operator"] == "!=" else EQUALS
+            requirements.append(Requirement(match["key"], operator, (match["value"],)))
+        elif match["set_operator"]:
+            values = tuple(value.strip() for value in match["values"].split(","))
+            if not all(_VALUE.fullmatch(value) for value in values):
+                raise ValidationError(f"Invalid values of {match['key']!r}: {selector!r}.")
+            operator = IN if match["set_operator"] == "in" else NOT_IN
+            requirements.append(Requirement(match["key"], operator, values))
+        else:
+            requirements.append(Requirement(match["key"], EXISTS, ()))
+        position = match.end()
+    return requirements
+
+
+def validate_selector(selector):
+    """Validator of selector strings."""
+    parse_selector(selector)
+
+
+def matches(labels, requirements):
+    """Whether labels meet all the requirements of a parsed selector."""
+    for key, operator, values in requirements:
+        value = labels.get(key)
+        if operator == EXISTS:
+            met = key in labels
+        elif operator == NOT_EXISTS:
+            met = key not in labels
+        elif operator in (EQUALS, IN):
+            met = value in values
+        else:
+            met = value not in values
+        if not met:
+            return False
+    return True
+
+
+def selector_q(requirements, vendor, field="labels"):
+    """
+    Filter of the rows whose labels field meets the requirements, for a database vendor
+    (connection.vendor).
+    """
+    q = Q()
+    for key, operator, values in requirements:
+        has_key = Q(**{f"{field}__has_key": key})
+        if operator == EXISTS:
+            q &= has_key
+            continue
+        if operator == NOT_EXISTS:
+            q &= ~has_key
+            continue
+
+        if vendor == "postgresql":
+            # Containment is what the GIN (jsonb_path_ops) index serves
+            one_of = Q()
+            for value in values:
+                one_of |= Q(**{f"{field}__contains": {key: value}})
+        else:
+            text = KeyTextTransform(key, field)
+            one_of = Q(Exact(text, values[0]) if len(values) == 1 else In(text, list(values)))
+
+        if operator in (EQUALS, IN):
+            q &= one_of
+        else:
+            q &= ~has_key | ~one_of
+    return q
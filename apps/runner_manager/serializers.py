@@ -11,17 +11,24 @@
 # You should have received a copy of the GNU General Public License along with this program. If not,
 #  see <https://www.gnu.org/licenses/>.
 
+import datetime
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import RunnerInfo
+from . import heartbeats
+from .metrics import RAW
+from .models import MetricResolution, RunnerInfo, RunnerMetric, validate_pool
+from .selectors import validate_labels
 
 
 class RunnerInfoFullSerializer(serializers.ModelSerializer):
     """
-    Full runner info serializer including auth token.
-    
-    Generally don't use this serializer - it contains the auth token,
-    so we don't want to pass that around too much.
+    Full runner info serializer including the token prefix.
+
+    Tokens are only stored hashed, the prefix is enough to tell them apart.
     """
 
     class Meta:
@@ -31,22 +38,109 @@ class RunnerInfoFullSerializer(serializers.ModelSerializer):
             "name",
             "state",
             "owner",
-            "token",
+            "token_prefix",
+            "pool",
+            "labels",
             "created_at",
             "last_contact",
         ]
-        read_only_fields = ["id", "owner", "created_at", "token"]
+        read_only_fields = ["id", "owner", "created_at", "token_prefix"]
+
+
+class RunnerInfoListSerializer(serializers.ListSerializer):
+    """Reads the cached heartbeats of all the runners listed at once, see RunnerInfoSerializer."""
+
+    def to_representation(self, data):
+        runners = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.context["last_contacts"] = heartbeats.last_contacts(runners)
+        return super().to_representation(runners)
 
 
 class RunnerInfoSerializer(serializers.ModelSerializer):
     class Meta:
         model = RunnerInfo
+        list_serializer_class = RunnerInfoListSerializer
         fields = [
             "id",
             "name",
             "state",
             "owner",
+            "pool",
+            "labels",
             "created_at",
             "last_contact",
         ]
         read_only_fields = ["id", "owner", "created_at"]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Heartbeats reach the database in bulk, the cached one may be newer
+        contacts = self.context.get("last_contacts")
+        if contacts is not None and instance.pk in contacts:
+            last_contact = contacts[instance.pk]
+        else:
+            last_contact = heartbeats.last_contact(instance)
+        if last_contact is not None:
+            data["last_contact"] = self.fields["last_contact"].to_representation(last_contact)
+        return data
+
+
+class RunnerMetricSerializer(serializers.ModelSerializer):
+    recorded_at = serializers.DateTimeField(required=False)
+
+    class Meta:
+        model = RunnerMetric
+        fields = ["recorded_at", "cpu_load", "memory_used", "disk_available", "gpu_utilization"]
+        extra_kwargs = {
+            "cpu_load": {"min_value": 0},
+            "memory_used": {"min_value": 0},
+            "disk_available": {"min_value": 0},
+            "gpu_utilization": {"min_value": 0, "max_value": 100, "required": False},
+        }
+
+
+class RunnerMetricQuerySerializer(serializers.Serializer):
+    # Default and longest time window of a query, per resolution
+    WINDOWS = {
+        RAW: (datetime.timedelta(minutes=10), datetime.timedelta(hours=1)),
+        MetricResolution.MINUTE: (datetime.timedelta(hours=1), datetime.timedelta(days=1)),
+        MetricResolution.HOUR: (datetime.timedelta(days=7), datetime.timedelta(days=400)),
+    }
+
+    resolution = serializers.ChoiceField(
+        choices=[RAW, *MetricResolution.values], default=MetricResolution.MINUTE
+    )
+    runner = serializers.ListField(child=serializers.UUIDField(), required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        default_window, max_window = self.WINDOWS[data["resolution"]]
+        data.setdefault("until", timezone.now())
+        data.setdefault("since", data["until"] - default_window)
+        if data["since"] >= data["until"]:
+            raise serializers.ValidationError("since must be before until.")
+        if data["until"] - data["since"] > max_window:
+            raise serializers.ValidationError(
+                f"The time window of {data['resolution']} series is at most {max_window}."
+            )
+        return data
+
+
+class RunnerProvisionSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, help_text="Number of runners to create")
+    name_prefix = serializers.CharField(
+        max_length=80, default="runner",
+        help_text="Runners are named <name_prefix>-<number>, numbered from 1"
+    )
+    pool = serializers.CharField(
+        max_length=50, allow_blank=True, default="", validators=[validate_pool]
+    )
+    labels = serializers.JSONField(default=dict, validators=[validate_labels])
+
+    def validate_count(self, count):
+        if count > settings.RUNNER_PROVISION_MAX:
+            raise serializers.ValidationError(
+                f"At most {settings.RUNNER_PROVISION_MAX} runners per request."
+            )
+        return count
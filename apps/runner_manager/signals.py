@@ -0,0 +1,47 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import token_cache
+from .models import RunnerInfo
+
+
+@receiver(post_save, sender=RunnerInfo)
+def invalidate_rotated_token(sender, instance, created, update_fields=None, **kwargs):
+    """Forget the lookup of a runner's previous token once it is replaced"""
+    loaded = getattr(instance, "_loaded_token_hash", None)
+    if created:
+        # No stale lookup (e.g. of a rolled back runner) may shadow a newly issued token
+        token_cache.invalidate(instance.token_hash)
+    elif loaded and loaded != instance.token_hash:
+        token_cache.invalidate(loaded)
+    elif update_fields is None or "pool" in update_fields:
+        # The WebSocket of the runner joins the channel group of its cached pool
+        token_cache.invalidate(instance.token_hash)
+    instance._loaded_token_hash = instance.token_hash
+
+
+@receiver(post_delete, sender=RunnerInfo)
+def invalidate_deleted_runner(sender, instance, **kwargs):
+    token_cache.invalidate(instance.token_hash)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_owner_runners(sender, instance, created, update_fields=None, **kwargs):
+    """Cached runners carry their owner, drop them when it changes (e.g. is deactivated)"""
+    if created or update_fields == frozenset({"last_login"}):
+        return
+    token_cache.invalidate_owner(instance.pk)
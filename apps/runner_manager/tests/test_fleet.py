@@ -0,0 +1,102 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from application_registry.models import AppInfo
+from job_manager.models import JobInfo, JobStatus
+from runner_manager.models import RunnerInfo, RunnerStatus, SystemInfo
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+@override_settings(FLEET_OVERVIEW_CACHE_TTL=0, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class FleetOverviewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='owner', password='pass', is_staff=True, is_superuser=True
+        )
+        self.app = AppInfo.objects.create(name='app', file_path='app.py')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.count = 0
+
+    def add_runners(self, count):
+        for _ in range(count):
+            self.count += 1
+            runner = RunnerInfo.objects.create(
+                owner=self.user, name=f'runner{self.count:02d}', token=f'token{self.count}',
+                state=RunnerStatus.IDLE, last_contact=timezone.now(),
+            )
+            SystemInfo.objects.create(runner=runner, cpu_logical_cores=8,
+                                      cpu_clock_speed_advertised=3.2)
+            for status in (JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.SUCCEEDED):
+                JobInfo.objects.create(name='job', created_by=self.user, application_id=self.app,
+                                       assigned_runner=runner, status=status)
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_overview(self):
+        self.add_runners(1)
+        RunnerInfo.objects.create(
+            owner=self.user, name='runner99', token='stale', state=RunnerStatus.BUSY,
+            last_contact=timezone.now() - datetime.timedelta(hours=1),
+        )
+        data = self.client.get('/runner_manager/users/fleet/').json()
+
+        self.assertEqual([runner['name'] for runner in data], ['runner01', 'runner99'])
+        self.assertEqual((data[0]['queued_jobs'], data[0]['active_jobs']), (1, 1))
+        self.assertTrue(data[0]['alive'])
+        self.assertEqual(data[0]['system']['cpu_clock_speed_advertised'], 3.2)
+        self.assertEqual(data[0]['system']['runner_id'], data[0]['id'])
+        self.assertFalse(data[1]['alive'])
+        self.assertIsNone(data[1]['system'])
+
+    def test_pools(self):
+        self.add_runners(2)
+        RunnerInfo.objects.filter(name='runner01').update(pool='gpu')
+        RunnerInfo.objects.filter(name='runner02').update(pool='gpu', state=RunnerStatus.OFFLINE)
+        data = self.client.get('/runner_manager/users/pools/').json()
+        self.assertEqual(data, [{'pool': 'gpu', 'runners': 2, 'online': 1}])
+
+    def test_query_budget(self):
+        self.add_runners(2)
+        with self.assertNumQueries(2):
+            self.client.get('/runner_manager/users/fleet/')
+        self.add_runners(5)
+        with self.assertNumQueries(2):
+            self.client.get('/runner_manager/users/fleet/')
+
+    @override_settings(FLEET_OVERVIEW_CACHE_TTL=5)
+    def test_overview_is_cached(self):
+        self.add_runners(1)
+        self.client.get('/runner_manager/users/fleet/')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get('/runner_manager/users/fleet/').json()), 1)
+
+    def test_admin_list_query_budget(self):
+        self.client.force_login(self.user)
+        self.add_runners(2)
+        few = self.queries('/admin/runner_manager/runnerinfo/')
+        self.add_runners(5)
+        self.assertEqual(self.queries('/admin/runner_manager/runnerinfo/'), few)
+
+    def test_get_system(self):
+        self.client.force_login(self.user)
+        self.add_runners(3)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/runner_manager/get_system/')
+        self.assertEqual(len(response.json()['data']), 3)
+        self.add_runners(3)
+        self.assertEqual(self.queries('/runner_manager/get_system/'), len(context))
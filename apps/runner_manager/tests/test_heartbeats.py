@@ -0,0 +1,109 @@
+import datetime
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from runner_manager import heartbeats
+from runner_manager.models import RunnerInfo, RunnerStatus
+
+
+@override_settings(RUNNER_HEARTBEAT_FLUSH_INTERVAL=3600)
+class HeartbeatTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        heartbeats.flush()
+        self.addCleanup(heartbeats.flush)
+        self.user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.before = timezone.now() - datetime.timedelta(minutes=10)
+        self.runners = [
+            RunnerInfo.objects.create(
+                owner=self.user, token=f'token{i}', state=RunnerStatus.IDLE,
+                last_contact=self.before,
+            )
+            for i in range(3)
+        ]
+
+    def report(self, runner, state='IDLE'):
+        response = self.client.patch(
+            reverse('report_status', args=[runner.id]),
+            data=json.dumps({'state': state}),
+            content_type='application/json',
+            HTTP_TOKEN=f'token{self.runners.index(runner)}',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_heartbeats_are_buffered_and_flushed_in_bulk(self):
+        for runner in self.runners:
+            self.report(runner)
+
+        # Not written yet, but served to liveness reads
+        self.assertEqual(RunnerInfo.objects.filter(last_contact=self.before).count(), 3)
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('get_status')).json()['data']
+        self.assertTrue(all(
+            datetime.datetime.fromisoformat(entry['last_contact']) > self.before for entry in data
+        ))
+
+        self.assertEqual(heartbeats.flush(), 3)
+        self.assertFalse(RunnerInfo.objects.filter(last_contact=self.before).exists())
+        self.assertEqual(heartbeats.flush(), 0)
+
+    def test_state_change_is_written_immediately(self):
+        runner = self.runners[0]
+        self.report(runner)
+        self.report(runner, 'BUSY')
+
+        runner.refresh_from_db()
+        self.assertEqual(runner.state, RunnerStatus.BUSY)
+        self.assertGreater(runner.last_contact, self.before)
+        self.assertEqual(heartbeats.flush(), 0)
+
+    @override_settings(RUNNER_HEARTBEAT_FLUSH_INTERVAL=0)
+    def test_zero_interval_writes_through(self):
+        self.report(self.runners[0])
+        self.runners[0].refresh_from_db()
+        self.assertGreater(self.runners[0].last_contact, self.before)
+
+    def test_flush_never_rewinds_last_contact(self):
+        older, newer = self.runners[:2]
+        heartbeats.record(older.pk, self.before - datetime.timedelta(minutes=5))
+        later = timezone.now()
+        heartbeats.record(newer.pk, later)
+        # Another process or a state change wrote a newer time meanwhile
+        RunnerInfo.objects.filter(pk=newer.pk).update(
+            last_contact=later + datetime.timedelta(seconds=30)
+        )
+
+        self.assertEqual(heartbeats.flush(), 2)
+        older.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertEqual(older.last_contact, self.before)
+        self.assertEqual(newer.last_contact, later + datetime.timedelta(seconds=30))
+
+        RunnerInfo.objects.filter(pk=older.pk).update(last_contact=None)
+        heartbeats.record(older.pk, later)
+        heartbeats.flush()
+        older.refresh_from_db()
+        self.assertEqual(older.last_contact, later)
+
+    def test_runner_list_reads_heartbeats_at_once(self):
+        for runner in self.runners:
+            self.report(runner)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        get_many = mock.patch.object(heartbeats.cache, 'get_many', wraps=heartbeats.cache.get_many)
+        with get_many as calls:
+            data = client.get('/runner_manager/users/').json()
+        self.assertEqual(calls.call_count, 1)
+        self.assertEqual(len(data), 3)
+        self.assertTrue(all(
+            datetime.datetime.fromisoformat(entry['last_contact']) > self.before for entry in data
+        ))
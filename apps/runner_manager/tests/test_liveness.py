@@ -0,0 +1,147 @@
+import datetime
+import io
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from application_registry.models import AppInfo
+from job_manager.models import JobInfo, JobStatus
+from runner_manager import heartbeats, liveness
+from runner_manager.models import RunnerInfo, RunnerStatus
+from runner_manager.routing import websocket_urlpatterns
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+@override_settings(
+    RUNNER_HEARTBEAT_TIMEOUT=60,
+    RUNNER_HEARTBEAT_FLUSH_INTERVAL=3600,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+)
+class LivenessTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        heartbeats.flush()
+        self.addCleanup(heartbeats.flush)
+        self.user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.app = AppInfo.objects.create(name='app', file_path='app.py')
+        now = timezone.now()
+        self.stale = self.create_runner('stale', now - datetime.timedelta(minutes=5))
+        self.fresh = self.create_runner('fresh', now)
+
+    def create_runner(self, token, last_contact, state=RunnerStatus.IDLE):
+        return RunnerInfo.objects.create(
+            owner=self.user, token=token, state=state, last_contact=last_contact
+        )
+
+    def create_job(self, runner, status=JobStatus.QUEUED):
+        return JobInfo.objects.create(
+            name='job', created_by=self.user, application_id=self.app,
+            assigned_runner=runner, status=status,
+        )
+
+    def test_stale_runners_go_offline(self):
+        offline = self.create_runner('offline', None, RunnerStatus.OFFLINE)
+        self.assertEqual(liveness.check_runners(), [self.stale.pk])
+
+        for runner, state in ((self.stale, RunnerStatus.OFFLINE), (self.fresh, RunnerStatus.IDLE),
+                              (offline, RunnerStatus.OFFLINE)):
+            runner.refresh_from_db()
+            self.assertEqual(runner.state, state)
+        self.assertEqual(liveness.check_runners(), [])
+
+    def test_buffered_heartbeat_spares_runner(self):
+        heartbeats.record(self.stale.pk, timezone.now())
+        self.assertEqual(liveness.check_runners(), [])
+
+    def test_queued_jobs_keep_their_runner(self):
+        queued = self.create_job(self.stale)
+        running = self.create_job(self.stale, JobStatus.RUNNING)
+        call_command('monitor_runners', stdout=io.StringIO())
+
+        queued.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(queued.assigned_runner, self.stale)
+        self.assertEqual(running.assigned_runner, self.stale)
+        # Replayed when the runner reconnects
+        self.assertTrue(self.stale.messages.filter(message_type='new_job').exists())
+
+    @override_settings(JOB_AUTO_DISPATCH=True)
+    def test_requeued_jobs_are_dispatched(self):
+        queued = self.create_job(self.stale)
+        liveness.check_runners()
+        queued.refresh_from_db()
+        self.assertEqual(queued.assigned_runner, self.fresh)
+        self.assertFalse(self.stale.messages.exists())
+        self.assertTrue(self.fresh.messages.filter(message_type='new_job').exists())
+
+    @override_settings(JOB_AUTO_DISPATCH=True)
+    def test_jobs_without_other_runner_stay(self):
+        queued = self.create_job(self.stale)
+        queued.runner_pool = 'gpu'
+        queued.save()
+        liveness.check_runners()
+        queued.refresh_from_db()
+        self.assertEqual(queued.assigned_runner, self.stale)
+
+    def test_websocket_disconnect_marks_offline(self):
+        job = self.create_job(self.fresh)
+
+        async def connect_and_close():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/runner_manager/{self.fresh.id}',
+                headers=[(b'token', b'fresh')],
+            )
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        self.assertTrue(async_to_sync(connect_and_close)())
+        self.fresh.refresh_from_db()
+        job.refresh_from_db()
+        self.assertEqual(self.fresh.state, RunnerStatus.OFFLINE)
+        self.assertEqual(job.assigned_runner, self.fresh)
+
+    def test_only_latest_connection_marks_offline(self):
+        old = liveness.connected(self.fresh.pk)
+        new = liveness.connected(self.fresh.pk)
+        # A full save of an instance loaded before does not rewind the generation
+        self.fresh.save()
+
+        self.assertFalse(liveness.disconnected(self.fresh.pk, old))
+        self.fresh.refresh_from_db()
+        self.assertEqual(self.fresh.state, RunnerStatus.IDLE)
+        self.assertTrue(liveness.disconnected(self.fresh.pk, new))
+
+    def test_late_disconnect_keeps_reconnected_runner_online(self):
+        def communicator():
+            return WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/runner_manager/{self.fresh.id}',
+                headers=[(b'token', b'fresh')],
+            )
+
+        @database_sync_to_async
+        def state():
+            return RunnerInfo.objects.get(pk=self.fresh.pk).state
+
+        async def reconnect_then_close_old():
+            old, new = communicator(), communicator()
+            await old.connect()
+            await new.connect()
+            # The close of the first connection only arrives now
+            await old.disconnect()
+            after_old = await state()
+            await new.disconnect()
+            return after_old, await state()
+
+        after_old, after_new = async_to_sync(reconnect_then_close_old)()
+        self.assertEqual(after_old, RunnerStatus.IDLE)
+        self.assertEqual(after_new, RunnerStatus.OFFLINE)
@@ -0,0 +1,187 @@
+import datetime
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from application_registry.models import AppInfo
+from job_manager.models import JobInfo, JobStatus
+from runner_manager import heartbeats, liveness, messaging
+from runner_manager.models import RunnerInfo, RunnerMessage, RunnerStatus
+from runner_manager.routing import websocket_urlpatterns
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+@override_settings(
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    RUNNER_MESSAGE_ACK_TIMEOUT=30,
+    RUNNER_MESSAGE_MAX_ATTEMPTS=2,
+    RUNNER_MESSAGE_RETENTION=3600,
+)
+class RunnerMessagingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(heartbeats.flush)
+        self.user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.runner = RunnerInfo.objects.create(
+            owner=self.user, token='secret_token', state=RunnerStatus.IDLE
+        )
+
+    def send(self, count=1, execute=False):
+        with self.captureOnCommitCallbacks(execute=execute):
+            return [messaging.send(self.runner.pk, 'notice', {'index': index})
+                    for index in range(count)]
+
+    def communicator(self, last_sequence=None):
+        headers = [(b'token', b'secret_token')]
+        if last_sequence is not None:
+            headers.append((b'last-sequence', str(last_sequence).encode()))
+        return WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f'/ws/runner_manager/{self.runner.id}',
+            headers=headers,
+        )
+
+    def sequences(self):
+        return list(self.runner.messages.order_by('sequence').values_list('sequence', flat=True))
+
+    def test_sequences(self):
+        messages = self.send(3)
+        self.assertEqual([message.sequence for message in messages], [1, 2, 3])
+        self.assertEqual(messages[1].to_json(),
+                         {'id': '2', 'sequence': 2, 'type': 'notice', 'index': 1})
+
+        # A full save of an instance loaded earlier keeps the sequence
+        self.runner.name = 'renamed'
+        self.runner.save()
+        self.assertEqual(self.send()[0].sequence, 4)
+
+        self.assertEqual(messaging.acknowledge(self.runner.pk, 2), 2)
+        self.assertEqual(self.sequences(), [3, 4])
+
+    def test_push_ack_and_replay(self):
+        self.send(2)
+
+        async def session():
+            communicator = self.communicator()
+            await communicator.connect()
+            # Pending messages are replayed on connect, then new ones pushed
+            replayed = [await communicator.receive_json_from() for _ in range(2)]
+            await database_sync_to_async(self.send)(execute=True)
+            pushed = await communicator.receive_json_from()
+            await communicator.send_json_to({'type': 'ack', 'sequence': 2})
+            await communicator.disconnect()
+            return replayed, pushed
+
+        replayed, pushed = async_to_sync(session)()
+        self.assertEqual([message['sequence'] for message in replayed], [1, 2])
+        self.assertEqual((pushed['sequence'], pushed['type']), (3, 'notice'))
+        self.assertEqual(self.sequences(), [3])
+        self.assertEqual(RunnerMessage.objects.get(sequence=3).attempts, 1)
+
+        self.send(2)
+
+        async def reconnect():
+            communicator = self.communicator(last_sequence=4)
+            await communicator.connect()
+            message = await communicator.receive_json_from()
+            nothing = await communicator.receive_nothing()
+            await communicator.disconnect()
+            return message, nothing
+
+        message, nothing = async_to_sync(reconnect)()
+        self.assertEqual(message['sequence'], 5)
+        self.assertTrue(nothing)
+
+    def test_malformed_ack(self):
+        self.send(2)
+
+        async def session():
+            communicator = self.communicator()
+            await communicator.connect()
+            for _ in range(2):
+                await communicator.receive_json_from()
+            errors = []
+            for ack in ({'type': 'ack'}, {'type': 'ack', 'sequence': 'two'},
+                        {'type': 'ack', 'sequence': None}, {'type': 'ack', 'sequence': -1},
+                        {'type': 'ack', 'sequence': [2]}, {'type': 'ack', 'sequence': 1.5}):
+                await communicator.send_json_to(ack)
+                errors.append(await communicator.receive_json_from())
+            # The connection is still usable
+            await communicator.send_json_to({'type': 'ack', 'sequence': '1'})
+            nothing = await communicator.receive_nothing()
+            await communicator.disconnect()
+            return errors, nothing
+
+        errors, nothing = async_to_sync(session)()
+        self.assertEqual({error['type'] for error in errors}, {'error'})
+        self.assertTrue(nothing)
+        self.assertEqual(self.sequences(), [2])
+
+    def test_redelivery_is_bounded(self):
+        now = timezone.now()
+        message = self.send()[0]
+        self.assertEqual(messaging.redeliver(now), 0)
+
+        later = now + datetime.timedelta(seconds=31)
+        self.assertEqual(messaging.redeliver(later), 1)
+        self.assertEqual(messaging.redeliver(later), 0)
+        self.assertEqual(messaging.redeliver(later + datetime.timedelta(seconds=31)), 1)
+        # RUNNER_MESSAGE_MAX_ATTEMPTS reached
+        self.assertEqual(messaging.redeliver(later + datetime.timedelta(minutes=5)), 0)
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 2)
+
+        self.assertEqual(messaging.expire(now), 0)
+        self.assertEqual(messaging.expire(now + datetime.timedelta(hours=2)), 1)
+
+    def test_offline_runner_is_not_pushed(self):
+        self.send()
+        RunnerInfo.objects.filter(pk=self.runner.pk).update(state=RunnerStatus.OFFLINE)
+        self.assertEqual(messaging.redeliver(timezone.now() + datetime.timedelta(minutes=5)), 0)
+
+    @override_settings(JOB_AUTO_DISPATCH=True)
+    def test_requeue_moves_job_notifications(self):
+        app = AppInfo.objects.create(name='app', file_path='app.py')
+        with self.captureOnCommitCallbacks():
+            job = JobInfo.objects.create(name='job', created_by=self.user, application_id=app,
+                                         assigned_runner=self.runner, status=JobStatus.QUEUED)
+        notification = self.runner.messages.get()
+        self.assertEqual((notification.message_type, notification.payload['job_id']),
+                         ('new_job', str(job.id)))
+
+        other = RunnerInfo.objects.create(owner=self.user, token='other_token',
+                                          state=RunnerStatus.IDLE)
+
+        self.send()
+        with self.captureOnCommitCallbacks():
+            liveness.mark_offline([self.runner.pk])
+        self.assertEqual(list(self.runner.messages.values_list('message_type', flat=True)),
+                         ['notice'])
+        self.assertEqual(other.messages.get().payload['job_id'], str(job.id))
+
+    def test_pool_broadcast(self):
+        self.runner.pool = 'gpu'
+        self.runner.save()
+
+        async def session():
+            communicator = self.communicator()
+            await communicator.connect()
+            await database_sync_to_async(self.broadcast)()
+            message = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return message
+
+        message = async_to_sync(session)()
+        self.assertEqual((message['type'], message['version']), ('drain', 2))
+        self.assertNotIn('sequence', message)
+
+    def broadcast(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            messaging.broadcast_to_pool(self.user.pk, 'gpu', 'drain', {'version': 2})
@@ -0,0 +1,129 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from runner_manager import heartbeats, metrics
+from runner_manager.models import (
+    MetricResolution,
+    RunnerInfo,
+    RunnerMetric,
+    RunnerMetricRollup,
+    RunnerStatus,
+)
+
+UTC = datetime.timezone.utc
+NOW = datetime.datetime(2025, 6, 1, 12, 30, 30, tzinfo=UTC)
+
+
+@override_settings(RUNNER_HEARTBEAT_FLUSH_INTERVAL=3600)
+class RunnerMetricTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(heartbeats.flush)
+        self.user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.other = get_user_model().objects.create_user(username='other', password='pass')
+        self.runner = RunnerInfo.objects.create(
+            owner=self.user, token='secret_token', state=RunnerStatus.IDLE
+        )
+        self.foreign = RunnerInfo.objects.create(owner=self.other, token='other_token')
+
+        self.runner_client = APIClient()
+        self.runner_client.credentials(HTTP_AUTHORIZATION='Token secret_token')
+        self.user_client = APIClient()
+        self.user_client.force_authenticate(self.user)
+
+    def sample(self, runner, seconds, cpu_load, gpu=None, memory=1000):
+        return RunnerMetric.objects.create(
+            runner=runner, recorded_at=NOW + datetime.timedelta(seconds=seconds),
+            cpu_load=cpu_load, memory_used=memory, disk_available=5000 - seconds,
+            gpu_utilization=gpu,
+        )
+
+    def test_runner_reports_samples(self):
+        response = self.runner_client.post('/runner_manager/runner/metrics/', [
+            {'cpu_load': 0.5, 'memory_used': 1024, 'disk_available': 2048},
+            {'cpu_load': 1.5, 'memory_used': 2048, 'disk_available': 1024, 'gpu_utilization': 40,
+             'recorded_at': '2025-06-01T12:00:00Z'},
+        ], format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.runner.metrics.count(), 2)
+        self.assertIsNotNone(heartbeats.last_contact(RunnerInfo.objects.get(pk=self.runner.pk)))
+
+        response = self.runner_client.post('/runner_manager/runner/metrics/', {
+            'cpu_load': 0.5, 'memory_used': 1024, 'disk_available': 2048, 'gpu_utilization': 140,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rollups(self):
+        # Two samples in 12:30, one in 12:31 (with a GPU reading), one of another runner
+        self.sample(self.runner, 0, 1.0, memory=1000)
+        self.sample(self.runner, 20, 3.0, memory=3000)
+        self.sample(self.runner, 40, 5.0, gpu=50.0, memory=2000)
+        self.sample(self.foreign, 0, 9.0)
+
+        self.assertEqual(metrics.rollup(NOW + datetime.timedelta(minutes=2)), (3, 2))
+        # Re-running updates the same buckets
+        self.assertEqual(metrics.rollup(NOW + datetime.timedelta(minutes=2)), (3, 2))
+
+        minutes = RunnerMetricRollup.objects.filter(
+            runner=self.runner, resolution=MetricResolution.MINUTE
+        ).order_by('bucket')
+        self.assertEqual([m.samples for m in minutes], [2, 1])
+        self.assertEqual(minutes[0].bucket, NOW.replace(second=0))
+        self.assertEqual((minutes[0].cpu_load_avg, minutes[0].cpu_load_max), (2.0, 3.0))
+        self.assertEqual((minutes[0].memory_used_avg, minutes[0].memory_used_max), (2000, 3000))
+        self.assertIsNone(minutes[0].gpu_utilization_avg)
+
+        hour = RunnerMetricRollup.objects.get(runner=self.runner, resolution=MetricResolution.HOUR)
+        self.assertEqual(hour.bucket, NOW.replace(minute=0, second=0))
+        self.assertEqual(hour.samples, 3)
+        self.assertEqual(hour.cpu_load_avg, 3.0)
+        self.assertEqual(hour.cpu_load_max, 5.0)
+        self.assertEqual(hour.disk_available_min, 5000 - 40)
+        self.assertEqual((hour.gpu_utilization_avg, hour.gpu_utilization_max), (50.0, 50.0))
+
+    @override_settings(RUNNER_METRIC_RETENTION_RAW=3600, RUNNER_METRIC_RETENTION_MINUTE=7200)
+    def test_retention(self):
+        self.sample(self.runner, 0, 1.0)
+        metrics.rollup(NOW)
+        self.assertEqual(metrics.apply_retention(NOW + datetime.timedelta(minutes=30)), 0)
+        # The sample and the minute rollup expire, the hour rollup is kept
+        self.assertEqual(metrics.apply_retention(NOW + datetime.timedelta(hours=3)), 2)
+        self.assertEqual(
+            list(RunnerMetricRollup.objects.values_list('resolution', flat=True)),
+            [MetricResolution.HOUR]
+        )
+
+    def test_query_series(self):
+        for seconds in (0, 20, 70):
+            self.sample(self.runner, seconds, 1.0)
+        self.sample(self.foreign, 0, 1.0)
+        metrics.rollup(NOW + datetime.timedelta(minutes=2))
+
+        params = {'since': '2025-06-01T12:00:00Z', 'until': '2025-06-01T13:00:00Z'}
+        with self.assertNumQueries(1):
+            response = self.user_client.get('/runner_manager/users/metrics/', params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['fields'][:2], ['bucket', 'samples'])
+        self.assertEqual(list(data['series']), [str(self.runner.id)])
+        self.assertEqual([row[1] for row in data['series'][str(self.runner.id)]], [2, 1])
+
+        response = self.user_client.get(
+            '/runner_manager/users/metrics/', {**params, 'resolution': 'raw'}
+        )
+        self.assertEqual(len(response.json()['series'][str(self.runner.id)]), 3)
+
+        response = self.user_client.get(
+            '/runner_manager/users/metrics/', {**params, 'runner': str(self.foreign.id)}
+        )
+        self.assertEqual(response.json()['series'], {})
+
+        response = self.user_client.get('/runner_manager/users/metrics/', {
+            'since': '2025-05-01T00:00:00Z', 'until': '2025-06-01T00:00:00Z'
+        })
+        self.assertEqual(response.status_code, 400)
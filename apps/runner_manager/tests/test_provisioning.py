@@ -0,0 +1,121 @@
+import hashlib
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from application_registry.models import AppInfo
+from job_manager.models import JobInfo, JobStatus
+from runner_manager import heartbeats, provisioning
+from runner_manager.models import RunnerInfo, RunnerJobCleanup, RunnerStatus
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, RUNNER_PROVISION_MAX=50)
+class ProvisioningTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(heartbeats.flush)
+        self.user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.app = AppInfo.objects.create(name='app', file_path='app.py')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def provision(self, **data):
+        return self.client.post('/runner_manager/users/provision/', data, format='json')
+
+    def test_provision(self):
+        with self.assertNumQueries(3):
+            response = self.provision(count=12, name_prefix='node', pool='gpu',
+                                      labels={'gpu': 'a100'})
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['pool'], data['fields']), ('gpu', ['id', 'name', 'token']))
+        self.assertEqual(len(data['runners']), 12)
+
+        runner_id, name, token = data['runners'][0]
+        self.assertEqual(name, 'node-01')
+        runner = RunnerInfo.objects.get(pk=runner_id)
+        self.assertTrue(runner.check_token(token))
+        self.assertEqual((runner.owner, runner.pool, runner.labels, runner.state),
+                         (self.user, 'gpu', {'gpu': 'a100'}, RunnerStatus.UNREGISTERED))
+
+        # The token authenticates the new runner right away
+        runner_client = APIClient()
+        runner_client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        response = runner_client.get(f'/runner_manager/runner/{runner_id}/')
+        self.assertEqual(response.json()['name'], 'node-01')
+
+    def test_provision_is_idempotent(self):
+        first = self.provision(count=3).json()
+        response = self.client.post('/runner_manager/users/provision/', {'count': 3},
+                                    format='json', HTTP_IDEMPOTENCY_KEY='rollout-1')
+        again = self.client.post('/runner_manager/users/provision/', {'count': 3},
+                                 format='json', HTTP_IDEMPOTENCY_KEY='rollout-1')
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertNotEqual(response.json(), first)
+        self.assertEqual(RunnerInfo.objects.count(), 6)
+
+        # Tokens are never cached
+        data = response.json()
+        scope = f'user:{self.user.pk} POST /runner_manager/users/provision/ rollout-1'
+        stored = cache.get(f'idempotency:{hashlib.sha256(scope.encode()).hexdigest()}')
+        self.assertIsNotNone(stored)
+        for _, _, token in data['runners']:
+            self.assertNotIn(token, repr(stored))
+
+        # So the replay names the same runners with fresh tokens, the lost ones stop working
+        replayed = again.json()['runners']
+        self.assertEqual([row[:2] for row in replayed], [row[:2] for row in data['runners']])
+        for (runner_id, _, lost), (_, _, token) in zip(data['runners'], replayed):
+            runner = RunnerInfo.objects.get(pk=runner_id)
+            self.assertTrue(runner.check_token(token))
+            self.assertFalse(runner.check_token(lost))
+
+        # A runner registered since keeps its own token
+        RunnerInfo.objects.filter(pk=replayed[0][0]).update(state=RunnerStatus.IDLE)
+        last = self.client.post('/runner_manager/users/provision/', {'count': 3},
+                                format='json', HTTP_IDEMPOTENCY_KEY='rollout-1').json()
+        self.assertIsNone(last['runners'][0][2])
+        self.assertTrue(RunnerInfo.objects.get(pk=replayed[0][0]).check_token(replayed[0][2]))
+        self.assertIsNotNone(last['runners'][1][2])
+
+    def test_invalid_provision(self):
+        for data in ({'count': 0}, {'count': 51}, {'count': 1, 'pool': 'a b'},
+                     {'count': 1, 'labels': {'gpu': 1}}):
+            self.assertEqual(self.provision(**data).status_code, 400, data)
+        self.assertFalse(RunnerInfo.objects.exists())
+
+    def test_delete_pool(self):
+        runners = provisioning.provision_runners(self.user, 3, pool='gpu')
+        other = provisioning.provision_runners(self.user, 1, pool='cpu')[0]
+        RunnerInfo.objects.update(state=RunnerStatus.IDLE, last_contact=timezone.now())
+
+        def job(runner, status):
+            return JobInfo.objects.create(name='job', created_by=self.user, application_id=self.app,
+                                          assigned_runner=runner, status=status)
+        queued = job(runners[0], JobStatus.QUEUED)
+        running = job(runners[1], JobStatus.RUNNING)
+        finished = job(runners[1], JobStatus.SUCCEEDED)
+
+        response = self.client.delete('/runner_manager/users/pools/gpu/')
+        self.assertEqual(response.json(), {'pool': 'gpu', 'deleted': 3, 'jobs': 2})
+        self.assertEqual(list(RunnerInfo.objects.all()), [other])
+        self.assertEqual(RunnerJobCleanup.objects.count(), 2)
+        self.assertEqual(self.client.delete('/runner_manager/users/pools/gpu/').status_code, 404)
+
+        with override_settings(JOB_AUTO_DISPATCH=True):
+            call_command('monitor_runners', stdout=io.StringIO())
+        for job in (queued, running, finished):
+            job.refresh_from_db()
+        self.assertEqual(queued.assigned_runner, other)
+        self.assertEqual(running.status, JobStatus.FAILED_TERMINATED)
+        self.assertIsNotNone(running.finished_at)
+        self.assertEqual(finished.status, JobStatus.SUCCEEDED)
+        self.assertFalse(RunnerJobCleanup.objects.exists())
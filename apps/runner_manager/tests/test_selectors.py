@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+
+from runner_manager.models import RunnerInfo
+from runner_manager.selectors import (
+    EQUALS,
+    EXISTS,
+    NOT_EXISTS,
+    NOT_IN,
+    Requirement,
+    matches,
+    parse_selector,
+    selector_q,
+    validate_labels,
+)
+
+SELECTORS = [
+    'gpu=a100',
+    'gpu==a100,site in (lyon, paris)',
+    'site notin (lyon)',
+    'gpu!=a100',
+    'licensed',
+    '!spot',
+    'gpu,!spot,site in (paris)',
+    '',
+]
+
+
+class SelectorTests(TestCase):
+
+    def test_parse(self):
+        selector = ' gpu = a100 , !spot,site notin (lyon,paris), k8s.io/zone'
+        self.assertEqual(parse_selector(selector), [
+            Requirement('gpu', EQUALS, ('a100',)),
+            Requirement('spot', NOT_EXISTS, ()),
+            Requirement('site', NOT_IN, ('lyon', 'paris')),
+            Requirement('k8s.io/zone', EXISTS, ()),
+        ])
+        self.assertEqual(parse_selector(''), [])
+        for selector in ('gpu=', 'gpu in lyon', '=a100', 'gpu=a100,,spot', 'gpu in (a b)', 'a>1'):
+            with self.assertRaises(ValidationError, msg=selector):
+                parse_selector(selector)
+
+    def test_validate_labels(self):
+        validate_labels({'gpu': 'a100', 'example.com/site': 'lyon-2'})
+        for labels in (['gpu'], {'gpu': 1}, {'-gpu': 'a100'}, {'gpu': 'a 100'}):
+            with self.assertRaises(ValidationError, msg=labels):
+                validate_labels(labels)
+
+    def test_query_agrees_with_matches(self):
+        user = get_user_model().objects.create_user(username='owner', password='pass')
+        for index, labels in enumerate([
+            {},
+            {'gpu': 'a100', 'site': 'lyon'},
+            {'gpu': 'a100', 'site': 'paris', 'spot': 'yes'},
+            {'gpu': 't4', 'site': 'paris', 'licensed': 'true'},
+            {'site': 'berlin'},
+        ]):
+            RunnerInfo.objects.create(owner=user, token=f'token{index}', labels=labels)
+
+        runners = list(RunnerInfo.objects.all())
+        for selector in SELECTORS:
+            requirements = parse_selector(selector)
+            expected = {runner.pk for runner in runners if matches(runner.labels, requirements)}
+            found = set(RunnerInfo.objects.filter(selector_q(requirements, connection.vendor))
+                        .values_list('pk', flat=True))
+            self.assertEqual(found, expected, selector)
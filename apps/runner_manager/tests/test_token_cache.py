@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+
+from runner_manager import token_cache
+from runner_manager.authentication import RunnerTokenAuthentication
+from runner_manager.models import RunnerInfo, RunnerStatus
+
+
+@override_settings(RUNNER_TOKEN_CACHE_TTL=60)
+class RunnerTokenCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        token_cache.reset_stats()
+        self.user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.runner = RunnerInfo.objects.create(
+            owner=self.user, token='secret_token', state=RunnerStatus.IDLE
+        )
+        self.authentication = RunnerTokenAuthentication()
+
+    def authenticate(self, token='secret_token'):
+        return self.authentication.authenticate_credentials(token)
+
+    def test_repeated_lookups_hit_the_cache(self):
+        user, runner = self.authenticate()
+        self.assertEqual(runner, self.runner)
+        self.assertIs(user._runner_info, runner)
+
+        with self.assertNumQueries(0):
+            user, runner = self.authenticate()
+        self.assertEqual(runner, self.runner)
+        self.assertEqual(user, self.user)
+
+        stats = token_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_unknown_tokens_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate('guess')
+        self.assertEqual(token_cache.stats()['misses'], 2)
+
+    def test_rotation_invalidates_old_token(self):
+        self.runner.state = RunnerStatus.UNREGISTERED
+        self.runner.save()
+        self.authenticate()
+
+        response = self.client.post(
+            reverse('register', args=[self.runner.id]), HTTP_TOKEN='secret_token'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        _, runner = self.authenticate(response.json()['token'])
+        self.assertEqual(runner, self.runner)
+
+    def test_deleting_runner_invalidates_token(self):
+        self.authenticate()
+        self.runner.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivating_owner_invalidates_token(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, 'disabled'):
+            self.authenticate()
+
+    @override_settings(RUNNER_TOKEN_CACHE_TTL=0)
+    def test_zero_ttl_disables_cache(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+        self.assertEqual(token_cache.stats()['hits'], 0)
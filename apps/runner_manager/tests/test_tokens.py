@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from runner_manager.models import RunnerInfo, RunnerStatus
+from runner_manager.tokens import generate_token, hash_token
+
+
+class RunnerTokenHashTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.token = generate_token()
+        self.runner = RunnerInfo.objects.create(
+            owner=self.user, token=self.token, state=RunnerStatus.IDLE
+        )
+
+    def test_token_is_stored_hashed(self):
+        runner = RunnerInfo.objects.get(pk=self.runner.pk)
+        self.assertIsNone(runner.token)
+        self.assertEqual(runner.token_prefix, self.token[:8])
+        self.assertEqual(runner.token_hash, hash_token(self.token))
+        self.assertNotIn(self.token, runner.token_hash)
+        self.assertTrue(runner.check_token(self.token))
+        self.assertFalse(runner.check_token(self.token + 'x'))
+        self.assertFalse(runner.check_token(''))
+
+    def test_lookup_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(RunnerInfo.get_by_token(self.token), self.runner)
+
+    def test_lookup_verifies_within_prefix(self):
+        """Test runners sharing a token prefix are told apart by the hash"""
+        other_token = self.token[:8] + generate_token()
+        other = RunnerInfo.objects.create(owner=self.user, token=other_token)
+        self.assertEqual(RunnerInfo.get_by_token(other_token), other)
+        self.assertEqual(RunnerInfo.get_by_token(self.token), self.runner)
+        self.assertIsNone(RunnerInfo.get_by_token(self.token[:8] + 'guess'))
+        self.assertIsNone(RunnerInfo.get_by_token(None))
+
+    def test_hash_key_change_invalidates_tokens(self):
+        with override_settings(RUNNER_TOKEN_HASH_KEY='another key'):
+            self.assertIsNone(RunnerInfo.get_by_token(self.token))
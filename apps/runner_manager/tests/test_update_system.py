@@ -0,0 +1,85 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from runner_manager import heartbeats
+from runner_manager.models import RunnerInfo, RunnerStatus, SystemInfo
+
+PAYLOAD = {
+    'system_name': 'Linux',
+    'cpu_model': 'Xeon',
+    'cpu_logical_cores': 16,
+    'cpu_clock_speed_advertised': 3.2,
+    'disk_size_available': 1000,
+}
+
+
+@override_settings(RUNNER_HEARTBEAT_FLUSH_INTERVAL=3600)
+class UpdateSystemTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(heartbeats.flush)
+        user = get_user_model().objects.create_user(username='owner', password='pass')
+        self.runner = RunnerInfo.objects.create(
+            owner=user, token='secret_token', state=RunnerStatus.IDLE
+        )
+        self.url = reverse('update_system', args=[self.runner.id])
+
+    def put(self, payload=None, **headers):
+        return self.client.put(
+            self.url, data=json.dumps(payload) if payload is not None else '',
+            content_type='application/json', HTTP_TOKEN='secret_token', **headers
+        )
+
+    def test_first_report_creates_system(self):
+        response = self.put(PAYLOAD)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(sorted(data['changed']), sorted(PAYLOAD))
+        self.assertEqual(data['payload_hash'], SystemInfo.hash_payload(PAYLOAD))
+
+        system = SystemInfo.objects.get(runner=self.runner)
+        self.assertEqual(system.cpu_model, 'Xeon')
+        self.assertEqual(system.payload_hash, data['payload_hash'])
+
+    def test_unchanged_payload_short_circuits(self):
+        payload_hash = self.put(PAYLOAD).json()['payload_hash']
+
+        # Same payload, keys in another order: no write
+        with self.assertNumQueries(2):
+            response = self.put(dict(reversed(PAYLOAD.items())))
+        self.assertEqual(response.json()['changed'], [])
+
+        # Hash only
+        with self.assertNumQueries(2):
+            response = self.put(HTTP_PAYLOAD_HASH=payload_hash)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['changed'], [])
+
+        response = self.put(HTTP_PAYLOAD_HASH='0' * 64)
+        self.assertEqual(response.status_code, 409)
+
+    def test_changed_fields_only_are_written(self):
+        self.put(PAYLOAD)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.put({**PAYLOAD, 'disk_size_available': 500})
+        self.assertEqual(response.json()['changed'], ['disk_size_available'])
+        update = next(query['sql'] for query in context if query['sql'].startswith('UPDATE'))
+        self.assertIn('"disk_size_available"', update)
+        self.assertNotIn('"cpu_model"', update)
+
+        system = SystemInfo.objects.get(runner=self.runner)
+        self.assertEqual(system.disk_size_available, 500)
+        self.assertEqual(system.payload_hash, response.json()['payload_hash'])
+
+    def test_unknown_field(self):
+        response = self.put({'to_json': 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(SystemInfo.objects.exists())
@@ -2,7 +2,7 @@ from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
-from runner_manager.models import SystemInfo, RunnerInfo, Status
+from runner_manager.models import SystemInfo, RunnerInfo, RunnerStatus
 import uuid
 import json
 import datetime
@@ -53,8 +53,8 @@ class RunnerViewTests(TestCase):
         # Verify runner was created in database
         runner = RunnerInfo.objects.get(id=data['id'])
         self.assertEqual(runner.owner, self.user)
-        self.assertEqual(runner.token, data['token'])
-        self.assertEqual(runner.state, Status.UNREGISTERED.value)
+        self.assertTrue(runner.check_token(data['token']))
+        self.assertEqual(runner.state, RunnerStatus.UNREGISTERED.value)
 
     def test_add_runner_unauthenticated(self):
         """Test runner creation is rejected for unauthenticated users"""
@@ -90,7 +90,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='token1',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
 
         # Make the DELETE request
@@ -117,7 +117,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='token1',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
 
         # Make the DELETE request without login
@@ -182,7 +182,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=other_user,
             token='othertoken',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
 
         # Try to delete the other user's runner
@@ -218,13 +218,13 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='token1',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
         runner2 = RunnerInfo.objects.create(
             id=uuid.uuid4(),
             owner=self.user,
             token='token2',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
 
         # Create some test system associated with the runners
@@ -287,13 +287,13 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='token1',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
         other_runner = RunnerInfo.objects.create(
             id=uuid.uuid4(),
             owner=other_user,
             token='token2',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
 
         # Create system for both runners
@@ -328,20 +328,20 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='token1',
-            state=Status.BUSY.value,
+            state=RunnerStatus.BUSY.value,
             last_contact=timezone.now()
         ),
             RunnerInfo.objects.create(
             id=uuid.uuid4(),
             owner=self.user,
             token='token2',
-            state=Status.IDLE.value,
+            state=RunnerStatus.IDLE.value,
             last_contact=timezone.now()
         ), RunnerInfo.objects.create(
             id=uuid.uuid4(),
             owner=self.user,
             token='token3',
-            state=Status.OFFLINE.value,
+            state=RunnerStatus.OFFLINE.value,
         )]
 
         # Make the GET request
@@ -398,13 +398,13 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='token1',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
         other_runner = RunnerInfo.objects.create(
             id=uuid.uuid4(),
             owner=other_user,
             token='token2',
-            state=Status.OFFLINE.value
+            state=RunnerStatus.OFFLINE.value
         )
 
         # Make the GET request
@@ -429,7 +429,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.UNREGISTERED.value,
+            state=RunnerStatus.UNREGISTERED.value,
         )
 
         # Make POST request with token in header
@@ -449,8 +449,8 @@ class RunnerViewTests(TestCase):
 
         # Verify database was updated
         runner.refresh_from_db()
-        self.assertEqual(runner.state, Status.IDLE.value)
-        self.assertNotEqual(runner.token, 'secret_token')
+        self.assertEqual(runner.state, RunnerStatus.IDLE.value)
+        self.assertFalse(runner.check_token('secret_token'))
         self.assertIsNotNone(runner.last_contact)
 
     def test_register_missing_token_header(self):
@@ -460,7 +460,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.UNREGISTERED.value,
+            state=RunnerStatus.UNREGISTERED.value,
         )
 
         # Make POST request without token header
@@ -479,8 +479,8 @@ class RunnerViewTests(TestCase):
 
         # Verify database was not updated
         runner.refresh_from_db()
-        self.assertEqual(runner.token, 'secret_token')
-        self.assertEqual(runner.state, Status.UNREGISTERED.value)
+        self.assertTrue(runner.check_token('secret_token'))
+        self.assertEqual(runner.state, RunnerStatus.UNREGISTERED.value)
 
     def test_register_invalid_token(self):
         """Test register is rejected with invalid token in header"""
@@ -489,7 +489,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.UNREGISTERED.value,
+            state=RunnerStatus.UNREGISTERED.value,
         )
 
         # Make POST request with wrong token in header
@@ -508,8 +508,8 @@ class RunnerViewTests(TestCase):
 
         # Verify database was not updated
         runner.refresh_from_db()
-        self.assertEqual(runner.token, 'secret_token')
-        self.assertEqual(runner.state, Status.UNREGISTERED.value)
+        self.assertTrue(runner.check_token('secret_token'))
+        self.assertEqual(runner.state, RunnerStatus.UNREGISTERED.value)
         self.assertIsNone(runner.last_contact)
 
     def test_register_runner_not_found(self):
@@ -535,7 +535,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.UNREGISTERED.value
+            state=RunnerStatus.UNREGISTERED.value
         )
 
         # Try GET request
@@ -558,7 +558,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.IDLE.value,
+            state=RunnerStatus.IDLE.value,
             last_contact=timezone.now() - datetime.timedelta(minutes=10)
         )
         old_last_contact = runner.last_contact
@@ -567,7 +567,7 @@ class RunnerViewTests(TestCase):
         url = reverse('report_status', args=[runner.id])
         response = self.client.patch(
             url,
-            data=json.dumps({'state': Status.BUSY.value}),
+            data=json.dumps({'state': RunnerStatus.BUSY.name}),
             content_type='application/json',
             HTTP_TOKEN='secret_token'
         )
@@ -579,7 +579,7 @@ class RunnerViewTests(TestCase):
 
         # Verify database was updated
         runner.refresh_from_db()
-        self.assertEqual(runner.state, Status.BUSY.value)
+        self.assertEqual(runner.state, RunnerStatus.BUSY.value)
         self.assertGreater(runner.last_contact, old_last_contact)
 
     def test_report_status_missing_token_header(self):
@@ -589,7 +589,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.IDLE.value,
+            state=RunnerStatus.IDLE.value,
             last_contact=timezone.now()
         )
         old_last_contact = runner.last_contact
@@ -598,7 +598,7 @@ class RunnerViewTests(TestCase):
         url = reverse('report_status', args=[runner.id])
         response = self.client.patch(
             url,
-            data=json.dumps({'state': Status.BUSY.value}),
+            data=json.dumps({'state': RunnerStatus.BUSY.name}),
             content_type='application/json'
         )
 
@@ -611,7 +611,7 @@ class RunnerViewTests(TestCase):
 
         # Verify database was not updated
         runner.refresh_from_db()
-        self.assertEqual(runner.state, Status.IDLE.value)
+        self.assertEqual(runner.state, RunnerStatus.IDLE.value)
         self.assertEqual(runner.last_contact, old_last_contact)
 
     def test_report_status_runner_unregistered(self):
@@ -621,14 +621,14 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.UNREGISTERED.value,
+            state=RunnerStatus.UNREGISTERED.value,
         )
 
         # Make PATCH request with token in header
         url = reverse('report_status', args=[runner.id])
         response = self.client.patch(
             url,
-            data=json.dumps({'state': Status.BUSY.value}),
+            data=json.dumps({'state': RunnerStatus.BUSY.name}),
             content_type='application/json',
             HTTP_TOKEN='secret_token'
         )
@@ -641,8 +641,8 @@ class RunnerViewTests(TestCase):
 
         # Verify database was not updated
         runner.refresh_from_db()
-        self.assertEqual(runner.token, 'secret_token')
-        self.assertEqual(runner.state, Status.UNREGISTERED.value)
+        self.assertTrue(runner.check_token('secret_token'))
+        self.assertEqual(runner.state, RunnerStatus.UNREGISTERED.value)
 
     def test_report_status_invalid_token(self):
         """Test status update is rejected with invalid token in header"""
@@ -652,7 +652,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.IDLE.value,
+            state=RunnerStatus.IDLE.value,
             last_contact=time_now
         )
 
@@ -660,7 +660,7 @@ class RunnerViewTests(TestCase):
         url = reverse('report_status', args=[runner.id])
         response = self.client.patch(
             url,
-            data=json.dumps({'state': Status.BUSY.value}),
+            data=json.dumps({'state': RunnerStatus.BUSY.name}),
             content_type='application/json',
             HTTP_TOKEN='wrong_token'
         )
@@ -673,8 +673,8 @@ class RunnerViewTests(TestCase):
 
         # Verify database was not updated
         runner.refresh_from_db()
-        self.assertEqual(runner.token, 'secret_token')
-        self.assertEqual(runner.state, Status.IDLE.value)
+        self.assertTrue(runner.check_token('secret_token'))
+        self.assertEqual(runner.state, RunnerStatus.IDLE.value)
         self.assertEqual(runner.last_contact, time_now)
 
     def test_report_status_missing_state(self):
@@ -685,7 +685,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.IDLE.value,
+            state=RunnerStatus.IDLE.value,
             last_contact=time_now
         )
 
@@ -707,8 +707,8 @@ class RunnerViewTests(TestCase):
 
         # Verify database was not updated
         runner.refresh_from_db()
-        self.assertEqual(runner.token, 'secret_token')
-        self.assertEqual(runner.state, Status.IDLE.value)
+        self.assertTrue(runner.check_token('secret_token'))
+        self.assertEqual(runner.state, RunnerStatus.IDLE.value)
         self.assertEqual(runner.last_contact, time_now)
 
     def test_report_status_invalid_state(self):
@@ -719,7 +719,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.IDLE.value,
+            state=RunnerStatus.IDLE.value,
             last_contact=time_now
         )
 
@@ -739,8 +739,8 @@ class RunnerViewTests(TestCase):
 
         # Verify database was NOT updated
         runner.refresh_from_db()
-        self.assertEqual(runner.token, 'secret_token')
-        self.assertEqual(runner.state, Status.IDLE.value)
+        self.assertTrue(runner.check_token('secret_token'))
+        self.assertEqual(runner.state, RunnerStatus.IDLE.value)
         self.assertEqual(runner.last_contact, time_now)
 
     def test_report_status_runner_not_found(self):
@@ -752,7 +752,7 @@ class RunnerViewTests(TestCase):
         url = reverse('report_status', args=[non_existent_id])
         response = self.client.patch(
             url,
-            data=json.dumps({'state': Status.BUSY.value}),
+            data=json.dumps({'state': RunnerStatus.BUSY.name}),
             content_type='application/json',
             HTTP_TOKEN='any_token'
         )
@@ -767,7 +767,7 @@ class RunnerViewTests(TestCase):
             id=uuid.uuid4(),
             owner=self.user,
             token='secret_token',
-            state=Status.IDLE.value,
+            state=RunnerStatus.IDLE.value,
             last_contact=timezone.now() - datetime.timedelta(minutes=10)
         )
 
@@ -0,0 +1,93 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner token lookup cache.
+
+Every runner request and WebSocket connect resolves its token to the runner and its owner. The
+result is kept in the Django cache for RUNNER_TOKEN_CACHE_TTL seconds under the keyed hash of the
+token (see runner_manager.tokens), so tokens never appear in cache keys. Entries are dropped when a
+token is rotated, a runner deleted or its owner saved (deactivated), see runner_manager.signals.
+
+Only the identity of a cached runner is reliable: fields such as state or last_contact may be up to
+the TTL old, read them from the database where they matter.
+"""
+
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import RunnerInfo
+from .tokens import hash_token
+
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_key(token_hash):
+    return f"runner-token:{token_hash}"
+
+
+def get_runner(token):
+    """Return the runner of a token with its owner loaded, None for unknown tokens."""
+    if not token:
+        return None
+    ttl = settings.RUNNER_TOKEN_CACHE_TTL
+    key = cache_key(hash_token(token))
+    if ttl > 0:
+        runner = cache.get(key)
+        if runner is not None:
+            _count("hits")
+            return runner
+    _count("misses")
+
+    runner = RunnerInfo.get_by_token(token, RunnerInfo.objects.select_related("owner"))
+    # Unknown tokens are not cached, so guessing cannot fill the cache
+    if runner is not None and ttl > 0:
+        cache.set(key, runner, ttl)
+    return runner
+
+
+def invalidate(*token_hashes):
+    """Drop the cached lookups of tokens, given by their hashes."""
+    keys = [cache_key(token_hash) for token_hash in token_hashes if token_hash]
+    if keys:
+        cache.delete_many(keys)
+        with _stats_lock:
+            _stats["invalidations"] += len(keys)
+
+
+def invalidate_owner(owner_id):
+    """Drop the cached lookups of all runners of an owner."""
+    invalidate(*RunnerInfo.objects.filter(owner_id=owner_id).values_list("token_hash", flat=True))
+
+
+def stats():
+    """Hit, miss and invalidation counts of this process, with the hit rate."""
+    with _stats_lock:
+        counts = dict(_stats)
+    lookups = counts["hits"] + counts["misses"]
+    counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+    return counts
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
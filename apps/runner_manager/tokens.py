@@ -0,0 +1,46 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner token hashing.
+
+Tokens are never stored. A runner keeps the first PREFIX_LENGTH characters of its token, indexed,
+to find its row, and an HMAC-SHA256 of the whole token keyed with RUNNER_TOKEN_HASH_KEY (SECRET_KEY
+when unset) to verify it in constant time. Changing the key invalidates all runner tokens.
+"""
+
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+
+PREFIX_LENGTH = 8
+
+
+def generate_token():
+    return secrets.token_urlsafe(32)
+
+
+def token_prefix(token):
+    return token[:PREFIX_LENGTH]
+
+
+def hash_token(token):
+    key = settings.RUNNER_TOKEN_HASH_KEY or settings.SECRET_KEY
+    return hmac.new(key.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_token(token, token_hash):
+    """Constant-time check of a token against a stored hash."""
+    return bool(token and token_hash) and hmac.compare_digest(hash_token(token), token_hash)
@@ -12,7 +12,6 @@
 #  see <https://www.gnu.org/licenses/>.
 
 import json
-import secrets
 
 from django.contrib.auth.decorators import login_required
 from django.forms import model_to_dict
@@ -21,7 +20,10 @@ from django.shortcuts import get_object_or_404
 from django.template import loader
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import (
     DjangoModelPermissionsOrAnonReadOnly,
@@ -30,11 +32,40 @@ from rest_framework.permissions import (
 from rest_framework.response import Response
 
 from accounts.models import User
-from runner_manager.models import RunnerInfo, RunnerStatus, SystemInfo
+from common.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from runner_manager.models import RunnerInfo, RunnerMetric, RunnerStatus, SystemInfo
 
+from . import heartbeats
 from .authentication import RunnerTokenAuthentication
+from .fleet import user_fleet_overview, user_pools
+from .metrics import series
 from .permissions import IsAuthenticatedRunner
-from .serializers import RunnerInfoSerializer
+from .provisioning import delete_runners, provision_runners, reissue_tokens
+from .serializers import (
+    RunnerInfoSerializer,
+    RunnerMetricQuerySerializer,
+    RunnerMetricSerializer,
+    RunnerProvisionSerializer,
+)
+from .tokens import generate_token
+
+# Samples accepted in one metrics report
+MAX_METRIC_SAMPLES = 1000
+
+
+def _provisioned_without_tokens(data):
+    """Provisioning response kept for Idempotency-Key replays: tokens are never cached."""
+    return {**data, "fields": ["id", "name"], "runners": [row[:2] for row in data["runners"]]}
+
+
+def _provisioned_with_new_tokens(request, data):
+    """
+    Replayed provisioning response: runners still unregistered get fresh tokens (the lost ones no
+    longer work), those registered since a null token.
+    """
+    tokens = reissue_tokens(request.user, [runner_id for runner_id, _ in data["runners"]])
+    runners = [[runner_id, name, tokens.get(runner_id)] for runner_id, name in data["runners"]]
+    return {**data, "fields": ["id", "name", "token"], "runners": runners}
 
 
 class RunnerManagerUserViewSet(viewsets.ModelViewSet):
@@ -58,6 +89,99 @@ class RunnerManagerUserViewSet(viewsets.ModelViewSet):
             return RunnerInfo.objects.filter(owner=self.request.user)
         return RunnerInfo.objects.none()
 
+    @extend_schema(
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            "The user's runners with their hardware, queued and active job counts and liveness "
+            "(alive: online with a heartbeat within RUNNER_HEARTBEAT_TIMEOUT). Cached for a few "
+            "seconds."
+        ),
+    )
+    @action(detail=False, methods=["get"])
+    def fleet(self, request):
+        return Response(user_fleet_overview(request.user))
+
+    @extend_schema(
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            "The pools of the user's runners with their runner and online runner counts. Jobs "
+            "with a runner_pool are only dispatched to runners of that pool."
+        ),
+    )
+    @action(detail=False, methods=["get"])
+    def pools(self, request):
+        return Response(user_pools(request.user))
+
+    @extend_schema(
+        responses={204: None},
+        description=(
+            "Delete all the user's runners of a pool at once. Their unfinished jobs are cleaned up "
+            "in the background by the liveness monitor: queued ones dispatched again, the others "
+            "failed as terminated. The response counts the runners deleted and the unfinished jobs "
+            "found."
+        ),
+    )
+    @action(detail=False, methods=["delete"], url_path=r"pools/(?P<pool>[A-Za-z0-9_.-]+)",
+            permission_classes=[IsAuthenticated])
+    def delete_pool(self, request, pool):
+        deleted, jobs = delete_runners(RunnerInfo.objects.filter(owner=request.user, pool=pool))
+        if not deleted:
+            raise NotFound("No runner in this pool.")
+        return Response({"pool": pool, "deleted": deleted, "jobs": jobs})
+
+    @extend_schema(
+        request=RunnerProvisionSerializer,
+        responses={201: OpenApiTypes.OBJECT},
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        description=(
+            "Create count runners in one transaction, optionally in a pool and with labels. The "
+            "response is the only copy of their tokens: rows of values in the order of fields. "
+            "Send an Idempotency-Key so that a retry gets the same runners back: tokens are not "
+            "kept, so the runners still unregistered get new ones (the earlier ones stop "
+            "working) and the registered ones a null token."
+        ),
+    )
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    @idempotent(stored_data=_provisioned_without_tokens, replayed_data=_provisioned_with_new_tokens)
+    def provision(self, request):
+        serializer = RunnerProvisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        runners = provision_runners(request.user, **serializer.validated_data)
+        return Response({
+            "pool": serializer.validated_data["pool"],
+            "fields": ["id", "name", "token"],
+            "runners": [[str(runner.id), runner.name, runner.token] for runner in runners],
+        }, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        parameters=[RunnerMetricQuerySerializer],
+        responses={200: OpenApiTypes.OBJECT},
+        description=(
+            "Metric series of the user's runners (all, or those given with runner): raw samples "
+            "or 1 minute / 1 hour rollups. Each runner maps to rows of values in the order of "
+            "fields, oldest first."
+        ),
+    )
+    @action(detail=False, methods=["get"])
+    def metrics(self, request):
+        query = RunnerMetricQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        runners = self.get_queryset()
+        if params.get("runner"):
+            runners = runners.filter(pk__in=params["runner"])
+        fields, data = series(
+            runners.values("pk"), params["resolution"], params["since"], params["until"]
+        )
+        return Response({
+            "resolution": params["resolution"],
+            "since": params["since"],
+            "until": params["until"],
+            "fields": fields,
+            "series": data,
+        })
+
 
 class RunnerManagerRunnerViewSet(viewsets.ModelViewSet):
     serializer_class = RunnerInfoSerializer
@@ -73,9 +197,9 @@ class RunnerManagerRunnerViewSet(viewsets.ModelViewSet):
     def get_object(self):
         """Ensure runner can only access their own data, regardless of requested ID"""
         try:
-            # Always return the runner owned by the authenticated user
+            # Always return the authenticated runner, its owner may have many.
             # This prevents a runner from accessing another runner's data
-            runner = RunnerInfo.objects.get(owner=self.request.user)
+            runner = RunnerInfo.objects.get(pk=self.request.user._runner_info.pk)
             return runner
         except RunnerInfo.DoesNotExist:
             raise NotFound("No runner found for this user")
@@ -94,6 +218,35 @@ class RunnerManagerRunnerViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data)
 
+    @extend_schema(
+        request=RunnerMetricSerializer(many=True),
+        responses={204: None},
+        description=(
+            "Record samples of the runner's dynamic metrics, one object or a list of up to "
+            f"{MAX_METRIC_SAMPLES}. Samples without recorded_at are taken now; a report also "
+            "counts as a heartbeat."
+        ),
+    )
+    @action(detail=False, methods=["post"])
+    def metrics(self, request):
+        samples = request.data if isinstance(request.data, list) else [request.data]
+        if len(samples) > MAX_METRIC_SAMPLES:
+            return Response(
+                {"detail": f"At most {MAX_METRIC_SAMPLES} samples per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = RunnerMetricSerializer(data=samples, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        runner = request.user._runner_info
+        now = timezone.now()
+        RunnerMetric.objects.bulk_create([
+            RunnerMetric(runner=runner, **{"recorded_at": now, **sample})
+            for sample in serializer.validated_data
+        ])
+        heartbeats.record(runner.pk, now)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def list(self, request):
         """Disable list endpoint for runners"""
         return Response(
@@ -121,7 +274,7 @@ def add_new_runner(request):
     # Create new runner
     runner = RunnerInfo.objects.create(
         owner=request.user,
-        token=secrets.token_urlsafe(32),
+        token=generate_token(),
         state=RunnerStatus.UNREGISTERED.value,
     )
 
@@ -151,7 +304,7 @@ def delete_runner(request):
             },
             status=403,
         )
-    runner.delete()
+    delete_runners(RunnerInfo.objects.filter(pk=runner.pk))
 
     return JsonResponse(
         {
@@ -193,10 +346,16 @@ def get_status(request):
     if request.method != "GET":
         return JsonResponse({"error": "Only GET method is allowed"}, status=405)
     try:
-        user_runners = RunnerInfo.objects.filter(owner=request.user)
-        runner_status = user_runners.values("id", "state", "last_contact")
+        user_runners = RunnerInfo.objects.filter(owner=request.user).only(
+            "id", "state", "last_contact"
+        )
+        last_contacts = heartbeats.last_contacts(user_runners)
+        runner_status = [
+            {"id": runner.id, "state": runner.state, "last_contact": last_contacts[runner.id]}
+            for runner in user_runners
+        ]
         return JsonResponse(
-            {"status": "success", "data": list(runner_status)}, status=200
+            {"status": "success", "data": runner_status}, status=200
         )
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
@@ -227,12 +386,12 @@ def register(request, runner_id):
                 status=401,
             )
 
-        if runner.token != token:
+        if not runner.check_token(token):
             return JsonResponse(
                 {"status": "error", "message": "Authentication failed"}, status=401
             )
 
-        runner.token = secrets.token_urlsafe(32)
+        runner.token = generate_token()
         runner.state = RunnerStatus.IDLE.value
         runner.last_contact = timezone.now()
         runner.save()
@@ -271,13 +430,28 @@ def update_system(request, runner_id):
                 status=401,
             )
 
-        if runner.token != token:
+        if not runner.check_token(token):
             return JsonResponse(
                 {"status": "error", "message": "Authentication failed"}, status=401
             )
 
+        system_info = SystemInfo.objects.filter(runner=runner).order_by("id").first()
+        stored_hash = system_info.payload_hash if system_info is not None else ""
+        heartbeats.record(runner.pk, timezone.now())
+
+        # Unchanged facts: the runner may send only the hash of its last payload
+        reported_hash = request.headers.get("Payload-Hash")
+        if reported_hash and not request.body:
+            if reported_hash != stored_hash:
+                return JsonResponse(
+                    {"status": "error", "message": "Payload hash mismatch, send the payload"},
+                    status=409,
+                )
+            return JsonResponse(
+                {"status": "success", "changed": [], "payload_hash": stored_hash}, status=200
+            )
+
         update_data = json.loads(request.body).copy()
-        system_info = SystemInfo.objects.get_or_create(runner=runner)[0]
 
         # Protect against accidental keys in request
         if "id" in update_data:
@@ -285,11 +459,9 @@ def update_system(request, runner_id):
         if "runner_id" in update_data:
             del update_data["runner_id"]
 
-        # Update system_info fields directly
-        for field, value in update_data.items():
-            if hasattr(system_info, field):
-                setattr(system_info, field, value)
-            else:
+        reported_fields = SystemInfo.reported_fields()
+        for field in update_data:
+            if field not in reported_fields:
                 return JsonResponse(
                     {
                         "status": "error",
@@ -298,12 +470,30 @@ def update_system(request, runner_id):
                     status=400,
                 )
 
-        # Save the updated system info
-        system_info.save()
+        payload_hash = SystemInfo.hash_payload(update_data)
+        if payload_hash == stored_hash:
+            return JsonResponse(
+                {"status": "success", "changed": [], "payload_hash": payload_hash}, status=200
+            )
 
-        runner.last_contact = timezone.now()
-        runner.save()
-        return JsonResponse({"status": "success"}, status=200)
+        # Write only the columns that changed
+        if system_info is None:
+            system_info = SystemInfo(runner=runner, **update_data)
+            changed = list(update_data)
+        else:
+            changed = [field for field, value in update_data.items()
+                       if getattr(system_info, field) != value]
+            for field in changed:
+                setattr(system_info, field, update_data[field])
+        system_info.payload_hash = payload_hash
+        if system_info._state.adding:
+            system_info.save()
+        else:
+            system_info.save(update_fields=[*changed, "payload_hash"])
+
+        return JsonResponse(
+            {"status": "success", "changed": changed, "payload_hash": payload_hash}, status=200
+        )
 
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
@@ -334,7 +524,7 @@ def report_status(request, runner_id):
                 status=401,
             )
 
-        if runner.token != token:
+        if not runner.check_token(token):
             return JsonResponse(
                 {"status": "error", "message": "Authentication failed"}, status=401
             )
@@ -345,9 +535,16 @@ def report_status(request, runner_id):
                 {"status": "error", "message": "State is required in the request body"},
                 status=400,
             )
-        runner.last_contact = timezone.now()
-        runner.state = RunnerStatus[data["state"]].value
-        runner.save()
+        state = RunnerStatus[data["state"]].value
+        now = timezone.now()
+        if state == runner.state:
+            # Plain heartbeat, written to the database in bulk later
+            heartbeats.record(runner.pk, now)
+        else:
+            runner.state = state
+            runner.last_contact = now
+            runner.save(update_fields=["state", "last_contact"])
+            heartbeats.discard(runner.pk)
 
         return JsonResponse({"status": "success"}, status=200)
 
@@ -0,0 +1,122 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Compression benchmark on representative job outputs (CSV time series, VTK ASCII, solver logs).
+
+Reports the compression ratio and throughput of every available encoding and level, to pick
+RESOURCE_STORAGE_COMPRESSION. Run from the repository root:
+
+    python benchmarks/bench_compression.py [--size-mb 20]
+"""
+
+import argparse
+import io
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "apps"))
+
+from common import compression  # noqa: E402
+
+LEVELS = {
+    compression.GZIP: [1, 6],
+    compression.ZSTD: [1, 3, 9],
+}
+
+
+def csv_time_series(size):
+    rng = random.Random(0)
+    lines = ["time,pressure,velocity_x,velocity_y,temperature\n"]
+    written, step = len(lines[0]), 0
+    while written < size:
+        t = step * 1e-3
+        line = (f"{t:.6e},{101325 + rng.gauss(0, 50):.6e},{math.sin(t):.6e},"
+                f"{math.cos(t) * 0.1:.6e},{300 + rng.random():.6e}\n")
+        lines.append(line)
+        written += len(line)
+        step += 1
+    return "".join(lines).encode()
+
+
+def vtk_ascii(size):
+    rng = random.Random(1)
+    out = io.StringIO()
+    out.write("# vtk DataFile Version 3.0\nresult\nASCII\nDATASET UNSTRUCTURED_GRID\n")
+    points = size // 60
+    out.write(f"POINTS {points} float\n")
+    for i in range(points):
+        out.write(f"{i % 100 * 0.01:.6f} {i // 100 % 100 * 0.01:.6f} {i // 10000 * 0.01:.6f}\n")
+    out.write(f"POINT_DATA {points}\nSCALARS p float 1\nLOOKUP_TABLE default\n")
+    for _ in range(points):
+        out.write(f"{rng.gauss(0, 1):.6e}\n")
+    return out.getvalue().encode()[:size]
+
+
+def solver_log(size):
+    rng = random.Random(2)
+    lines, written, iteration = [], 0, 0
+    while written < size:
+        line = (f"[INFO] iter {iteration:8d} residual_u {rng.random() * 1e-3:.4e} "
+                f"residual_p {rng.random() * 1e-4:.4e} dt 1.0000e-03 courant 0.42\n")
+        lines.append(line)
+        written += len(line)
+        iteration += 1
+    return "".join(lines).encode()
+
+
+def measure(data, encoding, level):
+    compressed = io.BytesIO()
+    start = time.perf_counter()
+    with compression.open_encoder(compressed, encoding, level) as encoder:
+        encoder.write(data)
+    compress_time = time.perf_counter() - start
+    stored = compressed.tell()
+
+    compressed.seek(0)
+    start = time.perf_counter()
+    with compression.open_decoded(compressed, encoding) as decoded:
+        restored = decoded.read()
+    decompress_time = time.perf_counter() - start
+
+    assert restored == data
+    return stored, compress_time, decompress_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=float, default=20, help="Size of each sample in MB")
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    samples = {
+        "csv": csv_time_series(size),
+        "vtk": vtk_ascii(size),
+        "log": solver_log(size),
+    }
+
+    print(f"{'sample':<6} {'encoding':<10} {'ratio':>7} {'comp MB/s':>10} {'decomp MB/s':>12}")
+    for name, data in samples.items():
+        megabytes = len(data) / 1024 / 1024
+        for encoding in compression.available_encodings():
+            for level in LEVELS[encoding]:
+                stored, compress_time, decompress_time = measure(data, encoding, level)
+                print(f"{name:<6} {f'{encoding}-{level}':<10} {len(data) / stored:>7.2f} "
+                      f"{megabytes / compress_time:>10.1f} {megabytes / decompress_time:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
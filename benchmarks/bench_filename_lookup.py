@@ -0,0 +1,115 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Job resource filename lookup benchmark.
+
+Fills a throw-away test database with --rows resources and compares the former ``file__icontains``
+lookup with the indexed exact and prefix lookups on the ``filename`` column, globally and within one
+job. Run from the repository root (uses the configured database engine, never the real database):
+
+    python benchmarks/bench_filename_lookup.py [--rows 1000000] [--per-job 100]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "apps"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test.utils import setup_databases, teardown_databases  # noqa: E402
+
+from application_registry.models import AppInfo  # noqa: E402
+from job_manager.models import JobInfo, JobResource  # noqa: E402
+
+
+def populate(rows, per_job, batch_size=5000):
+    user = get_user_model().objects.create_user(username="bench", password="bench")
+    app = AppInfo.objects.create(name="bench", file_path="bench.py")
+    jobs = JobInfo.objects.bulk_create(
+        [JobInfo(name=f"job{i}", created_by=user, application_id=app)
+         for i in range((rows + per_job - 1) // per_job)],
+        batch_size=batch_size,
+    )
+    batch = []
+    for i in range(rows):
+        job = jobs[i // per_job]
+        batch.append(JobResource(
+            job=job,
+            created_by=user,
+            resource_type="OUT",
+            file=f"user_{user.id}/job_{job.id}/out_{i % per_job:04d}_{i}.csv",
+        ))
+        if len(batch) == batch_size:
+            JobResource.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        JobResource.objects.bulk_create(batch)
+    return jobs
+
+
+def timed(queryset, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        list(queryset.values_list("id", flat=True))
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--per-job", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--explain", action="store_true", help="print the query plans")
+    args = parser.parse_args()
+
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        start = time.perf_counter()
+        jobs = populate(args.rows, args.per_job)
+        print(f"{args.rows} resources in {len(jobs)} jobs created in "
+              f"{time.perf_counter() - start:.1f} s")
+
+        job = jobs[len(jobs) // 2]
+        name = JobResource.objects.filter(job=job).values_list("filename", flat=True)[0]
+        prefix = name[:8]
+        resources = JobResource.objects.order_by()
+        cases = [
+            ("global file__icontains", resources.filter(file__icontains=name)),
+            ("global filename exact", resources.filter(filename=name)),
+            ("global filename prefix", resources.filter(filename__startswith=name[:-4])),
+            ("job file__icontains", resources.filter(job=job, file__icontains=name)),
+            ("job filename exact", resources.filter(job=job, filename=name)),
+            ("job filename prefix", resources.filter(job=job, filename__startswith=prefix)),
+        ]
+        print(f"{'lookup':<26}{'ms/query':>12}{'rows':>8}")
+        for label, queryset in cases:
+            print(f"{label:<26}{timed(queryset, args.repeat):>12.2f}{queryset.count():>8}")
+            if args.explain:
+                print(f"    {queryset.explain()}")
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
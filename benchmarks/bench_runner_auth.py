@@ -0,0 +1,113 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner token authentication benchmark.
+
+Fills a throw-away test database with --runners runners, then compares the token lookup and the
+request rate of a runner endpoint with the token cache disabled and enabled. Requests pick runners
+at random, so the cached run includes the first (missing) lookup of every token. Run from the
+repository root (uses the configured database and cache, never the real database):
+
+    python benchmarks/bench_runner_auth.py [--runners 10000] [--requests 5000]
+"""
+
+import argparse
+import os
+import random
+import secrets
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "apps"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings, setup_databases, setup_test_environment, teardown_databases,
+)
+from rest_framework.test import APIClient  # noqa: E402
+
+from runner_manager import token_cache  # noqa: E402
+from runner_manager.authentication import RunnerTokenAuthentication  # noqa: E402
+from runner_manager.models import RunnerInfo, RunnerStatus  # noqa: E402
+
+
+def populate(runners, batch_size=5000):
+    user = get_user_model().objects.create_user(username="bench", password="bench")
+    tokens = [secrets.token_urlsafe(32) for _ in range(runners)]
+    RunnerInfo.objects.bulk_create(
+        [RunnerInfo(owner=user, token=token, state=RunnerStatus.IDLE) for token in tokens],
+        batch_size=batch_size,
+    )
+    return tokens
+
+
+def lookups_per_second(tokens, count):
+    authentication = RunnerTokenAuthentication()
+    start = time.perf_counter()
+    for token in tokens[:count]:
+        authentication.authenticate_credentials(token)
+    return count / (time.perf_counter() - start)
+
+
+def requests_per_second(tokens, count):
+    client = APIClient()
+    start = time.perf_counter()
+    for token in tokens[:count]:
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        response = client.get("/job_manager/runner/")
+        assert response.status_code == 200, response.status_code
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runners", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--active", type=int, default=200,
+                        help="number of runners the requests are spread over")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        tokens = populate(args.runners)
+        active = random.sample(tokens, min(args.active, len(tokens)))
+        sequence = [random.choice(active) for _ in range(args.requests)]
+        print(f"{args.runners} runners, {args.requests} requests over {len(active)} of them")
+
+        print(f"{'':<12}{'lookups/s':>14}{'requests/s':>14}{'hit rate':>10}")
+        for label, ttl in (("uncached", 0), ("cached", 60)):
+            with override_settings(RUNNER_TOKEN_CACHE_TTL=ttl):
+                cache.clear()
+                token_cache.reset_stats()
+                lookups = lookups_per_second(sequence, len(sequence))
+                hit_rate = token_cache.stats()["hit_rate"]
+                cache.clear()
+                served = requests_per_second(sequence, len(sequence))
+            print(f"{label:<12}{lookups:>14.0f}{served:>14.0f}{hit_rate:>10.1%}")
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -112,6 +112,19 @@ from settings.settings_rest import *
 # File Storage Settings
 from settings.settings_storage import *
 
+if FILE_DOWNLOAD_OFFLOAD_EMULATE:
+    # Outermost, so it sees responses exactly as the front proxy would.
+    MIDDLEWARE.insert(0, "common.middleware.OffloadProxyMiddleware")
+
+# Quota Settings
+from settings.settings_quota import *
+
+# Cache Settings
+from settings.settings_cache import *
+
+# Runner and Dispatch Settings
+from settings.settings_runner import *
+
 # Internationalization
 LANGUAGE_CODE = "en-gb"
 TIME_ZONE = "Europe/Berlin"
@@ -0,0 +1,58 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Cache settings, and the settings of the features built on the cache
+"""
+
+import os
+
+# --------------------------------------------------------------------------------------------------
+#  Configuration
+# --------------------------------------------------------------------------------------------------
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+
+# --------------------------------------------------------------------------------------------------
+#  Setting Construction
+# --------------------------------------------------------------------------------------------------
+
+# Without CACHE_REDIS_URL every process has its own memory cache, which is fine for development and
+# single-process deployments. With several workers set it (e.g. redis://redis:6379/1) so that they
+# share cached entries.
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "fyn-api",
+        },
+    }
+
+# Idempotency-Key support: how long the response of a request is kept for replay (seconds), and
+# how long a request holds its key before a concurrent retry may run it again.
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
+IDEMPOTENCY_LOCK_TIMEOUT = 5 * 60
+
+# Export settings only
+__all__ = [
+    'CACHES',
+    'IDEMPOTENCY_KEY_TTL',
+    'IDEMPOTENCY_LOCK_TIMEOUT',
+]
@@ -0,0 +1,45 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Per-user storage and compute quota settings
+"""
+
+import os
+
+# --------------------------------------------------------------------------------------------------
+#  Configuration
+# --------------------------------------------------------------------------------------------------
+
+
+def _optional_int(name):
+    value = os.getenv(name, "")
+    return int(value) if value else None
+
+
+# --------------------------------------------------------------------------------------------------
+#  Setting Construction
+# --------------------------------------------------------------------------------------------------
+
+# Default limits for users without their own, None means unlimited. Bytes count what is kept in
+# storage (after compression), core-seconds are job wall time times the runner's logical cores.
+QUOTA_DEFAULT_MAX_BYTES = _optional_int("QUOTA_DEFAULT_MAX_BYTES")
+QUOTA_DEFAULT_MAX_FILES = _optional_int("QUOTA_DEFAULT_MAX_FILES")
+QUOTA_DEFAULT_MAX_CORE_SECONDS = _optional_int("QUOTA_DEFAULT_MAX_CORE_SECONDS")
+
+# Export settings only
+__all__ = [
+    'QUOTA_DEFAULT_MAX_BYTES',
+    'QUOTA_DEFAULT_MAX_FILES',
+    'QUOTA_DEFAULT_MAX_CORE_SECONDS',
+]
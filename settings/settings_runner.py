@@ -0,0 +1,92 @@
+# Copyright (C) 2025 fyn-api Authors
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU
+# General Public License as published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+"""
+Runner fleet and job dispatch settings
+"""
+
+import os
+
+# --------------------------------------------------------------------------------------------------
+#  Setting Construction
+# --------------------------------------------------------------------------------------------------
+
+# Assign jobs submitted without a runner to one of the owner's online runners, preferring runners
+# that already hold the application version (see application_registry.prefetch), then idle ones.
+JOB_AUTO_DISPATCH = os.getenv("JOB_AUTO_DISPATCH", "False") == "True"
+
+# Seconds a runner token lookup is kept in the cache (see runner_manager.token_cache), 0 disables it.
+# Token rotation and runner deletion only invalidate the entries of a shared cache: with the
+# per-process memory cache used without CACHE_REDIS_URL, other workers would keep accepting a
+# revoked token until the TTL ends, so the cache is off by default unless CACHE_REDIS_URL is set.
+# Only enable it without one for single-process deployments.
+RUNNER_TOKEN_CACHE_TTL = int(
+    os.getenv("RUNNER_TOKEN_CACHE_TTL", "60" if os.getenv("CACHE_REDIS_URL") else "0")
+)
+
+# Heartbeats not changing a runner's state are buffered and written to the database in bulk at most
+# every this many seconds (see runner_manager.heartbeats), 0 writes each one immediately
+RUNNER_HEARTBEAT_FLUSH_INTERVAL = int(os.getenv("RUNNER_HEARTBEAT_FLUSH_INTERVAL", "30"))
+
+# Online runners without a heartbeat for this many seconds are marked OFFLINE by the liveness
+# monitor (manage.py monitor_runners --loop), checking every RUNNER_LIVENESS_CHECK_INTERVAL seconds.
+# Keep the timeout above RUNNER_HEARTBEAT_FLUSH_INTERVAL when the cache is not shared (no Redis).
+RUNNER_HEARTBEAT_TIMEOUT = int(os.getenv("RUNNER_HEARTBEAT_TIMEOUT", "90"))
+RUNNER_LIVENESS_CHECK_INTERVAL = int(os.getenv("RUNNER_LIVENESS_CHECK_INTERVAL", "15"))
+
+# Runner WebSocket messages (see runner_manager.messaging) without acknowledgement for
+# RUNNER_MESSAGE_ACK_TIMEOUT seconds are pushed again by the liveness monitor, up to
+# RUNNER_MESSAGE_MAX_ATTEMPTS times, and kept for replay on reconnect RUNNER_MESSAGE_RETENTION seconds
+RUNNER_MESSAGE_ACK_TIMEOUT = int(os.getenv("RUNNER_MESSAGE_ACK_TIMEOUT", "30"))
+RUNNER_MESSAGE_MAX_ATTEMPTS = int(os.getenv("RUNNER_MESSAGE_MAX_ATTEMPTS", "5"))
+RUNNER_MESSAGE_RETENTION = int(os.getenv("RUNNER_MESSAGE_RETENTION", str(24 * 60 * 60)))
+
+# Runner telemetry (see runner_manager.metrics): retention in seconds of raw samples, of 1 minute and
+# of 1 hour rollups, and how far back each rollup run recomputes buckets
+RUNNER_METRIC_RETENTION_RAW = int(os.getenv("RUNNER_METRIC_RETENTION_RAW", str(24 * 60 * 60)))
+RUNNER_METRIC_RETENTION_MINUTE = int(
+    os.getenv("RUNNER_METRIC_RETENTION_MINUTE", str(7 * 24 * 60 * 60))
+)
+RUNNER_METRIC_RETENTION_HOUR = int(
+    os.getenv("RUNNER_METRIC_RETENTION_HOUR", str(400 * 24 * 60 * 60))
+)
+RUNNER_METRIC_ROLLUP_LOOKBACK = int(os.getenv("RUNNER_METRIC_ROLLUP_LOOKBACK", "900"))
+
+# Seconds the fleet overview of a user (runner_manager.fleet) is cached, 0 disables it
+FLEET_OVERVIEW_CACHE_TTL = int(os.getenv("FLEET_OVERVIEW_CACHE_TTL", "5"))
+
+# Runners created by one bulk provisioning request (POST /runner_manager/users/provision/)
+RUNNER_PROVISION_MAX = int(os.getenv("RUNNER_PROVISION_MAX", "1000"))
+
+# Key of the runner token hashes (see runner_manager.tokens), SECRET_KEY when empty. Changing it
+# invalidates all runner tokens.
+RUNNER_TOKEN_HASH_KEY = os.getenv("RUNNER_TOKEN_HASH_KEY", "")
+
+# Export settings only
+__all__ = [
+    'JOB_AUTO_DISPATCH',
+    'RUNNER_TOKEN_CACHE_TTL',
+    'RUNNER_TOKEN_HASH_KEY',
+    'RUNNER_HEARTBEAT_FLUSH_INTERVAL',
+    'RUNNER_HEARTBEAT_TIMEOUT',
+    'RUNNER_LIVENESS_CHECK_INTERVAL',
+    'RUNNER_MESSAGE_ACK_TIMEOUT',
+    'RUNNER_MESSAGE_MAX_ATTEMPTS',
+    'RUNNER_MESSAGE_RETENTION',
+    'RUNNER_METRIC_RETENTION_RAW',
+    'RUNNER_METRIC_RETENTION_MINUTE',
+    'RUNNER_METRIC_RETENTION_HOUR',
+    'RUNNER_METRIC_ROLLUP_LOOKBACK',
+    'FLEET_OVERVIEW_CACHE_TTL',
+    'RUNNER_PROVISION_MAX',
+]
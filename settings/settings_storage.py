@@ -33,7 +33,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
-# Storage backends
+# Storage backends: "filesystem" keeps job resources and applications under MEDIA_ROOT, "s3" puts
+# them in an S3-compatible object store (AWS, MinIO, ...; needs django-storages and boto3) that
+# runners transfer files with directly using presigned URLs.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "filesystem")
+
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
@@ -41,17 +45,100 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
     },
+    "job_resources": {
+        "BACKEND": "common.storage.PreserveFilenameStorage",
+    },
+    "applications": {
+        "BACKEND": "common.storage.ApplicationStorage",
+    },
 }
 
+if STORAGE_BACKEND == "s3":
+    _S3_OPTIONS = {
+        "bucket_name": os.getenv("STORAGE_S3_BUCKET", "fyn"),
+        "endpoint_url": os.getenv("STORAGE_S3_ENDPOINT_URL") or None,
+        "region_name": os.getenv("STORAGE_S3_REGION") or None,
+        "access_key": os.getenv("STORAGE_S3_ACCESS_KEY") or None,
+        "secret_key": os.getenv("STORAGE_S3_SECRET_KEY") or None,
+        "file_overwrite": True,
+        "querystring_auth": True,
+        "signature_version": "s3v4",
+    }
+    STORAGES["job_resources"] = {
+        "BACKEND": "common.storage.PreserveFilenameS3Storage",
+        "OPTIONS": {**_S3_OPTIONS, "location": "jobs"},
+    }
+    STORAGES["applications"] = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {**_S3_OPTIONS, "location": "applications"},
+    }
+elif STORAGE_BACKEND != "filesystem":
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+# Lifetime of presigned transfer URLs in seconds, and the largest file a runner may upload directly.
+PRESIGNED_URL_EXPIRY = int(os.getenv("PRESIGNED_URL_EXPIRY", "300"))
+PRESIGNED_UPLOAD_MAX_SIZE = int(os.getenv("PRESIGNED_UPLOAD_MAX_SIZE", str(5 * 1024 ** 3)))
+
 # File upload settings (increase default sizes)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024 
 
+# Download offloading: "" streams files through Django, "x-accel-redirect" (nginx) or "x-sendfile"
+# (apache/lighttpd) hand the transfer to the front proxy once the request has been authorised.
+FILE_DOWNLOAD_OFFLOAD = os.getenv("FILE_DOWNLOAD_OFFLOAD", "")
+
+# Local directories and the internal proxy location serving them (used by X-Accel-Redirect), e.g.
+#   location /protected/media/ { internal; alias /app/media/; }
+FILE_DOWNLOAD_OFFLOAD_LOCATIONS = {
+    MEDIA_ROOT: os.getenv("FILE_DOWNLOAD_OFFLOAD_MEDIA_LOCATION", "/protected/media/"),
+}
+
+# Serve offloaded downloads from Django itself (development and tests only, no proxy required).
+FILE_DOWNLOAD_OFFLOAD_EMULATE = os.getenv("FILE_DOWNLOAD_OFFLOAD_EMULATE", "False") == "True"
+
+# Compression at rest for job resources: "" stores files raw, "gzip" or "zstd" (needs the
+# zstandard package) compresses text-like files on upload. Downloads are decompressed on the fly, or
+# passed through compressed when the client sends a matching Accept-Encoding.
+RESOURCE_STORAGE_COMPRESSION = os.getenv("RESOURCE_STORAGE_COMPRESSION", "")
+RESOURCE_COMPRESSION_MIN_SIZE = 4 * 1024
+RESOURCE_COMPRESSIBLE_EXTENSIONS = [
+    ".csv", ".dat", ".json", ".log", ".out", ".txt", ".vtk", ".xml", ".yaml", ".yml",
+]
+
+# Retention policies per resource type, applied to finished jobs by manage.py compact_job_resources
+# once the job has not changed for "after_days":
+#   "delete"   - remove the resources (and their files),
+#   "compress" - compress the stored files ("encoding", default gzip),
+#   "pack"     - move the files into a single zip per job and type.
+# Compressed and packed resources stay downloadable through the usual endpoints.
+RESOURCE_RETENTION_POLICIES = {
+    "TMP": {"action": "delete", "after_days": 0},
+    "LOG": {"action": "compress", "after_days": 7},
+    "OUT": {"action": "pack", "after_days": 30},
+}
+
+# Largest window served by the resource slice endpoint, in bytes and in lines/CSV rows. Line, tail
+# and CSV slices longer than RESOURCE_SLICE_MAX_BYTES (long lines) are cut and marked X-Truncated.
+RESOURCE_SLICE_MAX_BYTES = 16 * 1024 * 1024
+RESOURCE_SLICE_MAX_LINES = 100000
+
 # Export settings only
 __all__ = [
     'MEDIA_ROOT',
     'MEDIA_URL', 
+    'STORAGE_BACKEND',
     'STORAGES',
+    'PRESIGNED_URL_EXPIRY',
+    'PRESIGNED_UPLOAD_MAX_SIZE',
     'FILE_UPLOAD_MAX_MEMORY_SIZE',
     'DATA_UPLOAD_MAX_MEMORY_SIZE',
+    'FILE_DOWNLOAD_OFFLOAD',
+    'FILE_DOWNLOAD_OFFLOAD_LOCATIONS',
+    'FILE_DOWNLOAD_OFFLOAD_EMULATE',
+    'RESOURCE_STORAGE_COMPRESSION',
+    'RESOURCE_COMPRESSION_MIN_SIZE',
+    'RESOURCE_COMPRESSIBLE_EXTENSIONS',
+    'RESOURCE_RETENTION_POLICIES',
+    'RESOURCE_SLICE_MAX_BYTES',
+    'RESOURCE_SLICE_MAX_LINES',
 ]
\ No newline at end of file